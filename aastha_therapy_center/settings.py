@@ -45,7 +45,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'astha_therapy_center_web.middleware.ReplicaPinMiddleware',
+    'astha_therapy_center_web.middleware.LazySessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -79,14 +80,24 @@ WSGI_APPLICATION = 'aastha_therapy_center.wsgi.application'
 
 
 
+# Connections are reused instead of opened per request (TCP handshake,
+# auth and init_command each time). By default every worker thread keeps
+# its own connection for DB_CONN_MAX_AGE seconds, pinged before the first
+# query of a request. DB_POOL=1 instead shares a pool of connections per
+# worker process (see astha_therapy_center_web/db/pool.py), which bounds
+# the connection count of threaded and ASGI workers.
+DB_POOL = os.getenv('DB_POOL', '').lower() in ('1', 'true', 'yes')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'astha_therapy_center_web.db.mysql',
         'NAME': os.getenv('DB_NAME',),
         'USER': os.getenv('DB_USER',),
         'PASSWORD': os.getenv('DB_PASSWORD',),
         'HOST': os.getenv('DB_HOST',),
         'PORT': os.getenv('DB_PORT',),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 300)),
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
             'charset': 'utf8mb4',
@@ -100,6 +111,82 @@ DATABASES = {
     # }
 }
 
+if DB_POOL:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+        'recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+    }
+
+# Read replicas, as comma-separated hosts with the primary's credentials.
+# Public therapist and blog reads and the admin statistics go to them;
+# writes, and a visitor's reads for REPLICA_PIN_SECONDS after they wrote,
+# go to the primary (see astha_therapy_center_web/routers.py).
+DATABASE_REPLICAS = []
+for number, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'OPTIONS': {**DATABASES['default']['OPTIONS']},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['astha_therapy_center_web.routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 5))
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# The default cache keeps recently read entries in each worker's memory
+# for up to CACHE_LOCAL_TIMEOUT seconds, in front of a 'shared' tier every
+# worker sees: Redis at CACHE_REDIS_URL when set, otherwise files under
+# CACHE_DIR for the workers of one host (see astha_therapy_center_web/caching.py).
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', '')
+CACHE_DIR = Path(os.getenv('CACHE_DIR') or BASE_DIR / '.cache')
+
+
+def shared_cache(name, **options):
+    """A cache every worker sees, kept apart from the others under `name`"""
+    if CACHE_REDIS_URL:
+        return {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_REDIS_URL,
+                'KEY_PREFIX': name, **options}
+    return {'BACKEND': 'astha_therapy_center_web.caching.SharedFileCache', 'LOCATION': CACHE_DIR / name, **options}
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'astha_therapy_center_web.caching.TieredCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_LOCAL_MAX_ENTRIES', 1000)),
+            'LOCAL_TIMEOUT': int(os.getenv('CACHE_LOCAL_TIMEOUT', 10)),
+        },
+    },
+    'shared': shared_cache('shared', OPTIONS={'MAX_ENTRIES': 10000}),
+    # Sessions and the logged-in user. Shared by every worker, so logout,
+    # password changes and deactivation take effect everywhere at once.
+    # Sessions are also persisted to MySQL by the cached_db session engine,
+    # so losing the cache only costs one extra query per session.
+    'sessions': shared_cache(
+        'sessions',
+        TIMEOUT=int(os.getenv('SESSION_USER_CACHE_TIMEOUT', 300)),
+        OPTIONS={'MAX_ENTRIES': 5000},
+    ),
+}
+
+
+# Sessions and authentication
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+AUTHENTICATION_BACKENDS = [
+    'astha_therapy_center_web.backends.CachedModelBackend',
+]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -136,6 +223,19 @@ SITE_ID = 1
 SITE_NAME = os.getenv('SITE_NAME', 'Aastha Therapy Center')
 SITE_DOMAIN = os.getenv('SITE_DOMAIN', 'asthatherapycenter.com')
 
+# Country code assumed for phone numbers entered without one
+PHONE_DEFAULT_COUNTRY_CODE = os.getenv('PHONE_DEFAULT_COUNTRY_CODE', '880')
+
+# Completed/cancelled appointments and replied/closed messages older than
+# this many days are moved to the archive tables by `manage.py archive_rows`
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 365))
+
+# Blog post views are buffered per process and written in one UPDATE every
+# this many seconds, or sooner once this many views are waiting; a crashed
+# worker loses at most that much
+BLOG_VIEW_FLUSH_INTERVAL = int(os.getenv('BLOG_VIEW_FLUSH_INTERVAL', 60))
+BLOG_VIEW_FLUSH_MAX_PENDING = int(os.getenv('BLOG_VIEW_FLUSH_MAX_PENDING', 500))
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
@@ -149,6 +249,10 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Flash messages are short, so keep them in a signed cookie instead of
+# falling back to the session table for anonymous form submissions
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 # Custom User Model
 AUTH_USER_MODEL = 'astha_therapy_center_web.CustomUser'
 
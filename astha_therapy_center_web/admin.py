@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Article, Appointment, Contact, Therapist
+from .models import (
+    CustomUser, Article, Appointment, BlogCategory, BlogPost, BlogTag, Contact, Patient, Therapist, StatusCounter,
+)
 
 
 class CustomUserAdmin(UserAdmin):
@@ -76,11 +78,11 @@ class ContactAdmin(admin.ModelAdmin):
     )
     
     def mark_as_read(self, request, queryset):
-        queryset.update(status='read')
+        queryset.set_status('read')
     mark_as_read.short_description = "Mark selected messages as read"
     
     def mark_as_replied(self, request, queryset):
-        queryset.update(status='replied')
+        queryset.set_status('replied')
     mark_as_replied.short_description = "Mark selected messages as replied"
     
     actions = ['mark_as_read', 'mark_as_replied']
@@ -129,3 +131,70 @@ class TherapistAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).order_by('display_order', 'name')
+
+
+# Register blog models for Django admin
+@admin.register(BlogCategory)
+class BlogCategoryAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'is_active', 'display_order']
+    list_editable = ['is_active', 'display_order']
+    prepopulated_fields = {'slug': ('name',)}
+
+
+@admin.register(BlogTag)
+class BlogTagAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'is_active']
+    list_editable = ['is_active']
+    prepopulated_fields = {'slug': ('name',)}
+
+
+@admin.register(BlogPost)
+class BlogPostAdmin(admin.ModelAdmin):
+    list_display = ['title', 'category', 'status', 'published_at', 'is_featured', 'view_count']
+    list_filter = ['status', 'is_featured', 'category', 'published_at']
+    search_fields = ['title', 'excerpt']
+    prepopulated_fields = {'slug': ('title',)}
+    filter_horizontal = ['tags']
+    list_select_related = ['category']
+    readonly_fields = ['content_html', 'view_count', 'created_at', 'updated_at']
+    list_per_page = 20
+
+    fieldsets = (
+        ('Post', {
+            'fields': ('title', 'slug', 'category', 'tags', 'excerpt', 'content', 'featured_image')
+        }),
+        ('Publishing', {
+            'fields': ('status', 'published_at', 'is_featured', 'display_order', 'allow_comments', 'allow_sharing')
+        }),
+        ('SEO', {
+            'fields': ('meta_title', 'meta_description', 'meta_keywords'),
+            'classes': ('collapse',)
+        }),
+        ('System Information', {
+            'fields': ('content_html', 'view_count', 'created_at', 'updated_at'),
+            'classes': ('collapse',)
+        }),
+    )
+
+
+# Register StatusCounter model for Django admin (read-only, fixed by reconcile_counters)
+@admin.register(StatusCounter)
+class StatusCounterAdmin(admin.ModelAdmin):
+    list_display = ['scope', 'status', 'count']
+    list_filter = ['scope']
+    ordering = ['scope', 'status']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# Register Patient model for Django admin
+@admin.register(Patient)
+class PatientAdmin(admin.ModelAdmin):
+    list_display = ['name', 'email', 'phone', 'created_at']
+    search_fields = ['=email_normalized', '=phone_normalized', 'name']
+    readonly_fields = ['id', 'email_normalized', 'phone_normalized', 'created_at', 'updated_at']
+    list_per_page = 20
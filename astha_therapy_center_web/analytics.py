@@ -0,0 +1,114 @@
+import numpy as np
+from django.core.cache import cache
+from django.db import connections
+
+from .caching import get_or_compute
+from .models import Therapist
+from .routers import PRIMARY
+
+SKILL_FIELDS = [
+    ('skill_patient_diagnosis', 'patient diagnosis'),
+    ('skill_treatment_planning', 'treatment planning'),
+    ('skill_manual_therapy', 'manual therapy techniques'),
+    ('skill_exercise_prescription', 'exercise prescription'),
+    ('skill_electrotherapy', 'electrotherapy skill'),
+    ('skill_interpersonal', 'interpersonal skills'),
+]
+PERCENTILES = [25, 50, 75, 90]
+HISTOGRAM_BINS = np.arange(0, 101, 10)
+
+SKILLS_CACHE_KEY = 'analytics:therapist_skills'
+# Saves reach every worker within the cache's LOCAL_TIMEOUT; the timeout
+# only bounds the life of an entry nobody invalidated.
+SKILLS_CACHE_TIMEOUT = 300
+
+
+def load_skill_matrix():
+    """
+    Load the skill columns and experience of all active therapists with a
+    single projection query, as a (therapists x (skills + 1)) uint16 array.
+    Read from the primary, like compute_taxonomy_counts().
+    """
+    fields = [field for field, _ in SKILL_FIELDS] + ['experience_years']
+    queryset = Therapist.objects.using(PRIMARY).filter(is_active=True).order_by().values_list(*fields)
+    # Integer columns need no ORM conversion, so read the raw cursor rows
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return np.array(rows, dtype=np.uint16).reshape(-1, len(fields))
+
+
+def compute_skill_summary(matrix):
+    """
+    Means, percentiles, histograms and the skill correlation matrix of a
+    skill matrix as returned by load_skill_matrix(), in plain JSON types
+    """
+    skills = matrix[:, :len(SKILL_FIELDS)].astype(np.float64)
+    experience = matrix[:, len(SKILL_FIELDS)].astype(np.float64)
+    labels = [label for _, label in SKILL_FIELDS]
+    count = len(matrix)
+
+    if count == 0:
+        return {
+            'count': 0,
+            'avg_experience': 0,
+            'histogram_bins': HISTOGRAM_BINS.tolist(),
+            'skills': [
+                {'field': field, 'label': label, 'mean': 0,
+                 'percentiles': {f'p{p}': 0 for p in PERCENTILES},
+                 'histogram': [0] * (len(HISTOGRAM_BINS) - 1)}
+                for field, label in SKILL_FIELDS
+            ],
+            'correlation': {'labels': labels, 'matrix': []},
+        }
+
+    # Skills are integer percentages, so one bincount over (skill, value)
+    # pairs gives exact per-skill distributions that the means, percentiles
+    # and histograms are all read from without sorting.
+    values = np.minimum(matrix[:, :len(SKILL_FIELDS)], 100).astype(np.intp)
+    offsets = values + np.arange(len(SKILL_FIELDS)) * 101
+    value_counts = np.bincount(offsets.ravel(), minlength=len(SKILL_FIELDS) * 101).reshape(-1, 101)
+    means = value_counts @ np.arange(101) / count
+    # Inverted-CDF percentiles: the first value whose cumulative count reaches the rank
+    ranks = np.ceil(np.array(PERCENTILES) / 100 * count)
+    cumulative = value_counts.cumsum(axis=1)
+    percentiles = (cumulative[:, None, :] < ranks[None, :, None]).sum(axis=2)
+    # Ten 10-point bins; 100% falls into the last one
+    histograms = value_counts[:, :100].reshape(len(SKILL_FIELDS), 10, 10).sum(axis=2)
+    histograms[:, -1] += value_counts[:, 100]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlation = np.corrcoef(skills, rowvar=False) if count > 1 else np.full((len(SKILL_FIELDS),) * 2, np.nan)
+
+    return {
+        'count': count,
+        'avg_experience': round(float(experience.mean()), 1),
+        'histogram_bins': HISTOGRAM_BINS.tolist(),
+        'skills': [
+            {
+                'field': field,
+                'label': label,
+                'mean': round(float(means[i]), 1),
+                'percentiles': {f'p{p}': int(percentiles[i, j]) for j, p in enumerate(PERCENTILES)},
+                'histogram': histograms[i].tolist(),
+            }
+            for i, (field, label) in enumerate(SKILL_FIELDS)
+        ],
+        # Constant columns have no defined correlation; report them as null
+        'correlation': {
+            'labels': labels,
+            'matrix': [
+                [None if np.isnan(value) else round(float(value), 3) for value in row]
+                for row in correlation
+            ],
+        },
+    }
+
+
+def get_skill_summary():
+    """Cached skill summary, recomputed after any therapist changes"""
+    return get_or_compute(SKILLS_CACHE_KEY, lambda: compute_skill_summary(load_skill_matrix()), SKILLS_CACHE_TIMEOUT)
+
+
+def invalidate_skill_summary():
+    cache.delete(SKILLS_CACHE_KEY)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AsthaTherapyCenterWebConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'astha_therapy_center_web'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,146 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    Appointment, ArchivedAppointment, ArchivedContact, Contact, ContactSearchTerm, StatusCounter,
+)
+from .search import appointment_lookup, index_contacts
+
+DEFAULT_ARCHIVE_CHUNK_SIZE = 500
+
+
+class ArchiveTier:
+    """
+    A hot table, its archive table and the statuses after which rows no
+    longer change and may be archived
+    """
+    def __init__(self, model, archive_model, closed_statuses):
+        self.model = model
+        self.archive_model = archive_model
+        self.closed_statuses = closed_statuses
+
+    @property
+    def scope(self):
+        return self.model._meta.model_name
+
+    @property
+    def counter_scope(self):
+        """
+        StatusCounter scope of the archived rows. The model's own counters
+        keep counting them, so dashboards and statistics are unaffected by
+        archiving; the hot-table count is the difference of the two.
+        """
+        return f'archived_{self.scope}'
+
+    def copy(self, row, model):
+        """An unsaved `model` instance with the column values of `row`"""
+        return model(**{
+            field.attname: getattr(row, field.attname)
+            for field in model._meta.concrete_fields if hasattr(row, field.attname)
+        })
+
+
+TIERS = {
+    'appointment': ArchiveTier(Appointment, ArchivedAppointment, ('completed', 'cancelled')),
+    'contact': ArchiveTier(Contact, ArchivedContact, ('replied', 'closed')),
+}
+
+
+def archive_cutoff(days=None):
+    """Rows created before this datetime are old enough to archive"""
+    return timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS if days is None else days)
+
+
+def archive_chunk(tier, status, before, chunk_size=DEFAULT_ARCHIVE_CHUNK_SIZE):
+    """
+    Move up to `chunk_size` of the oldest rows with `status` created before
+    `before` into the archive, in one short transaction. Rows are read in
+    (status, created_at, id) index order and locked with SKIP LOCKED, so
+    a row being edited is simply left for the next run. Returns the number
+    of rows moved.
+
+    The hot rows are deleted without signals: their counters and rollups
+    still count them (see ArchiveTier.counter_scope).
+    """
+    model = tier.model
+    with transaction.atomic():
+        rows = list(
+            model._base_manager.filter(status=status, created_at__lt=before)
+            .order_by('created_at', 'id').select_for_update(skip_locked=True)[:chunk_size]
+        )
+        if not rows:
+            return 0
+        ids = [row.pk for row in rows]
+        tier.archive_model.objects.bulk_create([tier.copy(row, tier.archive_model) for row in rows])
+        if model is Contact:
+            ContactSearchTerm.objects.filter(contact__in=ids).delete()
+        model._base_manager.filter(pk__in=ids)._raw_delete(model._base_manager.db)
+        StatusCounter.objects.adjust(tier.counter_scope, status, len(rows))
+    return len(rows)
+
+
+def archive_rows(tier, before, chunk_size=DEFAULT_ARCHIVE_CHUNK_SIZE, progress=None):
+    """
+    Archive every closed row of `tier` created before `before`, one chunk
+    per transaction. `progress(status, moved)` is called after each chunk.
+    Returns a Counter of rows moved per status.
+    """
+    moved = Counter()
+    for status in tier.closed_statuses:
+        while True:
+            count = archive_chunk(tier, status, before, chunk_size)
+            if not count:
+                break
+            moved[status] += count
+            if progress is not None:
+                progress(status, moved[status])
+    return moved
+
+
+def restore_row(tier, pk):
+    """
+    Move one archived row back into the hot table, e.g. to edit it again.
+    Returns the restored instance; raises DoesNotExist if it is not archived.
+    """
+    with transaction.atomic():
+        archived = tier.archive_model.objects.select_for_update().get(pk=pk)
+        row = tier.copy(archived, tier.model)
+        # bulk_create skips save() and the signals (the counters never
+        # stopped counting the row) but stamps the auto_now fields
+        tier.model._base_manager.bulk_create([row])
+        tier.model._base_manager.filter(pk=pk).update(
+            created_at=archived.created_at, updated_at=archived.updated_at
+        )
+        row.created_at, row.updated_at = archived.created_at, archived.updated_at
+        if tier.model is Contact:
+            index_contacts([row], replace=False)
+        archived.delete()
+        StatusCounter.objects.adjust(tier.counter_scope, archived.status, -1)
+    return row
+
+
+def search_archive(tier, query):
+    """
+    Filter for the archive search box. Archived appointments use the same
+    indexed phone/email lookup as the hot table; archived messages are only
+    searched on demand, so they are scanned rather than indexed.
+    """
+    if tier.model is Appointment:
+        return appointment_lookup(query)
+    condition = Q()
+    for word in query.split():
+        condition &= (Q(name__icontains=word) | Q(email__icontains=word) |
+                      Q(subject__icontains=word) | Q(message__icontains=word))
+    return condition
+
+
+def hot_counts(scope, counters=None):
+    """Per-status row counts of the hot table of `scope`, from the counter snapshot"""
+    if counters is None:
+        counters = StatusCounter.objects.snapshot()
+    return counters[scope] - counters[TIERS[scope].counter_scope]
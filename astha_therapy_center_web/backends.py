@@ -0,0 +1,42 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def user_cache_key(user_id):
+    """Cache key under which an authenticated user is stored"""
+    return f'auth:user:{user_id}'
+
+
+def get_user_cache():
+    """Return the cache shared by every worker with the session engine"""
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def invalidate_cached_user(user_id):
+    """Drop a cached user so the next request reloads it from the database"""
+    get_user_cache().delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that keeps the user behind each session in the sessions cache,
+    so authenticated staff requests do not query the user table every time.
+
+    Entries expire with the cache alias TIMEOUT and are dropped on logout and
+    whenever the user row is saved (password change, deactivation, ...).
+    """
+    def get_user(self, user_id):
+        cache = get_user_cache()
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user)
+        return user
+
+    async def aget_user(self, user_id):
+        # ModelBackend.aget_user queries directly; async views share the cache
+        return await sync_to_async(self.get_user)(user_id)
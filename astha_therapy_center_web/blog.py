@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.db.models import Count, Prefetch, Q
+from django.utils import timezone
+
+from .caching import get_or_compute
+from .models import BlogCategory, BlogTag
+from .routers import PRIMARY
+
+TAXONOMY_CACHE_KEY = 'blog:taxonomy_counts'
+# Post, category and tag changes reach every worker within the cache's
+# LOCAL_TIMEOUT; the timeout bounds how long scheduled posts going live
+# take to show in the counts.
+TAXONOMY_CACHE_TIMEOUT = 300
+# Listing pages never show the post body
+LIST_DEFERRED_FIELDS = ['content', 'content_html', 'meta_title', 'meta_description', 'meta_keywords']
+
+
+def listing(posts):
+    """
+    `posts` ready for a listing page: category joined in, active tags
+    fetched for the whole page in one extra query, bodies left unloaded
+    """
+    return posts.select_related('category').defer(*LIST_DEFERRED_FIELDS).prefetch_related(
+        Prefetch('tags', queryset=BlogTag.objects.filter(is_active=True).only('name', 'slug'))
+    )
+
+
+def compute_taxonomy_counts():
+    """
+    Active categories and tags with their number of published posts, one
+    query each. Read from the primary: the result is cached for everyone,
+    and a recompute after an invalidation must see the write behind it.
+    """
+    published = Q(posts__status='published', posts__published_at__lte=timezone.now())
+    return {
+        key: [
+            {'name': name, 'slug': slug, 'count': count}
+            for name, slug, count in model.objects.using(PRIMARY).filter(is_active=True)
+            .annotate(count=Count('posts', filter=published)).filter(count__gt=0)
+            .order_by(*model._meta.ordering).values_list('name', 'slug', 'count')
+        ]
+        for key, model in (('categories', BlogCategory), ('tags', BlogTag))
+    }
+
+
+def get_taxonomy_counts():
+    """Cached taxonomy counts for the blog sidebar"""
+    return get_or_compute(TAXONOMY_CACHE_KEY, compute_taxonomy_counts, TAXONOMY_CACHE_TIMEOUT)
+
+
+def invalidate_taxonomy_counts():
+    cache.delete(TAXONOMY_CACHE_KEY)
@@ -0,0 +1,157 @@
+import bisect
+import itertools
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.db import transaction
+
+from .blog import listing
+from .models import BlogPost, BlogSearchTerm, SearchIndexVersion
+from .search import MAX_QUERY_TERMS, tokenize
+
+INDEX_NAME = 'blog'
+# Matches in the title or tags outrank matches in the body
+FIELD_WEIGHTS = {'title': 3, 'tags': 3, 'meta_keywords': 2, 'excerpt': 2, 'content': 1}
+# Standard BM25 parameters: term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Index terms a query word may expand to as a prefix ("shoulder" -> "shoulders")
+MAX_PREFIX_EXPANSIONS = 20
+# Seconds a worker serves its in-memory index before checking the version
+VERSION_CHECK_INTERVAL = 5
+SEARCH_LIMIT = 30
+
+
+def post_terms(post, tags):
+    """Weighted term frequencies of a post across its searchable fields and tag names"""
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        text = ' '.join(tags) if field == 'tags' else getattr(post, field)
+        for token in tokenize(text):
+            weights[token] += weight
+    return weights
+
+
+def index_posts(posts):
+    """
+    Replace the index rows of `posts` (published ones are indexed, others
+    dropped) and bump the index version so every worker reloads
+    """
+    posts = list(posts)
+    ids = [post.pk for post in posts]
+    tags = defaultdict(list)
+    rows = BlogPost.tags.through.objects.filter(blogpost_id__in=ids, blogtag__is_active=True)
+    for post_id, name in rows.values_list('blogpost_id', 'blogtag__name'):
+        tags[post_id].append(name)
+
+    with transaction.atomic():
+        BlogSearchTerm.objects.filter(post__in=ids).delete()
+        BlogSearchTerm.objects.bulk_create([
+            BlogSearchTerm(post_id=post.pk, term=term, weight=min(weight, 32767))
+            for post in posts if post.status == 'published'
+            for term, weight in post_terms(post, tags[post.pk]).items()
+        ], batch_size=1000)
+        bump_version()
+
+
+def bump_version():
+    SearchIndexVersion.objects.increment(1, name=INDEX_NAME)
+
+
+def current_version():
+    return SearchIndexVersion.objects.filter(name=INDEX_NAME).values_list('count', flat=True).first() or 0
+
+
+class BlogSearchIndex:
+    """
+    Read-only copy of the BlogSearchTerm table in a few flat arrays: the
+    sorted term list, and per term a slice of the postings (dense post
+    numbers and weights). Built from the rows sorted by term; a query word is a
+    binary search plus vectorized BM25 over its postings.
+    """
+    def __init__(self, version, rows):
+        self.version = version
+        self.terms = []
+        offsets, post_ids, weights = [0], [], []
+        for term, group in itertools.groupby(rows, key=lambda row: row[0]):
+            self.terms.append(term)
+            for _, post_id, weight in group:
+                post_ids.append(post_id)
+                weights.append(weight)
+            offsets.append(len(post_ids))
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.post_ids, self.postings = np.unique(np.array(post_ids, dtype=np.int64), return_inverse=True)
+        self.weights = np.array(weights, dtype=np.float32)
+        self.lengths = np.bincount(self.postings, weights=self.weights, minlength=len(self.post_ids))
+        self.average_length = float(self.lengths.mean()) if len(self.post_ids) else 0.0
+
+    def __len__(self):
+        return len(self.post_ids)
+
+    def term_scores(self, position):
+        """BM25 contribution of the term at `position` to each post containing it"""
+        start, end = self.offsets[position], self.offsets[position + 1]
+        posts, frequency = self.postings[start:end], self.weights[start:end]
+        idf = math.log(1 + (len(self) - (end - start) + 0.5) / ((end - start) + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[posts] / self.average_length)
+        return posts, idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """
+        [(post id, score)] for `query`, best first. Posts matching more of
+        the query words come first; each word also matches as a prefix.
+        """
+        words = tokenize(query)[:MAX_QUERY_TERMS]
+        if not words or not len(self):
+            return []
+        scores = np.zeros(len(self))
+        matched = np.zeros(len(self), dtype=np.int64)
+        for word in words:
+            best = np.zeros(len(self))
+            first = bisect.bisect_left(self.terms, word)
+            last = min(bisect.bisect_left(self.terms, word + '\U0010ffff'), first + MAX_PREFIX_EXPANSIONS)
+            for position in range(first, last):
+                posts, term_scores = self.term_scores(position)
+                best[posts] = np.maximum(best[posts], term_scores)
+            scores += best
+            matched += best > 0
+        hits = np.flatnonzero(matched)
+        order = hits[np.lexsort((-scores[hits], -matched[hits]))][:limit]
+        return [(int(self.post_ids[i]), float(scores[i])) for i in order]
+
+
+_lock = threading.Lock()
+_index = None
+_checked_at = 0.0
+
+
+def get_index(check_interval=VERSION_CHECK_INTERVAL):
+    """
+    This worker's in-memory index, reloaded when the version in the
+    database moved. The version is read at most every `check_interval`
+    seconds, so searches normally cost no index queries at all.
+    """
+    global _index, _checked_at
+    if _index is not None and time.monotonic() - _checked_at < check_interval:
+        return _index
+    with _lock:
+        version = current_version()
+        _checked_at = time.monotonic()
+        if _index is None or _index.version != version:
+            # Sorted here: bisect needs codepoint order, whatever the collation
+            rows = sorted(BlogSearchTerm.objects.order_by().values_list('term', 'post_id', 'weight')
+                          .iterator(chunk_size=5000))
+            _index = BlogSearchIndex(version, rows)
+    return _index
+
+
+def search_posts(query, limit=SEARCH_LIMIT):
+    """Published posts matching `query`, best first, ready for a listing page"""
+    ranked = get_index().search(query, limit)
+    if not ranked:
+        return []
+    found = listing(BlogPost.objects.published()).in_bulk([post_id for post_id, _ in ranked])
+    return [found[post_id] for post_id, _ in ranked if post_id in found]
@@ -0,0 +1,368 @@
+import atexit
+import math
+import os
+import pickle
+import random
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+
+# Seconds an entry is served from process memory before the shared tier is
+# asked again; bounds how long other workers see a deleted or replaced value
+LOCAL_TIMEOUT = 10
+# Seconds a recompute lock is held at most, should its holder die
+LOCK_TIMEOUT = 30
+# Seconds a caller waits for another worker's recompute before doing it too
+LOCK_WAIT = 5
+# Seconds a delete is remembered, so a recompute that began before it does
+# not store its outdated result; far longer than any recompute
+GENERATION_TIMEOUT = 3600
+POLL_INTERVAL = 0.05
+# Scale of probabilistic early expiration: 1 is optimal for a single
+# recompute at a time, larger values refresh earlier
+EARLY_EXPIRATION_BETA = 1.0
+# Hit counts are merged into the shared tier this often (seconds)
+STATS_FLUSH_INTERVAL = 60
+STATS_KEY = 'cache_stats'
+OUTCOMES = ('local', 'shared', 'miss', 'computed', 'early', 'waited')
+
+
+def key_prefix(key):
+    """Stats group of `key`: 'blog' for 'blog:taxonomy_counts'"""
+    return key.split(':', 1)[0] if ':' in key else '-'
+
+
+def expires_early(expires_at, delta, beta=EARLY_EXPIRATION_BETA):
+    """
+    Whether to recompute an entry before `expires_at`. The chance grows as
+    expiry nears and with `delta`, the seconds the value took to compute,
+    so one caller refreshes a costly entry well before the others all miss
+    at once (Vattani et al., "Optimal Probabilistic Cache Stampede
+    Prevention").
+    """
+    if expires_at is None or not delta:
+        return False
+    return time.time() - delta * beta * math.log(1 - random.random()) >= expires_at
+
+
+class SharedFileCache(FileBasedCache):
+    """
+    FileBasedCache whose add() is atomic between processes, so it can hold
+    the recompute locks of TieredCache for the workers of one host
+    """
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # has_key() removes an expired file
+        if self.has_key(key, version):
+            return False
+        self._createdir()
+        self._cull()
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        try:
+            with open(fd, 'wb') as f:
+                self._write_content(f, timeout, value)
+            # Unlike the rename in set(), link() fails when the file exists
+            os.link(tmp_path, self._key_to_file(key, version))
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(tmp_path)
+
+
+class LocalTier:
+    """Least recently used entries of one process, shared by its threads"""
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            expires_at, pickled = item
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def set(self, key, entry, timeout):
+        # Pickled like LocMemCache, so callers cannot mutate what others get
+        pickled = pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, pickled)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            return self.entries.pop(key, None) is not None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class CacheStats:
+    """
+    Reads per key prefix and how they were served, counted in process
+    memory and merged into the shared tier every `interval` seconds, like
+    ViewCounter does with blog views, so `manage.py cache_stats` sees every
+    worker
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.pending = defaultdict(Counter)
+        self.last_flush = time.monotonic()
+
+    def record(self, key, outcome):
+        """Count one outcome; True when a flush is due"""
+        with self.lock:
+            self.pending[key_prefix(key)][outcome] += 1
+            return time.monotonic() - self.last_flush >= self.interval
+
+    def flush(self, shared):
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(Counter)
+            self.last_flush = time.monotonic()
+        if not pending:
+            return
+        lock = f'lock:{STATS_KEY}'
+        if shared.add(lock, 1, LOCK_TIMEOUT):
+            try:
+                totals = shared.get(STATS_KEY) or {}
+                for prefix, counts in pending.items():
+                    totals[prefix] = dict(Counter(totals.get(prefix, {})) + counts)
+                shared.set(STATS_KEY, totals, None)
+                return
+            finally:
+                shared.delete(lock)
+        # Another worker is merging; keep the counts for the next flush
+        with self.lock:
+            for prefix, counts in pending.items():
+                self.pending[prefix].update(counts)
+
+    def reset(self, shared):
+        with self.lock:
+            self.pending.clear()
+        shared.delete(STATS_KEY)
+
+
+_local_tiers = {}
+_stats = {}
+_registry_lock = threading.Lock()
+
+
+@atexit.register
+def flush_stats():
+    for location, stats in list(_stats.items()):
+        # Tests may have configured aliases that are gone by now
+        if location in caches.settings:
+            stats.flush(caches[location])
+
+
+class TieredCache(BaseCache):
+    """
+    Cache backend keeping recently read entries in process memory in front
+    of a shared cache alias (LOCATION) that every worker sees. Entries stay
+    in memory for at most LOCAL_TIMEOUT seconds (OPTIONS['LOCAL_TIMEOUT']),
+    MAX_ENTRIES of them per process. get_or_compute() adds single-flight
+    recomputes and probabilistic early expiration; a delete() during a
+    recompute keeps its result from being stored. Reads are counted per
+    key prefix.
+    """
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.shared_alias = location
+        options = params.get('OPTIONS', {})
+        self.local_timeout = options.get('LOCAL_TIMEOUT', LOCAL_TIMEOUT)
+        with _registry_lock:
+            # Django makes one backend per thread; the tiers are per process
+            self.local = _local_tiers.setdefault(location, LocalTier(self._max_entries))
+            self.stats = _stats.setdefault(location, CacheStats(options.get('STATS_FLUSH_INTERVAL', STATS_FLUSH_INTERVAL)))
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def record(self, key, outcome):
+        if self.stats.record(key, outcome):
+            self.stats.flush(self.shared)
+
+    def read(self, key, version=None):
+        """The stored (value, expires_at, delta) of `key`, or None"""
+        local_key = self.make_and_validate_key(key, version)
+        entry = self.local.get(local_key)
+        if entry is not None:
+            self.record(key, 'local')
+            return entry
+        entry = self.shared.get(key, version=version)
+        if entry is None:
+            self.record(key, 'miss')
+            return None
+        self.record(key, 'shared')
+        self.keep_local(local_key, entry)
+        return entry
+
+    def keep_local(self, local_key, entry):
+        expires_at = entry[1]
+        timeout = self.local_timeout if expires_at is None else min(self.local_timeout, expires_at - time.time())
+        if timeout > 0:
+            self.local.set(local_key, entry, timeout)
+
+    def write(self, key, value, timeout, version, delta=0, add=False):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        entry = (value, self.get_backend_timeout(timeout), delta)
+        if add:
+            if not self.shared.add(key, entry, timeout, version=version):
+                return False
+        else:
+            self.shared.set(key, entry, timeout, version=version)
+        self.keep_local(self.make_and_validate_key(key, version), entry)
+        return True
+
+    def get(self, key, default=None, version=None):
+        entry = self.read(key, version)
+        return default if entry is None else entry[0]
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.write(key, value, timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.write(key, value, timeout, version, add=True)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        entry = self.shared.get(key, version=version)
+        if entry is None:
+            return False
+        self.local.delete(self.make_and_validate_key(key, version))
+        self.write(key, entry[0], timeout, version, delta=entry[2])
+        return True
+
+    def delete(self, key, version=None):
+        # A new generation tells running recomputes their result is outdated
+        self.shared.set(f'gen:{key}', uuid.uuid4().hex, GENERATION_TIMEOUT, version=version)
+        return self.discard(key, version)
+
+    def discard(self, key, version):
+        self.local.delete(self.make_and_validate_key(key, version))
+        return self.shared.delete(key, version=version)
+
+    def generation(self, key, version):
+        return self.shared.get(f'gen:{key}', version=version)
+
+    def has_key(self, key, version=None):
+        return self.read(key, version) is not None
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def get_or_compute(self, key, compute, timeout=DEFAULT_TIMEOUT, version=None, beta=EARLY_EXPIRATION_BETA):
+        """
+        The value of `key`, from compute() when it is missing. Only the
+        worker holding the key's lock recomputes: on a miss the others wait
+        up to LOCK_WAIT seconds for its result, and once expires_early()
+        picks a caller to refresh a live entry, the others keep serving the
+        current value meanwhile.
+        """
+        entry = self.read(key, version)
+        if entry is not None:
+            value, expires_at, delta = entry
+            if not expires_early(expires_at, delta, beta):
+                return value
+            token = self.lock(key, version)
+            if token is None:
+                return value
+            self.record(key, 'early')
+            try:
+                return self.compute(key, compute, timeout, version)
+            finally:
+                self.unlock(key, version, token)
+
+        deadline = time.monotonic() + LOCK_WAIT
+        while True:
+            token = self.lock(key, version)
+            if token is not None:
+                try:
+                    # Filled by the worker that held the lock before us
+                    entry = self.shared.get(key, version=version)
+                    if entry is not None:
+                        return entry[0]
+                    return self.compute(key, compute, timeout, version)
+                finally:
+                    self.unlock(key, version, token)
+            if time.monotonic() >= deadline:
+                return self.compute(key, compute, timeout, version)
+            time.sleep(POLL_INTERVAL)
+            entry = self.shared.get(key, version=version)
+            if entry is not None:
+                self.record(key, 'waited')
+                self.keep_local(self.make_and_validate_key(key, version), entry)
+                return entry[0]
+
+    def compute(self, key, compute, timeout, version):
+        """
+        compute() and store the value, unless `key` was deleted meanwhile:
+        the value may then predate the change the delete announced, and
+        the next reader computes afresh. The caller gets the value either way.
+        """
+        generation = self.generation(key, version)
+        start = time.perf_counter()
+        value = compute()
+        if self.generation(key, version) == generation:
+            self.write(key, value, timeout, version, delta=time.perf_counter() - start)
+            # A delete between the check and the write
+            if self.generation(key, version) != generation:
+                self.discard(key, version)
+        self.record(key, 'computed')
+        return value
+
+    def lock(self, key, version):
+        """A token when this caller now holds the recompute lock of `key`, else None"""
+        token = uuid.uuid4().hex
+        return token if self.shared.add(f'lock:{key}', token, LOCK_TIMEOUT, version=version) else None
+
+    def unlock(self, key, version, token):
+        # A lock that timed out may belong to someone else by now
+        if self.shared.get(f'lock:{key}', version=version) == token:
+            self.shared.delete(f'lock:{key}', version=version)
+
+
+def get_or_compute(key, compute, timeout=DEFAULT_TIMEOUT):
+    """
+    TieredCache.get_or_compute() on the default cache, or a plain read and
+    fill when the default cache is another backend
+    """
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if isinstance(backend, TieredCache):
+        return backend.get_or_compute(key, compute, timeout)
+    value = backend.get(key)
+    if value is None:
+        value = compute()
+        backend.set(key, value, timeout)
+    return value
+
+
+def hit_ratios(alias=DEFAULT_CACHE_ALIAS):
+    """{prefix: counts of each outcome and the hit ratio} for a TieredCache alias, over every worker"""
+    backend = caches[alias]
+    backend.stats.flush(backend.shared)
+    result = {}
+    for prefix, counts in sorted((backend.shared.get(STATS_KEY) or {}).items()):
+        counts = {outcome: counts.get(outcome, 0) for outcome in OUTCOMES}
+        reads = counts['local'] + counts['shared'] + counts['miss']
+        result[prefix] = {**counts, 'reads': reads,
+                          'hit_ratio': (counts['local'] + counts['shared']) / reads if reads else None}
+    return result
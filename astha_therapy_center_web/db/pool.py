@@ -0,0 +1,214 @@
+import functools
+import os
+import threading
+import time
+from collections import deque
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError
+
+# Defaults for OPTIONS['pool']
+POOL_MIN_SIZE = 0
+POOL_MAX_SIZE = 10
+# Seconds a connection lives before it is closed instead of reused, well
+# under MySQL's wait_timeout and any proxy idle timeout
+POOL_RECYCLE = 1800
+# Seconds a request waits for a free connection before giving up
+POOL_TIMEOUT = 10
+# Connections idle longer than this are pinged before being handed out
+POOL_CHECK_IDLE = 5
+
+
+class PoolTimeout(DatabaseError):
+    """Every connection of the pool stayed in use for the whole timeout"""
+
+
+def ping(connection):
+    cursor = connection.cursor()
+    try:
+        cursor.execute('SELECT 1')
+        cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+class ConnectionPool:
+    """
+    Open database connections shared by the threads of one process. The
+    most recently returned connection is handed out first, so a quiet
+    process keeps reusing one warm connection; connections are closed once
+    older than `recycle` seconds, and pinged with `check` when they sat
+    idle for more than `check_idle` seconds.
+    """
+    def __init__(self, connect, check=ping, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+                 recycle=POOL_RECYCLE, timeout=POOL_TIMEOUT, check_idle=POOL_CHECK_IDLE):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ImproperlyConfigured('The pool needs 0 <= min_size <= max_size and max_size >= 1')
+        self.connect = connect
+        self.check = check
+        self.max_size = max_size
+        self.recycle = recycle
+        self.timeout = timeout
+        self.check_idle = check_idle
+        self.pid = os.getpid()
+        self.idle = deque()
+        self.opened_at = {}
+        self.available = threading.Condition()
+        self.closed = False
+        for _ in range(min_size):
+            self.put(self.open())
+
+    @property
+    def size(self):
+        """Open connections, idle or in use"""
+        return len(self.opened_at)
+
+    def open(self):
+        connection = self.connect()
+        with self.available:
+            self.opened_at[connection] = time.monotonic()
+        return connection
+
+    def discard(self, connection):
+        self.opened_at.pop(connection, None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def expired(self, connection, now):
+        return now - self.opened_at[connection] >= self.recycle
+
+    def get(self):
+        """
+        (connection, reused) for the caller's exclusive use until it is put
+        back; `reused` is False for a newly opened connection
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            connection = slot = None
+            with self.available:
+                while connection is None and slot is None:
+                    now = time.monotonic()
+                    if self.idle:
+                        connection, returned_at = self.idle.pop()
+                        if self.expired(connection, now):
+                            self.discard(connection)
+                            connection = None
+                    elif self.size < self.max_size:
+                        # Hold the slot while connecting outside the lock
+                        slot = object()
+                        self.opened_at[slot] = now
+                    elif now >= deadline:
+                        raise PoolTimeout(f'No database connection became free within {self.timeout}s '
+                                          f'({self.max_size} in use)')
+                    else:
+                        self.available.wait(deadline - now)
+            if slot is not None:
+                try:
+                    return self.open(), False
+                finally:
+                    with self.available:
+                        del self.opened_at[slot]
+                        self.available.notify()
+            if now - returned_at <= self.check_idle:
+                return connection, True
+            try:
+                self.check(connection)
+                return connection, True
+            except Exception:
+                with self.available:
+                    self.discard(connection)
+                    self.available.notify()
+
+    def put(self, connection, rollback=False, check=False):
+        """
+        Hand `connection` back. `rollback` ends a transaction the caller left
+        open; `check` pings a connection that raised errors. Connections that
+        fail either, or are past their recycle time, are closed instead.
+        """
+        usable = True
+        try:
+            if rollback:
+                connection.rollback()
+            if check:
+                self.check(connection)
+        except Exception:
+            usable = False
+        with self.available:
+            if connection not in self.opened_at:
+                return
+            now = time.monotonic()
+            if usable and not self.closed and not self.expired(connection, now):
+                self.idle.append((connection, now))
+            else:
+                self.discard(connection)
+            self.available.notify()
+
+    def close(self):
+        """Close the idle connections; ones in use are closed as they come back"""
+        with self.available:
+            self.closed = True
+            while self.idle:
+                self.discard(self.idle.pop()[0])
+            self.available.notify_all()
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Database backend mixin taking connections from a ConnectionPool shared
+    by the whole process instead of opening one per request, enabled with
+    OPTIONS['pool'] = {'min_size': ..., 'max_size': ..., 'recycle': ...,
+    'timeout': ...}. Closing the connection at the end of a request hands
+    it back, so the pool needs CONN_MAX_AGE = 0. Session state set up when
+    a connection is first opened (sql_mode, isolation level) outlives the
+    checkout and is not sent again.
+    """
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if not options:
+            return None
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured(f"DATABASES[{self.alias!r}] uses a pool; set CONN_MAX_AGE to 0")
+        with self._pools_lock:
+            pool = self._pools.get(self.alias)
+            # A forked worker must not share its parent's sockets
+            if pool is None or pool.pid != os.getpid():
+                connect = functools.partial(super().get_new_connection, self.get_connection_params())
+                pool = self._pools[self.alias] = ConnectionPool(connect, **options)
+        return pool
+
+    @classmethod
+    def close_pool(cls, alias):
+        with cls._pools_lock:
+            pool = cls._pools.pop(alias, None)
+        if pool is not None:
+            pool.close()
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection, self.pool_reused = pool.get()
+        return connection
+
+    def init_connection_state(self):
+        if not getattr(self, 'pool_reused', False):
+            super().init_connection_state()
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        pool.put(self.connection, rollback=not self.autocommit, check=self.errors_occurred)
+        # Another thread may take it from here on
+        self.connection = None
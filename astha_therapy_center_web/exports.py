@@ -0,0 +1,205 @@
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+from django.db.models import Q
+from django.utils import timezone
+
+# Rows fetched per query. Each chunk is its own keyset query rather than one
+# long server-side cursor: mysqlclient buffers a whole result set in memory.
+EXPORT_CHUNK_SIZE = 2000
+
+APPOINTMENT_EXPORT_COLUMNS = [
+    ('id', 'ID'),
+    ('name', 'Name'),
+    ('email', 'Email'),
+    ('phone', 'Phone'),
+    ('service', 'Service'),
+    ('appointment_date', 'Appointment date'),
+    ('status', 'Status'),
+    ('notes', 'Notes'),
+    ('created_at', 'Created at'),
+]
+CONTACT_EXPORT_COLUMNS = [
+    ('id', 'ID'),
+    ('name', 'Name'),
+    ('email', 'Email'),
+    ('phone', 'Phone'),
+    ('subject', 'Subject'),
+    ('message', 'Message'),
+    ('status', 'Status'),
+    ('created_at', 'Created at'),
+]
+# Spreadsheets run cells starting with these as formulas (CSV injection)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# Characters XML 1.0 does not allow, even escaped
+XML_ILLEGAL_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+
+def iter_rows(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield values_list tuples of `fields` for every row of `queryset`, newest
+    first, one keyset-bounded query of `chunk_size` rows at a time so memory
+    stays flat however many rows match
+    """
+    queryset = queryset.order_by('-created_at', '-id')
+    columns = list(fields) + ['created_at', 'id']
+    position = None
+    while True:
+        page = queryset
+        if position is not None:
+            created_at, pk = position
+            page = page.filter(Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(id__lt=pk)))
+        rows = list(page.values_list(*columns)[:chunk_size])
+        for row in rows:
+            yield row[:len(fields)]
+        if len(rows) < chunk_size:
+            return
+        position = rows[-1][-2:]
+
+
+def labelled(model, fields, rows):
+    """Replace stored choice values (status, service) with their labels"""
+    labels = {
+        index: dict(model._meta.get_field(field).flatchoices)
+        for index, field in enumerate(fields)
+        if model._meta.get_field(field).choices
+    }
+    for row in rows:
+        if labels:
+            row = list(row)
+            for index, mapping in labels.items():
+                row[index] = mapping.get(row[index], row[index])
+        yield row
+
+
+def format_value(value):
+    """Cell text of a value: local times, ISO dates and blanks for None"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def csv_cell(value):
+    """Cell text for a CSV file; submitted text that would run as a formula is quoted with '"""
+    text = format_value(value)
+    if isinstance(value, str) and text.startswith(FORMULA_PREFIXES):
+        return "'" + text
+    return text
+
+
+class Echo:
+    """File-like object whose write() returns the data, for csv.writer"""
+    def write(self, value):
+        return value
+
+
+def stream_csv(headers, rows):
+    """Yield a CSV document one encoded line at a time"""
+    writer = csv.writer(Echo())
+    yield '\ufeff'.encode()  # BOM so Excel reads UTF-8
+    yield writer.writerow(headers).encode()
+    for row in rows:
+        yield writer.writerow([csv_cell(value) for value in row]).encode()
+
+
+class ChunkBuffer:
+    """Write-only, unseekable sink that zipfile streams into and we drain"""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def xlsx_cell(value):
+    # Inline strings are never evaluated as formulas; control characters
+    # would make the sheet unreadable, so they are dropped
+    text = XML_ILLEGAL_RE.sub('', format_value(value))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def xlsx_row(values):
+    return f'<row>{"".join(xlsx_cell(value) for value in values)}</row>'
+
+
+def stream_xlsx(headers, rows, flush_every=500):
+    """
+    Yield a minimal single-sheet XLSX workbook (inline strings, no styles).
+    The worksheet is deflated straight into the zip as rows arrive, so only
+    `flush_every` rows are held at a time.
+    """
+    buffer = ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        yield buffer.drain()
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'.encode()
+            )
+            sheet.write(xlsx_row(headers).encode())
+            pending = []
+            for row in rows:
+                pending.append(xlsx_row(row))
+                if len(pending) >= flush_every:
+                    sheet.write(''.join(pending).encode())
+                    pending = []
+                    yield buffer.drain()
+            sheet.write(''.join(pending).encode())
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
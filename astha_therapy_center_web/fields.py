@@ -0,0 +1,15 @@
+from django.db import models
+
+
+class BinaryCharField(models.CharField):
+    """
+    CharField compared byte for byte. MySQL's default utf8mb4 collation
+    treats "resume" and "résumé", or "ss" and "ß", as equal, which breaks
+    unique constraints over terms that must stay distinct; other backends
+    already compare codepoints and keep their default collation.
+    """
+    def db_parameters(self, connection):
+        params = super().db_parameters(connection)
+        if connection.vendor == 'mysql':
+            params['collation'] = 'utf8mb4_bin'
+        return params
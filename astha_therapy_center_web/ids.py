@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+import uuid
+
+from django.db import models
+
+_lock = threading.Lock()
+# Last (millisecond << 12 | counter) handed out by this process
+_last_sequence = 0
+
+
+def uuid7():
+    """
+    A version 7 UUID (RFC 9562): a 48-bit Unix millisecond timestamp followed
+    by random bits. New rows land at the right-hand end of the primary key
+    index instead of on a random page. Within one millisecond the 12-bit
+    rand_a field counts up from a random start, so ids from one process are
+    strictly increasing.
+    """
+    global _last_sequence
+    with _lock:
+        sequence = (time.time_ns() // 1_000_000) << 12 | int.from_bytes(os.urandom(2), 'big') >> 5
+        if sequence <= _last_sequence:
+            # Same millisecond, or the clock stepped back: keep counting
+            sequence = _last_sequence + 1
+        _last_sequence = sequence
+    random_bits = int.from_bytes(os.urandom(8), 'big') >> 2
+    return uuid.UUID(int=(sequence >> 12) << 80 | 0x7 << 76 | (sequence & 0xfff) << 64 | 0b10 << 62 | random_bits)
+
+
+class CompactUUIDField(models.UUIDField):
+    """
+    UUIDField stored as BINARY(16) on MySQL rather than CHAR(32), halving the
+    key and every index and foreign key that carries it. Other backends keep
+    the column type UUIDField uses, so nothing changes there.
+    """
+    def get_internal_type(self):
+        # Not "UUIDField", so backends skip their hex-string UUID converters
+        return 'CompactUUIDField'
+
+    def db_type(self, connection):
+        if connection.vendor == 'mysql':
+            return 'binary(16)'
+        return connection.data_types['UUIDField']
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = self.to_python(value)
+        if connection.vendor == 'mysql':
+            return value.bytes
+        if connection.features.has_native_uuid_field:
+            return value
+        return value.hex
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return uuid.UUID(bytes=bytes(value))
+        return uuid.UUID(value)
@@ -0,0 +1,178 @@
+import csv
+import time
+from collections import Counter
+
+from django import forms
+from django.db import DataError, IntegrityError, models, transaction
+
+from .analytics import invalidate_skill_summary
+from .models import Appointment, ChangeEvent, DailyRollup, Patient, StatusCounter, Therapist
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class ImportResult:
+    """Outcome of an import: row counts and throughput"""
+    def __init__(self):
+        self.created = 0
+        self.rejected = 0
+        self.elapsed = 0.0
+
+    @property
+    def total(self):
+        return self.created + self.rejected
+
+    @property
+    def rows_per_second(self):
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+
+def row_form_class(form_class, columns=()):
+    """
+    `form_class` adapted to CSV rows, and reusable across rows. A CSV cell
+    cannot carry an upload, so file columns are taken as paths of already
+    stored files, required where the model requires the file. When
+    `columns` include created_at, the rows keep their original creation
+    time instead of the import time.
+    """
+    model = form_class._meta.model
+    file_fields = [
+        field for field in model._meta.fields
+        if isinstance(field, models.FileField) and field.name in form_class._meta.fields
+    ]
+    keep_created_at = 'created_at' in columns and any(field.name == 'created_at' for field in model._meta.fields)
+
+    class RowForm(form_class):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            for field in file_fields:
+                # The model form saves a path string like an upload
+                self.fields[field.name] = forms.CharField(required=not field.blank, max_length=field.max_length)
+            if keep_created_at:
+                self.fields['created_at'] = forms.DateTimeField(required=False)
+
+        def rebind(self, data):
+            """
+            Validate another row with this form. Building a form deep-copies
+            every field, which costs more than validating the row, so one
+            form is bound to each row in turn instead.
+            """
+            self.data = data
+            self.instance = model()
+            self._errors = None
+            return self
+
+    return RowForm
+
+
+def format_errors(form):
+    return '; '.join(
+        f'{field}: {" ".join(errors)}' if field != '__all__' else ' '.join(errors)
+        for field, errors in form.errors.items()
+    )
+
+
+def before_insert(model, instances):
+    """Work that save() would do for these rows but bulk_create skips"""
+    for instance in instances:
+        # bulk_create sets auto_now_add fields to the current time
+        instance._imported_created_at = getattr(instance, 'created_at', None)
+    if model is Appointment:
+        for appointment in instances:
+            appointment.normalize_lookup_fields()
+        patients = Patient.objects.match_many([(a.name, a.email, a.phone) for a in instances])
+        for appointment, patient in zip(instances, patients):
+            appointment.patient = patient
+
+
+def restore_created_at(model, instances):
+    """Put back the created_at values the CSV gave, with one UPDATE per batch"""
+    kept = []
+    for instance in instances:
+        if instance._imported_created_at is not None:
+            instance.created_at = instance._imported_created_at
+            kept.append(instance)
+    if kept:
+        model.objects.bulk_update(kept, ['created_at'])
+
+
+def after_insert(model, instances):
+    """Counter, rollup, change log and cache upkeep that post_save signals would do"""
+    scope = model._meta.model_name
+    statuses = Counter(StatusCounter.status_of(instance) for instance in instances)
+    for status, count in statuses.items():
+        if status is not None:
+            StatusCounter.objects.adjust(scope, status, count)
+    if scope in ('appointment', 'contact'):
+        keys = Counter(DailyRollup.key_of(instance) for instance in instances)
+        for key, count in keys.items():
+            if key is not None:
+                DailyRollup.objects.adjust(key, count)
+    if scope in ChangeEvent.SCOPES:
+        ChangeEvent.objects.record(scope, [
+            (instance.pk, ChangeEvent.CREATED, StatusCounter.status_of(instance), None) for instance in instances
+        ])
+    if model is Therapist:
+        transaction.on_commit(invalidate_skill_summary)
+
+
+def import_csv(stream, form_class, batch_size=DEFAULT_BATCH_SIZE, rejects=None):
+    """
+    Import the CSV text `stream` (a header row of form field names, then
+    one record per row), validating each row with `form_class` in memory
+    and inserting valid rows with bulk_create, `batch_size` rows per
+    transaction. Invalid rows are written with their line number and errors
+    to the `rejects` text stream, if given; so are all rows of a batch the
+    database refuses, which is rolled back. Returns an ImportResult.
+    """
+    model = form_class._meta.model
+    reader = csv.DictReader(stream)
+    RowForm = row_form_class(form_class, reader.fieldnames or ())
+    report = None
+    if rejects is not None:
+        report = csv.writer(rejects)
+        report.writerow(['line', 'errors'] + list(reader.fieldnames or []))
+
+    result = ImportResult()
+    started = time.perf_counter()
+    batch, lines = [], []
+
+    def reject(line, errors, row):
+        result.rejected += 1
+        if report is not None:
+            report.writerow([line, errors] + [row.get(key, '') for key in reader.fieldnames])
+
+    def flush():
+        if not batch:
+            return
+        try:
+            with transaction.atomic():
+                before_insert(model, batch)
+                model.objects.bulk_create(batch, batch_size=batch_size)
+                restore_created_at(model, batch)
+                after_insert(model, batch)
+        except (IntegrityError, DataError) as error:
+            for line, row in lines:
+                reject(line, f'Batch not saved: {error}', row)
+        else:
+            result.created += len(batch)
+        batch.clear()
+        lines.clear()
+
+    form = RowForm(data={})
+    for row in reader:
+        data = {key: (value or '').strip() for key, value in row.items() if key}
+        form.rebind(data)
+        if form.is_valid():
+            instance = form.save(commit=False)
+            if form.cleaned_data.get('created_at'):
+                instance.created_at = form.cleaned_data['created_at']
+            batch.append(instance)
+            lines.append((reader.line_num, row))
+            if len(batch) >= batch_size:
+                flush()
+        else:
+            reject(reader.line_num, format_errors(form), row)
+    flush()
+    result.elapsed = time.perf_counter() - started
+    return result
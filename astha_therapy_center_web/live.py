@@ -0,0 +1,191 @@
+import asyncio
+import contextvars
+import logging
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Appointment, ChangeEvent, Contact, StatusCounter
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for new events while any request is waiting
+FEED_POLL_INTERVAL = 1.0
+# How long a long-poll request is held open before returning empty
+FEED_TIMEOUT = 25
+# Events returned per response; clients further behind catch up over several
+FEED_BATCH_SIZE = 100
+# Ids are allocated at insert, not commit: a lower id may still commit after
+# a higher one. Events past a missing id are held back until they are this
+# many seconds old; by then the missing one was rolled back, not in flight.
+FEED_SETTLE_SECONDS = 10
+# Seconds between polls of pages served over WSGI, where a long-poll would
+# hold a whole worker
+FEED_SHORT_POLL_INTERVAL = 15
+
+
+# The pollers of every event loop in the process read through this one
+# thread and its one database connection, never a request's thread
+_poll_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='change-feed')
+
+
+def read_latest_id():
+    # Nothing ends a request here, so expire the connection like one would
+    close_old_connections()
+    return ChangeEvent.objects.latest_id()
+
+
+def can_long_poll(request):
+    """Whether `request` is served by an event loop that can hold it cheaply"""
+    return isinstance(request, ASGIRequest)
+
+
+class ChangeFeed:
+    """
+    Waits for new change events on behalf of every long-poll request served
+    by one event loop. However many staff tabs are open, a single task polls
+    the newest event id (an index-only MAX on the primary key) and wakes the
+    waiting requests when it moves; it stops when nobody is waiting. The
+    task runs outside the request that started it, which may end first,
+    and reads on a thread of its own.
+    """
+    def __init__(self, interval=FEED_POLL_INTERVAL):
+        self.interval = interval
+        self.latest = None
+        self.waiters = 0
+        self.changed = asyncio.Condition()
+        self.task = None
+
+    async def wait(self, cursor, timeout=FEED_TIMEOUT):
+        """
+        Wait up to `timeout` seconds for an event newer than `cursor`.
+        Returns the newest event id seen, or None if it is not known yet.
+        """
+        async with self.changed:
+            self.waiters += 1
+            if self.task is None or self.task.done():
+                # Not in the request's context, whose routing state and
+                # sync_to_async executor end with it
+                self.task = asyncio.create_task(self.poll(), context=contextvars.Context())
+            try:
+                await asyncio.wait_for(
+                    self.changed.wait_for(lambda: self.latest is not None and self.latest > cursor), timeout
+                )
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self.waiters -= 1
+            return self.latest
+
+    async def poll(self):
+        try:
+            while self.waiters:
+                try:
+                    latest = await asyncio.get_running_loop().run_in_executor(_poll_executor, read_latest_id)
+                except Exception:
+                    # Keep polling for the other waiters; the next read may work
+                    logger.exception('Polling the change log failed')
+                else:
+                    if latest != self.latest:
+                        async with self.changed:
+                            self.latest = latest
+                            self.changed.notify_all()
+                await asyncio.sleep(self.interval)
+        finally:
+            self.task = None
+
+
+_feeds = weakref.WeakKeyDictionary()
+
+
+def get_feed():
+    """The ChangeFeed of the running event loop"""
+    loop = asyncio.get_running_loop()
+    feed = _feeds.get(loop)
+    if feed is None:
+        feed = _feeds[loop] = ChangeFeed()
+    return feed
+
+
+def serialize_appointment(appointment):
+    return {
+        'id': str(appointment.pk),
+        'name': appointment.name,
+        'email': appointment.email,
+        'service': appointment.get_service_display(),
+        'appointment_date': appointment.appointment_date.isoformat(),
+        'status': appointment.status,
+        'status_display': appointment.get_status_display(),
+        'badge_class': appointment.get_status_badge_class(),
+        'url': reverse('astha_therapy_center_web:admin_appointment_detail', args=[appointment.pk]),
+    }
+
+
+def serialize_contact(contact):
+    return {
+        'id': str(contact.pk),
+        'name': contact.name,
+        'email': contact.email,
+        'subject': contact.subject,
+        'status': contact.status,
+        'status_display': contact.get_status_display(),
+        'badge_class': contact.get_status_badge_class(),
+        'url': reverse('astha_therapy_center_web:admin_contact_detail', args=[contact.pk]),
+    }
+
+
+FEED_SOURCES = {
+    'appointment': (Appointment, ['name', 'email', 'service', 'appointment_date', 'status'], serialize_appointment),
+    'contact': (Contact, ['name', 'email', 'subject', 'status'], serialize_contact),
+}
+
+
+def changes_since(cursor, limit=FEED_BATCH_SIZE, settle=FEED_SETTLE_SECONDS):
+    """
+    The feed response for a client at `cursor`: up to `limit` newer events,
+    each with the current state of its row (null if since deleted), the new
+    cursor and, when anything changed, the status counters. Events after a
+    gap in the ids wait until they are `settle` seconds old, so the cursor
+    never passes an event that has yet to commit. An unchanged feed costs
+    one primary-key range query.
+    """
+    events = list(ChangeEvent.objects.filter(id__gt=cursor).order_by('id')[:limit])
+    settled = timezone.now() - timedelta(seconds=settle)
+    expected = cursor + 1
+    for index, event in enumerate(events):
+        if event.id != expected and event.created_at > settled:
+            # The missing ids may belong to transactions still committing
+            events = events[:index]
+            break
+        expected = event.id + 1
+    if not events:
+        return {'cursor': cursor, 'events': [], 'counters': None}
+
+    objects = {}
+    for scope, (model, fields, serialize) in FEED_SOURCES.items():
+        ids = {event.object_id for event in events if event.scope == scope}
+        if ids:
+            rows = model.objects.only(*fields).in_bulk(ids)
+            objects.update({(scope, pk): serialize(row) for pk, row in rows.items()})
+
+    counters = StatusCounter.objects.snapshot()
+    return {
+        'cursor': events[-1].id,
+        'events': [
+            {
+                'id': event.id,
+                'scope': event.scope,
+                'kind': event.kind,
+                'status': event.status,
+                'previous_status': event.previous_status,
+                'object': objects.get((event.scope, event.object_id)),
+            }
+            for event in events
+        ],
+        'counters': {scope: dict(counters[scope]) for scope in ChangeEvent.SCOPES},
+    }
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from astha_therapy_center_web.archive import DEFAULT_ARCHIVE_CHUNK_SIZE, TIERS, archive_cutoff, archive_rows
+
+
+class Command(BaseCommand):
+    help = 'Move closed appointments and contact messages past the retention age into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scope', choices=sorted(TIERS), help='Archive only this table (default: all)')
+        parser.add_argument('--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                            help='Archive closed rows created more than this many days ago')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_ARCHIVE_CHUNK_SIZE,
+                            help='Rows moved per transaction')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between chunks, to leave room for live traffic')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['chunk_size'] < 1:
+            raise CommandError('--days must not be negative and --chunk-size must be at least 1')
+        before = archive_cutoff(options['days'])
+        scopes = [options['scope']] if options['scope'] else sorted(TIERS)
+
+        for scope in scopes:
+            def progress(status, moved):
+                self.stdout.write(f'{scope} {status}: {moved} rows archived')
+                if options['pause']:
+                    time.sleep(options['pause'])
+
+            moved = archive_rows(TIERS[scope], before, options['chunk_size'], progress=progress)
+            self.stdout.write(self.style.SUCCESS(
+                f'{scope}: archived {sum(moved.values())} closed rows created before {before:%Y-%m-%d %H:%M}'
+            ))
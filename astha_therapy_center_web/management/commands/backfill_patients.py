@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from astha_therapy_center_web.models import Appointment, Contact, Patient
+
+
+class DisjointSet:
+    """Union-find over patient ids, used to group patients sharing an email or phone"""
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        self.parent.setdefault(item, item)
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        self.parent[self.find(a)] = self.find(b)
+
+
+class Command(BaseCommand):
+    help = 'Link existing appointments and messages to patients and merge duplicate patients, in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows linked or duplicate groups merged per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Report duplicate groups without merging them')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        if not options['dry_run']:
+            for model in (Appointment, Contact):
+                self.link(model, options['chunk_size'])
+        self.merge_duplicates(options['chunk_size'], options['dry_run'])
+
+    def link(self, model, chunk_size):
+        """Attach unlinked rows to their patient, one chunk per transaction"""
+        unlinked = model._base_manager.filter(patient__isnull=True).only('id', 'name', 'email', 'phone').order_by('id')
+        total, last_id = 0, None
+        while True:
+            chunk = list((unlinked.filter(id__gt=last_id) if last_id else unlinked)[:chunk_size])
+            if not chunk:
+                break
+            with transaction.atomic():
+                patients = Patient.objects.match_many([(row.name, row.email, row.phone) for row in chunk])
+                for row, patient in zip(chunk, patients):
+                    row.patient = patient
+                model._base_manager.bulk_update(chunk, ['patient'])
+            total += len(chunk)
+            last_id = chunk[-1].pk
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {total} linked')
+
+    def merge_duplicates(self, chunk_size, dry_run):
+        """Merge patients connected by a shared normalized email or phone into the oldest one"""
+        groups = DisjointSet()
+        first_by_key = {}
+        created = {}
+        rows = Patient.objects.order_by().values_list('id', 'email_normalized', 'phone_normalized', 'created_at')
+        for pk, email, phone, created_at in rows.iterator(chunk_size=chunk_size):
+            created[pk] = created_at
+            groups.find(pk)
+            for key in (('email', email), ('phone', phone)):
+                if key[1]:
+                    groups.union(pk, first_by_key.setdefault(key, pk))
+
+        members = {}
+        for pk in created:
+            members.setdefault(groups.find(pk), []).append(pk)
+        duplicates = [sorted(ids, key=lambda pk: (created[pk], str(pk))) for ids in members.values() if len(ids) > 1]
+        if dry_run:
+            self.stdout.write(f'{len(duplicates)} duplicate groups, {sum(len(g) - 1 for g in duplicates)} patients to merge')
+            return
+
+        merged = 0
+        for start in range(0, len(duplicates), chunk_size):
+            with transaction.atomic():
+                for keep, *others in duplicates[start:start + chunk_size]:
+                    Patient.objects.merge(keep, others)
+                    merged += len(others)
+            self.stdout.write(f'{merged} duplicate patients merged')
+        self.stdout.write(self.style.SUCCESS(f'{len(duplicates)} duplicate groups merged ({merged} patients removed)'))
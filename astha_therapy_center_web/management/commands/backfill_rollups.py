@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from astha_therapy_center_web.models import Appointment, Contact, DailyRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily appointment/contact rollups from history, one window of days at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day to rebuild (YYYY-MM-DD, default: oldest row)')
+        parser.add_argument('--until', help='Last day to rebuild (YYYY-MM-DD, default: today)')
+        parser.add_argument('--days', type=int, default=31, help='Days rebuilt per transaction')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per database round trip')
+
+    def parse_day(self, value, option):
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'{option} must be a date in YYYY-MM-DD format')
+        return day
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--days and --chunk-size must be at least 1')
+        until = self.parse_day(options['until'], '--until') if options['until'] else timezone.localdate()
+
+        for model in (Appointment, Contact):
+            if options['since']:
+                since = self.parse_day(options['since'], '--since')
+            else:
+                oldest = model._base_manager.aggregate(oldest=Min('created_at'))['oldest']
+                if oldest is None:
+                    self.stdout.write(f'{model._meta.verbose_name_plural}: nothing to backfill')
+                    continue
+                since = timezone.localdate(oldest)
+
+            total = 0
+            start = since
+            while start <= until:
+                end = min(start + timedelta(days=options['days'] - 1), until)
+                total += DailyRollup.objects.rebuild(model, start, end, chunk_size=options['chunk_size'])
+                self.stdout.write(f'{model._meta.verbose_name_plural}: {start} .. {end} done ({total} rows)')
+                start = end + timedelta(days=1)
+
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: rebuilt {since} .. {until} from {total} rows'
+            ))
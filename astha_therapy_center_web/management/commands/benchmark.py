@@ -0,0 +1,516 @@
+import csv
+import io
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.backends.signals import connection_created
+from django.core.paginator import Paginator
+from django.db.models import Avg, Q
+from django.db.utils import ConnectionHandler
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from astha_therapy_center_web.analytics import (
+    SKILL_FIELDS, compute_skill_summary, get_skill_summary, invalidate_skill_summary, load_skill_matrix,
+)
+from astha_therapy_center_web.archive import TIERS, archive_cutoff, archive_rows
+from astha_therapy_center_web.caching import TieredCache
+from astha_therapy_center_web.db.pool import PooledDatabaseWrapperMixin
+from astha_therapy_center_web.models import Appointment, Contact, Therapist
+from astha_therapy_center_web.imports import import_csv
+from astha_therapy_center_web.ids import uuid7
+from astha_therapy_center_web.exports import APPOINTMENT_EXPORT_COLUMNS, iter_rows, labelled, stream_csv, stream_xlsx
+from astha_therapy_center_web.pagination import KeysetPaginator
+from astha_therapy_center_web.search import appointment_lookup, index_contacts, search_contacts
+from astha_therapy_center_web.views_admin import APPOINTMENT_LIST_FIELDS, AppointmentForm
+
+
+PUBLIC_URL_NAMES = [
+    'home', 'about', 'service', 'therapist', 'contact', 'appointment',
+    'blogs', 'blog', 'faqs', 'testimonials',
+]
+
+
+def measure(func, iterations):
+    """
+    Call func `iterations` times and return (queries per call, timings in ms)
+    """
+    timings = []
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+    return len(queries) / iterations, timings
+
+
+def format_timings(timings):
+    """Return a short mean/p95 summary for a list of timings in ms"""
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f'mean {statistics.mean(ordered):7.2f} ms  p95 {p95:7.2f} ms'
+
+
+@contextmanager
+def rolled_back():
+    """Run a seeded benchmark inside a transaction that is always rolled back"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def bench_public(command, options):
+    """Queries and latency per anonymous GET of every public page"""
+    client = Client()
+    for url_name in PUBLIC_URL_NAMES:
+        url = reverse(f'astha_therapy_center_web:{url_name}')
+        client.get(url)  # warm up template loaders
+        per_request, timings = measure(lambda: client.get(url), options['iterations'])
+        command.stdout.write(f'{url:<20} {per_request:5.1f} queries  {format_timings(timings)}')
+
+
+def bench_skills(command, options):
+    """Therapist skill analytics: per-column aggregates vs one vectorized pass"""
+    rng = random.Random(42)
+    with rolled_back():
+        Therapist.objects.bulk_create([
+            Therapist(
+                name=f'Therapist {i}', title='Physiotherapist', experience_years=rng.randint(0, 40),
+                email=f'therapist{i}@example.com', bio_short='Short bio', bio_full='Full bio',
+                profile_image='therapist_images/benchmark.jpg', is_active=rng.random() < 0.9,
+                **{field: rng.randint(0, 100) for field, _ in SKILL_FIELDS},
+            )
+            for i in range(options['therapists'])
+        ], batch_size=1000)
+
+        def per_column_aggregates():
+            active = Therapist.objects.filter(is_active=True)
+            active.count()
+            Therapist.objects.filter(is_active=False).count()
+            active.aggregate(avg=Avg('experience_years'))
+            for field, _ in SKILL_FIELDS:
+                active.aggregate(avg=Avg(field))
+
+        def vectorized():
+            compute_skill_summary(load_skill_matrix())
+
+        def cached():
+            get_skill_summary()
+
+        invalidate_skill_summary()
+        iterations = max(1, options['iterations'] // 10)
+        for label, func in [('per-column aggregates', per_column_aggregates),
+                            ('vectorized (cold)', vectorized),
+                            ('vectorized (cached)', cached)]:
+            per_call, timings = measure(func, iterations)
+            command.stdout.write(f'{label:<22} {per_call:5.1f} queries  {format_timings(timings)}')
+        invalidate_skill_summary()
+
+
+def seed_appointments(rows, batch_size=5000, offset=0, notes='Synthetic benchmark row', make_id=uuid7):
+    """Bulk insert synthetic appointments numbered from `offset` (signals are bypassed)"""
+    rng = random.Random(42 + offset)
+    services = [value for value, _ in Appointment.SERVICE_CHOICES]
+    statuses = [value for value, _ in Appointment.STATUS_CHOICES]
+    for start in range(offset, offset + rows, batch_size):
+        appointments = [
+            Appointment(
+                id=make_id(), name=f'Patient {i}', email=f'patient{i}@example.com', phone=f'01{i:09d}',
+                service=rng.choice(services), status=rng.choice(statuses),
+                appointment_date='2026-01-15', notes=notes,
+            )
+            for i in range(start, min(start + batch_size, offset + rows))
+        ]
+        for appointment in appointments:
+            appointment.normalize_lookup_fields()
+        Appointment.objects.bulk_create(appointments)
+
+
+def bench_pagination(command, options):
+    """OFFSET pagination vs keyset pagination at page 1 and a deep page"""
+    per_page, depth = 10, options['depth']
+    with rolled_back():
+        seed_appointments(options['rows'])
+        queryset = Appointment.objects.all()
+        deep = Appointment.objects.order_by('-created_at', '-id').only('id', 'created_at')[(depth - 1) * per_page - 1]
+        deep_cursor = KeysetPaginator(queryset, per_page).encode(deep, 'next')
+
+        for page, cursor in [(1, None), (depth, deep_cursor)]:
+            def offset_page():
+                list(Paginator(queryset, per_page).get_page(page))
+
+            def keyset_page():
+                list(KeysetPaginator(queryset, per_page).get_page(cursor))
+
+            for label, func in [(f'offset page {page}', offset_page), (f'keyset page {page}', keyset_page)]:
+                per_call, timings = measure(func, options['iterations'])
+                command.stdout.write(f'{label:<22} {per_call:5.1f} queries  {format_timings(timings)}')
+
+
+def bench_projection(command, options):
+    """Status-filtered list pages: every column vs only the rendered ones"""
+    with rolled_back():
+        # Notes of a typical length for clinical free text
+        seed_appointments(options['rows'], notes='Patient reports lower back pain after lifting. ' * 40)
+        pages = Appointment.objects.filter(status='pending').order_by('-created_at', '-id')
+        for size in (10, 500):
+            def all_columns():
+                list(pages[:size])
+
+            def projected():
+                list(pages.only(*APPOINTMENT_LIST_FIELDS)[:size])
+
+            for label, func in [(f'all columns, {size} rows', all_columns), (f'list columns, {size} rows', projected)]:
+                per_call, timings = measure(func, options['iterations'])
+                command.stdout.write(f'{label:<24} {per_call:5.1f} queries  {format_timings(timings)}')
+
+
+def bench_archive(command, options):
+    """Hot-table query latency before and after archiving old closed appointments"""
+    with rolled_back():
+        seed_appointments(options['rows'])
+        # Most history is old and closed, as in a clinic running for years
+        old = timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS + 30)
+        boundary = Appointment.objects.order_by('-created_at').values_list('created_at', flat=True)[options['rows'] // 10]
+        Appointment.objects.filter(created_at__lt=boundary).update(created_at=old)
+        queries = [
+            ('list page', lambda: list(KeysetPaginator(Appointment.objects.all(), 10).get_page())),
+            ('name search', lambda: list(Appointment.objects.filter(appointment_lookup('Nobody'))[:11])),
+            ('count(*)', lambda: Appointment.objects.count()),
+        ]
+        for phase in ('before', 'after'):
+            if phase == 'after':
+                start = time.perf_counter()
+                moved = archive_rows(TIERS['appointment'], archive_cutoff())
+                command.stdout.write(
+                    f'archived {sum(moved.values())} rows in {time.perf_counter() - start:.1f}s '
+                    f'({Appointment.objects.count()} left in the hot table)'
+                )
+            for label, func in queries:
+                per_call, timings = measure(func, options['iterations'])
+                command.stdout.write(f'{phase} {label:<14} {per_call:5.1f} queries  {format_timings(timings)}')
+
+
+def bench_lookup(command, options):
+    """Appointment search by phone/email: icontains scans vs normalized indexes"""
+    with rolled_back():
+        seed_appointments(options['rows'])
+        middle = options['rows'] // 2
+        for query in [f'+880 1{middle:09d}', f'01{middle // 1000:06d}', f'patient{middle}@example.com']:
+            def icontains():
+                list(Appointment.objects.filter(
+                    Q(name__icontains=query) | Q(email__icontains=query) | Q(phone__icontains=query)
+                )[:11])
+
+            def indexed():
+                list(Appointment.objects.filter(appointment_lookup(query))[:11])
+
+            for label, func in [(f'icontains "{query}"', icontains), (f'indexed "{query}"', indexed)]:
+                per_call, timings = measure(func, options['iterations'])
+                command.stdout.write(f'{label:<42} {per_call:5.1f} queries  {format_timings(timings)}')
+
+
+def bench_export(command, options):
+    """Streaming CSV/XLSX export: throughput and peak Python memory as the table grows"""
+    fields = [field for field, _ in APPOINTMENT_EXPORT_COLUMNS]
+    headers = [header for _, header in APPOINTMENT_EXPORT_COLUMNS]
+    def consume(renderer):
+        size = 0
+        for chunk in renderer(headers, labelled(Appointment, fields, iter_rows(Appointment.objects.all(), fields))):
+            size += len(chunk)
+        return size
+
+    def materialized():
+        # The non-streaming baseline: the whole result set and document in memory
+        rows = list(Appointment.objects.values_list(*fields))
+        return len(b''.join(stream_csv(headers, rows)))
+
+    runs = [
+        ('csv streamed', lambda: consume(stream_csv)),
+        ('xlsx streamed', lambda: consume(stream_xlsx)),
+        ('csv materialized', materialized),
+    ]
+
+    with rolled_back():
+        seeded = 0
+        for size in sorted({max(1, options['rows'] // 100), max(1, options['rows'] // 10), options['rows']}):
+            seed_appointments(size - seeded, offset=seeded)
+            seeded = size
+            for label, func in runs:
+                start = time.perf_counter()
+                nbytes = func()
+                elapsed = time.perf_counter() - start
+                tracemalloc.start()
+                func()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                command.stdout.write(
+                    f'{label:<17} {size:>9} rows  {size / elapsed:10.0f} rows/s  '
+                    f'{nbytes / 2**20:8.1f} MiB out  peak {peak / 2**20:7.1f} MiB'
+                )
+
+
+def appointment_csv(rows):
+    """A synthetic appointments CSV in the bulk_import format, as a text stream"""
+    services = [value for value, _ in Appointment.SERVICE_CHOICES]
+    lines = ['name,email,phone,service,appointment_date,status,notes']
+    lines += [
+        f'Patient {i},patient{i}@example.com,01{i:09d},{services[i % len(services)]},2026-01-15,pending,Imported row'
+        for i in range(rows)
+    ]
+    return io.StringIO('\n'.join(lines) + '\n')
+
+
+def bench_import(command, options):
+    """CSV import throughput: one form.save() per row vs batched bulk_create"""
+    rows = options['rows']
+
+    def per_row():
+        for row in csv.DictReader(appointment_csv(rows)):
+            form = AppointmentForm(data=row)
+            if form.is_valid():
+                form.save()
+
+    def batched(batch_size):
+        return lambda: import_csv(appointment_csv(rows), AppointmentForm, batch_size=batch_size)
+
+    runs = [('per-row save', per_row)] + [(f'batched ({size})', batched(size)) for size in (100, 500, 2000)]
+    for label, func in runs:
+        with rolled_back():
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+        command.stdout.write(f'{label:<16} {rows:>8} rows  {rows / elapsed:9.0f} rows/s')
+
+
+SEARCH_WORDS = [
+    'pain', 'back', 'knee', 'shoulder', 'neck', 'injury', 'appointment', 'session', 'therapy', 'exercise',
+    'stroke', 'posture', 'sports', 'recovery', 'surgery', 'swelling', 'weekend', 'price', 'doctor', 'child',
+]
+
+
+def seed_contacts(rows, batch_size=2000):
+    """
+    Bulk insert synthetic contact messages and index them for search. Words
+    follow a long-tailed distribution like a real inbox: a few common clinic
+    words plus a large vocabulary of rarer ones.
+    """
+    rng = random.Random(42)
+    vocabulary = SEARCH_WORDS + [f'word{n}' for n in range(20_000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    for start in range(0, rows, batch_size):
+        contacts = Contact.objects.bulk_create([
+            Contact(
+                name=f'Patient {i}', email=f'patient{i}@example.com', phone=f'01{i:09d}',
+                subject=' '.join(rng.choices(vocabulary, weights, k=3)).capitalize(),
+                message=' '.join(rng.choices(vocabulary, weights, k=60)),
+            )
+            for i in range(start, min(start + batch_size, rows))
+        ])
+        index_contacts(contacts, replace=False)
+
+
+def bench_search(command, options):
+    """Contact search: icontains scans vs the full-text index"""
+    with rolled_back():
+        seed_contacts(options['rows'])
+        for query in ['word1234', 'word1999', 'knee word777', 'nomatch']:
+            def icontains():
+                words = query.split()
+                condition = Q()
+                for word in words:
+                    condition &= (Q(name__icontains=word) | Q(email__icontains=word) |
+                                  Q(subject__icontains=word) | Q(message__icontains=word))
+                list(Contact.objects.filter(condition)[:50])
+
+            def indexed():
+                search_contacts(Contact.objects.all(), query)
+
+            for label, func in [(f'icontains "{query}"', icontains), (f'indexed "{query}"', indexed)]:
+                per_call, timings = measure(func, options['iterations'])
+                command.stdout.write(f'{label:<26} {per_call:5.1f} queries  {format_timings(timings)}')
+
+
+def index_sizes(table):
+    """Bytes used by each index of `table`, or None where the backend cannot tell"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT name, SUM(pgsize) FROM dbstat WHERE name IN "
+                "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s) GROUP BY name",
+                [table],
+            )
+        elif connection.vendor == 'mysql':
+            cursor.execute('ANALYZE TABLE ' + connection.ops.quote_name(table))
+            cursor.fetchall()
+            cursor.execute(
+                "SELECT index_name, stat_value * @@innodb_page_size FROM mysql.innodb_index_stats "
+                "WHERE database_name = DATABASE() AND table_name = %s AND stat_name = 'size'",
+                [table],
+            )
+        else:
+            return None
+        return dict(cursor.fetchall())
+
+
+def bench_keys(command, options):
+    """Appointment insert throughput and index size with random vs time-ordered keys"""
+    batch_size = 5000
+    table = Appointment._meta.db_table
+    for label, make_id in [('uuid4', uuid.uuid4), ('uuid7', uuid7)]:
+        with rolled_back():
+            timings = []
+            for offset in range(0, options['rows'], batch_size):
+                start = time.perf_counter()
+                seed_appointments(min(batch_size, options['rows'] - offset), batch_size, offset, make_id=make_id)
+                timings.append(time.perf_counter() - start)
+            # The last tenth shows the cost once the index outgrows the cache
+            tail = timings[-max(1, len(timings) // 10):]
+            command.stdout.write(
+                f'{label} keys: {options["rows"] / sum(timings):8.0f} rows/s overall, '
+                f'{len(tail) * batch_size / sum(tail):8.0f} rows/s for the last tenth'
+            )
+            sizes = index_sizes(table)
+            if sizes is None:
+                command.stdout.write('  index sizes are not available on this database backend')
+                continue
+            for name, size in sorted(sizes.items()):
+                command.stdout.write(f'  {name:<56} {size / 2 ** 20:8.1f} MiB')
+
+
+POOLED_ENGINES = {
+    'mysql': 'astha_therapy_center_web.db.mysql',
+    'sqlite': 'astha_therapy_center_web.db.sqlite3',
+}
+
+
+def bench_connections(command, options):
+    """
+    Latency of a one-query request cycle against the configured database
+    with a new connection per request, persistent connections and the pool,
+    from --threads concurrent threads
+    """
+    base = {**connections.settings[DEFAULT_DB_ALIAS]}
+    base['OPTIONS'] = {key: value for key, value in base['OPTIONS'].items() if key != 'pool'}
+    modes = [
+        ('new connection per request', {**base, 'CONN_MAX_AGE': 0}),
+        ('persistent, health checked', {**base, 'CONN_MAX_AGE': 300, 'CONN_HEALTH_CHECKS': True}),
+    ]
+    if connection.vendor in POOLED_ENGINES:
+        modes.append(('pooled', {
+            **base, 'ENGINE': POOLED_ENGINES[connection.vendor], 'CONN_MAX_AGE': 0,
+            'OPTIONS': {**base['OPTIONS'], 'pool': {'max_size': options['threads']}},
+        }))
+
+    for label, settings_dict in modes:
+        handler = ConnectionHandler({DEFAULT_DB_ALIAS: base, 'benchmark': settings_dict})
+        opened = []
+
+        def count_connection(sender, connection, **kwargs):
+            if connection.alias == 'benchmark' and not getattr(connection, 'pool_reused', False):
+                opened.append(connection)
+
+        def requests(_):
+            db, timings = handler['benchmark'], []
+            for _ in range(options['iterations']):
+                start = time.perf_counter()
+                # What the request_started and request_finished signals do
+                db.close_if_unusable_or_obsolete()
+                with db.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+                db.close_if_unusable_or_obsolete()
+                timings.append((time.perf_counter() - start) * 1000)
+            db.close()
+            return timings
+
+        connection_created.connect(count_connection)
+        try:
+            with ThreadPoolExecutor(options['threads']) as executor:
+                timings = [timing for result in executor.map(requests, range(options['threads'])) for timing in result]
+        finally:
+            connection_created.disconnect(count_connection)
+            PooledDatabaseWrapperMixin.close_pool('benchmark')
+        command.stdout.write(f'{label:<28} {format_timings(timings)}  {len(opened)} connections opened')
+
+
+def bench_cache(command, options):
+    """
+    Recomputes of one 50 ms entry with a one-second timeout, read every
+    10 ms for three seconds from --threads threads, filled with a plain
+    get and set and with TieredCache.get_or_compute()
+    """
+    if not isinstance(caches[DEFAULT_CACHE_ALIAS], TieredCache):
+        raise CommandError('The default cache is not a TieredCache')
+
+    for label, early in (('get, compute, set', False), ('get_or_compute', True)):
+        key = f'benchmark:{uuid.uuid4().hex}'
+        computes = []
+
+        def compute():
+            computes.append(1)
+            time.sleep(0.05)
+            return 'value'
+
+        def reads(_):
+            backend, timings = caches[DEFAULT_CACHE_ALIAS], []
+            end = time.monotonic() + 3
+            while time.monotonic() < end:
+                start = time.perf_counter()
+                if early:
+                    backend.get_or_compute(key, compute, 1)
+                elif backend.get(key) is None:
+                    backend.set(key, compute(), 1)
+                timings.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.01)
+            return timings
+
+        with ThreadPoolExecutor(options['threads']) as executor:
+            timings = [timing for result in executor.map(reads, range(options['threads'])) for timing in result]
+        caches[DEFAULT_CACHE_ALIAS].delete(key)
+        command.stdout.write(f'{label:<20} {format_timings(timings)}  {len(computes)} recomputes')
+
+
+SCENARIOS = {
+    'archive': bench_archive,
+    'cache': bench_cache,
+    'connections': bench_connections,
+    'export': bench_export,
+    'import': bench_import,
+    'keys': bench_keys,
+    'public': bench_public,
+    'skills': bench_skills,
+    'lookup': bench_lookup,
+    'pagination': bench_pagination,
+    'projection': bench_projection,
+    'search': bench_search,
+}
+
+
+class Command(BaseCommand):
+    help = 'Run performance benchmarks against the configured database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=sorted(SCENARIOS), help='Benchmark to run')
+        parser.add_argument('--iterations', type=int, default=100, help='Repetitions per measurement')
+        parser.add_argument('--therapists', type=int, default=10_000, help='Synthetic therapists for "skills"')
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Synthetic rows for seeded scenarios')
+        parser.add_argument('--depth', type=int, default=10_000, help='Deep page number for "pagination"')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent threads for "connections" and "cache"')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['threads'] < 1:
+            raise CommandError('--iterations and --threads must be at least 1')
+        SCENARIOS[options['scenario']](self, options)
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from astha_therapy_center_web.related import SOURCES, build_related
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related posts and therapists shown on detail pages for items that changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=sorted(SOURCES), help='Only rebuild this kind of item')
+        parser.add_argument('--all', action='store_true', help='Recompute every list, not just changed items')
+
+    def handle(self, *args, **options):
+        for kind in [options['kind']] if options['kind'] else SOURCES:
+            start = time.perf_counter()
+            result = build_related(kind, full=options['all'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{kind}: {result["changed"]} of {result["items"]} items changed, {result["removed"]} removed, '
+                f'{result["rewritten"]} lists rewritten in {time.perf_counter() - start:.1f}s'
+            ))
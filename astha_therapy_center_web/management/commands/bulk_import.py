@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from astha_therapy_center_web.imports import DEFAULT_BATCH_SIZE, import_csv
+from astha_therapy_center_web.views_admin import IMPORT_FORMS
+
+
+class Command(BaseCommand):
+    help = 'Import appointments or therapists from a CSV file, validated by the admin forms'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORT_FORMS), help='Records in the file')
+        parser.add_argument('path', help='UTF-8 CSV file with a header row of form field names')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows inserted per transaction')
+        parser.add_argument('--rejects', help='Where to write rejected rows (default: <path>.rejects.csv)')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        rejects_path = options['rejects'] or f'{options["path"]}.rejects.csv'
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream, \
+                    open(rejects_path, 'w', encoding='utf-8', newline='') as rejects:
+                result = import_csv(stream, IMPORT_FORMS[options['kind']], options['batch_size'], rejects)
+        except (OSError, UnicodeDecodeError) as error:
+            raise CommandError(f'Cannot import {options["path"]}: {error}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["kind"]}: imported {result.created} of {result.total} rows '
+            f'in {result.elapsed:.1f}s ({result.rows_per_second:.0f} rows/s)'
+        ))
+        if result.rejected:
+            self.stdout.write(self.style.WARNING(f'{result.rejected} rows rejected, see {rejects_path}'))
@@ -0,0 +1,25 @@
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.management.base import BaseCommand, CommandError
+
+from astha_therapy_center_web.caching import OUTCOMES, TieredCache, hit_ratios
+
+
+class Command(BaseCommand):
+    help = 'Show how reads of the default cache were served, per key prefix, across every worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Start counting again from zero')
+
+    def handle(self, *args, **options):
+        backend = caches[DEFAULT_CACHE_ALIAS]
+        if not isinstance(backend, TieredCache):
+            raise CommandError('The default cache is not a TieredCache; it keeps no statistics')
+        if options['reset']:
+            backend.stats.reset(backend.shared)
+            self.stdout.write(self.style.SUCCESS('Cache statistics reset'))
+            return
+        self.stdout.write(f'{"prefix":<20} {"reads":>9} {"hit ratio":>9}' + ''.join(f' {outcome:>9}' for outcome in OUTCOMES))
+        for prefix, counts in hit_ratios().items():
+            ratio = '-' if counts['hit_ratio'] is None else f'{counts["hit_ratio"]:.1%}'
+            self.stdout.write(f'{prefix:<20} {counts["reads"]:>9} {ratio:>9}'
+                              + ''.join(f' {counts[outcome]:>9}' for outcome in OUTCOMES))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from astha_therapy_center_web.models import Contact, ContactSearchTerm
+from astha_therapy_center_web.search import index_contacts, uses_fulltext
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the portable contact search index, one chunk of contacts at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Contacts indexed per round trip')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        if uses_fulltext():
+            self.stdout.write('MySQL searches the FULLTEXT index; nothing to rebuild')
+            return
+
+        # One transaction: searches keep using the old index until the new one is complete
+        with transaction.atomic():
+            ContactSearchTerm.objects.all().delete()
+            contacts = Contact.objects.only('id', 'name', 'email', 'subject', 'message').order_by('id')
+            total, last_id = 0, 0
+            while True:
+                chunk = list(contacts.filter(id__gt=last_id)[:options['chunk_size']])
+                if not chunk:
+                    break
+                index_contacts(chunk, replace=False)
+                total += len(chunk)
+                last_id = chunk[-1].pk
+                self.stdout.write(f'{total} contacts indexed')
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt for {total} contacts'))
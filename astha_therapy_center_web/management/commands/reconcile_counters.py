@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from astha_therapy_center_web.models import StatusCounter
+
+
+class Command(BaseCommand):
+    help = 'Recount appointments, contacts and therapists and fix drifted status counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        drift = StatusCounter.objects.reconcile(dry_run=options['dry_run'])
+        for scope, status, stored, actual in drift:
+            self.stdout.write(f'{scope}.{status}: stored {stored}, actual {actual}')
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Status counters are in sync.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} counter(s) drifted (dry run, nothing changed).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Fixed {len(drift)} counter(s).'))
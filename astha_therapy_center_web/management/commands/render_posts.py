@@ -0,0 +1,69 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from astha_therapy_center_web.blog_search import FIELD_WEIGHTS, index_posts
+from astha_therapy_center_web.models import BlogPost
+from astha_therapy_center_web.rendering import RENDERER_VERSION, render_content
+
+
+class Command(BaseCommand):
+    help = 'Re-render stored blog post HTML produced by an older renderer version'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-render every post, not just outdated ones')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Rendering processes (1 renders in this process)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Posts rendered and saved per batch')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers and --batch-size must be at least 1')
+        # Reindexing reads every searchable field, so they are loaded up front
+        fields = {'id', 'status', 'auto_excerpt', *FIELD_WEIGHTS} - {'tags'}
+        posts = BlogPost.objects.only(*fields).order_by('pk')
+        if not options['all']:
+            posts = posts.exclude(render_version=RENDERER_VERSION)
+        pks = list(posts.values_list('pk', flat=True))
+        if not pks:
+            self.stdout.write(self.style.SUCCESS(f'All posts are rendered with version {RENDERER_VERSION}'))
+            return
+
+        start = time.perf_counter()
+        pool = None
+        if options['workers'] > 1:
+            # Workers only render text; they must not share this process's
+            # database connection
+            if not connection.in_atomic_block:
+                connections.close_all()
+            pool = ProcessPoolExecutor(options['workers'], initializer=django.setup)
+        try:
+            for offset in range(0, len(pks), options['batch_size']):
+                batch = list(posts.filter(pk__in=pks[offset:offset + options['batch_size']]))
+                contents = [post.content for post in batch]
+                if pool:
+                    rendered = pool.map(render_content, contents, chunksize=max(1, len(batch) // options['workers']))
+                else:
+                    rendered = map(render_content, contents)
+                for post, result in zip(batch, rendered):
+                    post.render(result)
+                # Only the rendered columns are written; view counts and
+                # updated_at are left alone
+                BlogPost.objects.bulk_update(batch, BlogPost.RENDERED_FIELDS)
+                # bulk_update sends no post_save, so generated excerpts are
+                # reindexed here the way the signal would
+                index_posts(batch)
+                self.stdout.write(f'{offset + len(batch)}/{len(pks)} posts rendered')
+        finally:
+            if pool:
+                pool.shutdown()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {len(pks)} posts with version {RENDERER_VERSION} in {elapsed:.1f}s '
+            f'({len(pks) / elapsed:.0f} posts/s, {options["workers"]} workers)'
+        ))
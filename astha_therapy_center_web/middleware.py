@@ -0,0 +1,62 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.utils.functional import SimpleLazyObject, empty
+
+from .routers import REPLICA_PIN_COOKIE, routing_state
+
+
+class LazySessionMiddleware(SessionMiddleware):
+    """
+    Session middleware with a fast path for visitors without a session cookie.
+
+    Anonymous visitors of the public pages never carry a session cookie, so
+    the session store is only built if a view actually touches
+    request.session, and the response phase is skipped entirely otherwise.
+    """
+    def process_request(self, request):
+        session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if session_key is None:
+            request.session = SimpleLazyObject(lambda: self.SessionStore(None))
+        else:
+            request.session = self.SessionStore(session_key)
+
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        if isinstance(session, SimpleLazyObject) and session._wrapped is empty:
+            return response
+        return super().process_response(request, response)
+
+
+class ReplicaPinMiddleware:
+    """
+    Read-your-writes with database replicas (see routers.py). Once a request
+    writes, its remaining reads go to the primary, and so do the visitor's
+    requests for the next REPLICA_PIN_SECONDS, longer than replicas lag.
+    Works in both sync and async stacks, so async views are not adapted.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with routing_state(pinned=REPLICA_PIN_COOKIE in request.COOKIES) as state:
+            response = self.get_response(request)
+        return self.pin(state, response)
+
+    async def __acall__(self, request):
+        with routing_state(pinned=REPLICA_PIN_COOKIE in request.COOKIES) as state:
+            response = await self.get_response(request)
+        return self.pin(state, response)
+
+    def pin(self, state, response):
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(REPLICA_PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-19 06:58
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_status_counters(apps, schema_editor):
+    """Seed the counters from the existing rows"""
+    StatusCounter = apps.get_model('astha_therapy_center_web', 'StatusCounter')
+    db = schema_editor.connection.alias
+    counters = []
+    for model_name in ('appointment', 'contact'):
+        model = apps.get_model('astha_therapy_center_web', model_name)
+        rows = model.objects.using(db).order_by().values('status').annotate(count=Count('pk'))
+        counters += [StatusCounter(scope=model_name, status=row['status'], count=row['count']) for row in rows]
+    Therapist = apps.get_model('astha_therapy_center_web', 'Therapist')
+    rows = Therapist.objects.using(db).order_by().values('is_active').annotate(count=Count('pk'))
+    counters += [
+        StatusCounter(scope='therapist', status='active' if row['is_active'] else 'inactive', count=row['count'])
+        for row in rows
+    ]
+    StatusCounter.objects.using(db).bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astha_therapy_center_web', '0003_blogcategory_blogtag_blogpost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(help_text='Tracked model name (appointment, contact, therapist)', max_length=30)),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Status Counter',
+                'verbose_name_plural': 'Status Counters',
+                'constraints': [models.UniqueConstraint(fields=('scope', 'status'), name='unique_status_counter')],
+            },
+        ),
+        migrations.RunPython(populate_status_counters, migrations.RunPython.noop),
+    ]
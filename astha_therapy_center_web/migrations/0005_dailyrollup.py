@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astha_therapy_center_web', '0004_statuscounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(help_text='Tracked model name (appointment, contact)', max_length=30)),
+                ('day', models.DateField(help_text='Local date the row was created on')),
+                ('service', models.CharField(blank=True, default='', max_length=50)),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Rollup',
+                'verbose_name_plural': 'Daily Rollups',
+                'ordering': ['scope', 'day'],
+                'constraints': [models.UniqueConstraint(fields=('scope', 'day', 'service', 'status'), name='unique_daily_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FULLTEXT_INDEX = 'contact_fulltext'
+
+
+def add_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    table = apps.get_model('astha_therapy_center_web', 'Contact')._meta.db_table
+    schema_editor.execute(
+        f'ALTER TABLE {table} ADD FULLTEXT INDEX {FULLTEXT_INDEX} (name, email, subject, message)'
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    table = apps.get_model('astha_therapy_center_web', 'Contact')._meta.db_table
+    schema_editor.execute(f'ALTER TABLE {table} DROP INDEX {FULLTEXT_INDEX}')
+
+
+def index_existing_contacts(apps, schema_editor):
+    from astha_therapy_center_web.search import contact_terms
+
+    if schema_editor.connection.vendor == 'mysql':
+        return
+    Contact = apps.get_model('astha_therapy_center_web', 'Contact')
+    ContactSearchTerm = apps.get_model('astha_therapy_center_web', 'ContactSearchTerm')
+    db = schema_editor.connection.alias
+    contacts = Contact.objects.using(db).only('id', 'name', 'email', 'subject', 'message')
+    batch = []
+    for contact in contacts.iterator(chunk_size=2000):
+        batch.extend(
+            ContactSearchTerm(contact_id=contact.pk, term=term, weight=min(weight, 32767))
+            for term, weight in contact_terms(contact).items()
+        )
+        if len(batch) >= 5000:
+            ContactSearchTerm.objects.using(db).bulk_create(batch)
+            batch = []
+    ContactSearchTerm.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astha_therapy_center_web', '0006_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('contact', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='astha_therapy_center_web.contact')),
+            ],
+            options={
+                'verbose_name': 'Contact Search Term',
+                'verbose_name_plural': 'Contact Search Terms',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='contactsearchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'contact'), name='unique_contact_search_term'),
+        ),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(index_existing_contacts, migrations.RunPython.noop),
+    ]
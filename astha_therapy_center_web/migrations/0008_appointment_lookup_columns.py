@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:31
+
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 2000
+
+
+def backfill_lookup_columns(apps, schema_editor):
+    from astha_therapy_center_web.normalization import normalize_email, normalize_phone
+
+    Appointment = apps.get_model('astha_therapy_center_web', 'Appointment')
+    db = schema_editor.connection.alias
+    appointments = Appointment.objects.using(db).only('id', 'phone', 'email').order_by('id')
+    last_id = None
+    while True:
+        batch = appointments.filter(id__gt=last_id) if last_id else appointments
+        batch = list(batch[:BATCH_SIZE])
+        if not batch:
+            break
+        for appointment in batch:
+            appointment.phone_normalized = normalize_phone(appointment.phone)
+            appointment.email_normalized = normalize_email(appointment.email)
+        # One short transaction per batch keeps row locks brief on a live table
+        with transaction.atomic(using=db):
+            Appointment.objects.using(db).bulk_update(batch, ['phone_normalized', 'email_normalized'])
+        last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('astha_therapy_center_web', '0007_contact_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='email_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='phone_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=15),
+        ),
+        migrations.RunPython(backfill_lookup_columns, migrations.RunPython.noop),
+        # Indexes are built once the columns are filled
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['phone_normalized'], name='appointment_phone_norm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['email_normalized'], name='appointment_email_norm_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:17
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astha_therapy_center_web', '0008_appointment_lookup_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Patient',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('email', models.EmailField(blank=True, max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=15)),
+                ('phone_normalized', models.CharField(blank=True, default='', editable=False, max_length=15)),
+                ('email_normalized', models.CharField(blank=True, default='', editable=False, max_length=254)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Patient',
+                'verbose_name_plural': 'Patients',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['email_normalized'], name='patient_email_norm_idx'), models.Index(fields=['phone_normalized'], name='patient_phone_norm_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='patient',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='astha_therapy_center_web.patient'),
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='patient',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contacts', to='astha_therapy_center_web.patient'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['patient', 'created_at'], name='appointment_patient_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['patient', 'created_at'], name='contact_patient_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astha_therapy_center_web', '0010_row_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('scope', models.CharField(help_text='Model name (appointment, contact)', max_length=30)),
+                ('object_id', models.UUIDField()),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('status', 'Status changed')], max_length=10)),
+                ('status', models.CharField(max_length=20)),
+                ('previous_status', models.CharField(blank=True, default='', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Change Event',
+                'verbose_name_plural': 'Change Events',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astha_therapy_center_web', '0012_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAppointment',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(max_length=15)),
+                ('service', models.CharField(choices=[('manual_therapy', 'Manual Therapy'), ('chronic_pain', 'Chronic Pain'), ('hand_therapy', 'Hand Therapy'), ('sports_therapy', 'Sports Therapy'), ('cupping_therapy', 'Cupping Therapy'), ('ultrasound_therapy', 'Ultrasound Therapy'), ('laser_therapy', 'Laser Therapy'), ('craniosacral_therapy', 'Craniosacral Therapy')], max_length=50)),
+                ('appointment_date', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('phone_normalized', models.CharField(blank=True, default='', editable=False, max_length=15)),
+                ('email_normalized', models.CharField(blank=True, default='', editable=False, max_length=254)),
+                ('version', models.PositiveIntegerField(default=1, editable=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('patient', models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_appointments', to='astha_therapy_center_web.patient')),
+            ],
+            options={
+                'verbose_name': 'Archived Appointment',
+                'verbose_name_plural': 'Archived Appointments',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedContact',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(max_length=15)),
+                ('subject', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('status', models.CharField(choices=[('new', 'New'), ('read', 'Read'), ('replied', 'Replied'), ('closed', 'Closed')], max_length=20)),
+                ('version', models.PositiveIntegerField(default=1, editable=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('patient', models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_contacts', to='astha_therapy_center_web.patient')),
+            ],
+            options={
+                'verbose_name': 'Archived Contact Message',
+                'verbose_name_plural': 'Archived Contact Messages',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedappointment',
+            index=models.Index(fields=['created_at', 'id'], name='arch_appointment_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedappointment',
+            index=models.Index(fields=['phone_normalized'], name='arch_appointment_phone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedappointment',
+            index=models.Index(fields=['email_normalized'], name='arch_appointment_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedappointment',
+            index=models.Index(fields=['patient', 'created_at'], name='arch_appointment_patient_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcontact',
+            index=models.Index(fields=['created_at', 'id'], name='arch_contact_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcontact',
+            index=models.Index(fields=['patient', 'created_at'], name='arch_contact_patient_idx'),
+        ),
+    ]
@@ -0,0 +1,136 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:53
+
+import astha_therapy_center_web.ids
+from django.db import migrations
+
+# Primary keys switched to CompactUUIDField, plus the other UUID columns
+# that hold their values
+KEY_FIELDS = [
+    ('Patient', 'id'),
+    ('Appointment', 'id'),
+    ('Contact', 'id'),
+    ('Therapist', 'id'),
+    ('Article', 'id'),
+    ('ArchivedAppointment', 'id'),
+    ('ArchivedContact', 'id'),
+    ('ChangeEvent', 'object_id'),
+]
+
+
+def uuid_columns(apps):
+    """(table, column, nullable) of every column whose type changes, foreign keys included"""
+    app = apps.get_app_config('astha_therapy_center_web')
+    targets = {(model_name.lower(), name) for model_name, name in KEY_FIELDS}
+    columns = []
+    for model in app.get_models():
+        for field in model._meta.local_fields:
+            if (model._meta.model_name, field.name) in targets or (
+                field.is_relation and
+                (field.related_model._meta.model_name, field.target_field.name) in targets
+            ):
+                columns.append((model._meta.db_table, field.column, field.null))
+    return columns
+
+
+def convert_columns(apps, schema_editor, to_binary):
+    # Existing ids keep their value (the same 128 bits, stored as raw bytes
+    # instead of hex), so every /<uuid>/ URL already handed out still works.
+    # MySQL cannot retype a column used by a foreign key, so the constraints
+    # are dropped for the conversion and recreated afterwards.
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    columns = uuid_columns(apps)
+    tables = sorted({table for table, _, _ in columns})
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT table_name, constraint_name, column_name, referenced_table_name, referenced_column_name '
+            'FROM information_schema.key_column_usage '
+            'WHERE table_schema = DATABASE() AND referenced_table_name IN (%s)' % ', '.join(['%s'] * len(tables)),
+            tables,
+        )
+        foreign_keys = cursor.fetchall()
+
+    quote = schema_editor.quote_name
+    for table, name, _, _, _ in foreign_keys:
+        schema_editor.execute(f'ALTER TABLE {quote(table)} DROP FOREIGN KEY {quote(name)}')
+    for table, column, nullable in columns:
+        null = 'NULL' if nullable else 'NOT NULL'
+        table, column = quote(table), quote(column)
+        schema_editor.execute(f'ALTER TABLE {table} MODIFY {column} varbinary(32) {null}')
+        if to_binary:
+            schema_editor.execute(f'UPDATE {table} SET {column} = UNHEX({column})')
+            schema_editor.execute(f'ALTER TABLE {table} MODIFY {column} binary(16) {null}')
+        else:
+            schema_editor.execute(f'UPDATE {table} SET {column} = LOWER(HEX({column}))')
+            schema_editor.execute(f'ALTER TABLE {table} MODIFY {column} char(32) {null}')
+    for table, name, column, referenced_table, referenced_column in foreign_keys:
+        schema_editor.execute(
+            f'ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} FOREIGN KEY ({quote(column)}) '
+            f'REFERENCES {quote(referenced_table)} ({quote(referenced_column)})'
+        )
+
+
+def compact_uuid_columns(apps, schema_editor):
+    convert_columns(apps, schema_editor, to_binary=True)
+
+
+def expand_uuid_columns(apps, schema_editor):
+    convert_columns(apps, schema_editor, to_binary=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astha_therapy_center_web', '0013_archive_tables'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            # Other backends keep the column type they already have
+            database_operations=[
+                migrations.RunPython(compact_uuid_columns, expand_uuid_columns),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='appointment',
+                    name='id',
+                    field=astha_therapy_center_web.ids.CompactUUIDField(default=astha_therapy_center_web.ids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='archivedappointment',
+                    name='id',
+                    field=astha_therapy_center_web.ids.CompactUUIDField(editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='archivedcontact',
+                    name='id',
+                    field=astha_therapy_center_web.ids.CompactUUIDField(editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='article',
+                    name='id',
+                    field=astha_therapy_center_web.ids.CompactUUIDField(default=astha_therapy_center_web.ids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='changeevent',
+                    name='object_id',
+                    field=astha_therapy_center_web.ids.CompactUUIDField(),
+                ),
+                migrations.AlterField(
+                    model_name='contact',
+                    name='id',
+                    field=astha_therapy_center_web.ids.CompactUUIDField(default=astha_therapy_center_web.ids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='patient',
+                    name='id',
+                    field=astha_therapy_center_web.ids.CompactUUIDField(default=astha_therapy_center_web.ids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='therapist',
+                    name='id',
+                    field=astha_therapy_center_web.ids.CompactUUIDField(default=astha_therapy_center_web.ids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
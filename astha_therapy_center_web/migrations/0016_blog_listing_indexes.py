@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astha_therapy_center_web', '0015_blog_rendering'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['status', 'published_at', 'id'], name='blogpost_status_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['category', 'status', 'published_at'], name='blogpost_category_pub_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_published_posts(apps, schema_editor):
+    from astha_therapy_center_web.blog_search import INDEX_NAME, post_terms
+
+    BlogPost = apps.get_model('astha_therapy_center_web', 'BlogPost')
+    BlogSearchTerm = apps.get_model('astha_therapy_center_web', 'BlogSearchTerm')
+    SearchIndexVersion = apps.get_model('astha_therapy_center_web', 'SearchIndexVersion')
+    db = schema_editor.connection.alias
+    posts = BlogPost.objects.using(db).filter(status='published').prefetch_related('tags')
+    BlogSearchTerm.objects.using(db).bulk_create([
+        BlogSearchTerm(post_id=post.pk, term=term, weight=min(weight, 32767))
+        for post in posts
+        for term, weight in post_terms(post, [tag.name for tag in post.tags.all() if tag.is_active]).items()
+    ], batch_size=1000)
+    SearchIndexVersion.objects.using(db).create(name=INDEX_NAME, count=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astha_therapy_center_web', '0016_blog_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=30, unique=True)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Search Index Version',
+                'verbose_name_plural': 'Search Index Versions',
+            },
+        ),
+        migrations.CreateModel(
+            name='BlogSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='astha_therapy_center_web.blogpost')),
+            ],
+            options={
+                'verbose_name': 'Blog Search Term',
+                'verbose_name_plural': 'Blog Search Terms',
+                'constraints': [models.UniqueConstraint(fields=('term', 'post'), name='unique_blog_search_term')],
+            },
+        ),
+        migrations.RunPython(index_published_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astha_therapy_center_web', '0017_blog_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(help_text='posts or therapists', max_length=20)),
+                ('object_id', models.CharField(max_length=36)),
+                ('digest', models.CharField(max_length=32)),
+            ],
+            options={
+                'verbose_name': 'Related Fingerprint',
+                'verbose_name_plural': 'Related Fingerprints',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_related_fingerprint')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField(help_text='Cosine similarity of the two posts')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='astha_therapy_center_web.blogpost')),
+                ('target', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='astha_therapy_center_web.blogpost')),
+            ],
+            options={
+                'verbose_name': 'Related Post',
+                'verbose_name_plural': 'Related Posts',
+                'ordering': ['source', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('source', 'rank'), name='unique_related_post_rank')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RelatedTherapist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField(help_text='Cosine similarity of the two profiles')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='astha_therapy_center_web.therapist')),
+                ('target', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='astha_therapy_center_web.therapist')),
+            ],
+            options={
+                'verbose_name': 'Related Therapist',
+                'verbose_name_plural': 'Related Therapists',
+                'ordering': ['source', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('source', 'rank'), name='unique_related_therapist_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:42
+
+import astha_therapy_center_web.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astha_therapy_center_web', '0018_related_items'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blogsearchterm',
+            name='term',
+            field=astha_therapy_center_web.fields.BinaryCharField(max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astha_therapy_center_web', '0019_blog_search_term_binary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='auto_excerpt',
+            field=models.TextField(blank=True, editable=False, max_length=500),
+        ),
+    ]
@@ -1,8 +1,16 @@
-import uuid
-from django.db import models
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+from django.db import models, router, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.contrib.auth.base_user import BaseUserManager
 
+from .fields import BinaryCharField
+from .ids import CompactUUIDField, uuid7
+from .normalization import normalize_email, normalize_phone
+from .rendering import RENDERER_VERSION, render_content
+
 
 class CustomUserManager(BaseUserManager):
     """
@@ -70,7 +78,184 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         return self.first_name
 
 
-class Appointment(models.Model):
+class ConcurrentUpdateError(Exception):
+    """The row was changed or deleted by someone else since it was loaded"""
+
+
+class VersionedModel(models.Model):
+    """
+    Abstract model with optimistic concurrency control. Every update of a
+    loaded row is a conditional UPDATE ... WHERE version = <loaded version>
+    that also bumps the version; if another writer got there first nothing
+    matches and ConcurrentUpdateError is raised instead of overwriting.
+    """
+    version = models.PositiveIntegerField(default=1, editable=False)
+    
+    class Meta:
+        abstract = True
+    
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        if self._state.adding:
+            # The row commits together with the counter and rollup increments
+            # of its post_save signals, so recounts never see one without the other
+            with transaction.atomic(using=using):
+                return super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'version'}
+        self._expected_version = self.version
+        self.version += 1
+        # A savepoint keeps a rejected update from breaking the caller's transaction
+        try:
+            with transaction.atomic(using=using):
+                super().save(*args, **kwargs)
+        except Exception:
+            self.version = self._expected_version
+            raise
+        finally:
+            del self._expected_version
+    
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = getattr(self, '_expected_version', None)
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        if not base_qs.filter(pk=pk_val, version=expected)._update(values):
+            raise ConcurrentUpdateError(
+                f'{self._meta.verbose_name} {pk_val} was changed by someone else'
+            )
+        return True
+
+
+class StatusQuerySet(models.QuerySet):
+    """
+    QuerySet for models whose status column is tracked by StatusCounter
+    """
+    def set_status(self, status):
+        """
+        Move every matched row to `status` with a single UPDATE and keep the
+        status counters and daily rollups in step. Returns (pk, previous_status)
+        pairs for the rows that actually changed.
+        """
+        tracked = [name for name in ('status', 'service', 'created_at') if hasattr(self.model, name)]
+        with transaction.atomic(using=self.db):
+            rows = list(self.exclude(status=status).only(*tracked).select_for_update())
+            changed = [(row.pk, row.status) for row in rows]
+            if rows:
+                extra = {'version': F('version') + 1} if issubclass(self.model, VersionedModel) else {}
+                self.model._base_manager.using(self.db).filter(
+                    pk__in=[pk for pk, _ in changed]
+                ).update(status=status, updated_at=timezone.now(), **extra)
+                scope = self.model._meta.model_name
+                for previous, count in Counter(previous for _, previous in changed).items():
+                    StatusCounter.objects.adjust(scope, previous, -count)
+                StatusCounter.objects.adjust(scope, status, len(rows))
+                rollups = Counter()
+                for row in rows:
+                    rollups[DailyRollup.key_of(row)] -= 1
+                    row.status = status
+                    rollups[DailyRollup.key_of(row)] += 1
+                for key, delta in rollups.items():
+                    DailyRollup.objects.adjust(key, delta)
+                if scope in ChangeEvent.SCOPES:
+                    ChangeEvent.objects.record(scope, [
+                        (pk, ChangeEvent.STATUS, status, previous) for pk, previous in changed
+                    ])
+        return changed
+
+
+class PatientManager(models.Manager):
+    def match(self, name, email, phone):
+        """The patient with the same normalized email or phone, created if new"""
+        return self.match_many([(name, email, phone)])[0]
+    
+    def match_many(self, identities):
+        """
+        Patients for a list of (name, email, phone) triples, with one lookup
+        query and one batched insert for the new ones. Email matches win over
+        phone matches and the oldest patient wins ties; triples with neither
+        email nor phone get None.
+        """
+        keys = [(normalize_email(email), normalize_phone(phone)) for _, email, phone in identities]
+        emails = {email for email, _ in keys if email}
+        phones = {phone for _, phone in keys if phone}
+        by_email, by_phone = {}, {}
+        if emails or phones:
+            existing = self.filter(Q(email_normalized__in=emails) | Q(phone_normalized__in=phones))
+            for patient in existing.order_by('-created_at'):
+                if patient.email_normalized:
+                    by_email[patient.email_normalized] = patient
+                if patient.phone_normalized:
+                    by_phone[patient.phone_normalized] = patient
+        
+        patients, created = [], []
+        for (name, email, phone), (email_key, phone_key) in zip(identities, keys):
+            if not (email_key or phone_key):
+                patients.append(None)
+                continue
+            patient = (email_key and by_email.get(email_key)) or (phone_key and by_phone.get(phone_key))
+            if not patient:
+                patient = self.model(
+                    name=name, email=email, phone=phone,
+                    email_normalized=email_key, phone_normalized=phone_key,
+                )
+                created.append(patient)
+            if email_key:
+                by_email.setdefault(email_key, patient)
+            if phone_key:
+                by_phone.setdefault(phone_key, patient)
+            patients.append(patient)
+        self.bulk_create(created)
+        return patients
+    
+    def merge(self, keep_id, duplicate_ids):
+        """Move every appointment and message of the duplicates onto `keep_id` and delete them"""
+        ids = [pk for pk in duplicate_ids if pk != keep_id]
+        if not ids:
+            return
+        with transaction.atomic(using=self.db):
+            Appointment._base_manager.using(self.db).filter(patient__in=ids).update(patient=keep_id)
+            Contact._base_manager.using(self.db).filter(patient__in=ids).update(patient=keep_id)
+            ArchivedAppointment._base_manager.using(self.db).filter(patient__in=ids).update(patient=keep_id)
+            ArchivedContact._base_manager.using(self.db).filter(patient__in=ids).update(patient=keep_id)
+            self.filter(pk__in=ids).delete()
+
+
+class Patient(models.Model):
+    """
+    A person who booked an appointment or sent a message, identified by
+    normalized email or phone
+    """
+    id = CompactUUIDField(primary_key=True, default=uuid7, editable=False)
+    name = models.CharField(max_length=100)
+    email = models.EmailField(blank=True)
+    phone = models.CharField(max_length=15, blank=True)
+    phone_normalized = models.CharField(max_length=15, blank=True, default='', editable=False)
+    email_normalized = models.CharField(max_length=254, blank=True, default='', editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = PatientManager()
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Patient'
+        verbose_name_plural = 'Patients'
+        indexes = [
+            models.Index(fields=['email_normalized'], name='patient_email_norm_idx'),
+            models.Index(fields=['phone_normalized'], name='patient_phone_norm_idx'),
+        ]
+    
+    def __str__(self):
+        return self.name
+    
+    def save(self, *args, **kwargs):
+        self.phone_normalized = normalize_phone(self.phone)
+        self.email_normalized = normalize_email(self.email)
+        super().save(*args, **kwargs)
+
+
+class Appointment(VersionedModel):
     """
     Model for storing appointment bookings
     """
@@ -92,7 +277,10 @@ class Appointment(models.Model):
         ('cancelled', 'Cancelled'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = CompactUUIDField(primary_key=True, default=uuid7, editable=False)
+    # Indexed together with created_at below for the patient history
+    patient = models.ForeignKey(Patient, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='appointments', db_index=False, editable=False)
     name = models.CharField(max_length=100)
     email = models.EmailField()
     phone = models.CharField(max_length=15)
@@ -100,12 +288,28 @@ class Appointment(models.Model):
     appointment_date = models.DateField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     notes = models.TextField(blank=True, null=True)
+    # Lookup columns derived from phone/email on save, for indexed search
+    phone_normalized = models.CharField(max_length=15, blank=True, default='', editable=False)
+    email_normalized = models.CharField(max_length=254, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = StatusQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Appointment'
+        indexes = [
+            # Keyset pagination of the admin list
+            models.Index(fields=['created_at', 'id'], name='appointment_created_id_idx'),
+            models.Index(fields=['phone_normalized'], name='appointment_phone_norm_idx'),
+            models.Index(fields=['email_normalized'], name='appointment_email_norm_idx'),
+            models.Index(fields=['patient', 'created_at'], name='appointment_patient_idx'),
+            # Status-filtered list pages, newest first
+            models.Index(fields=['status', 'created_at', 'id'], name='appointment_status_created_idx'),
+            # Day schedules per service; covers per-day service counts
+            models.Index(fields=['appointment_date', 'service'], name='appointment_date_service_idx'),
+        ]
         verbose_name_plural = 'Appointments'
     
     def __str__(self):
@@ -120,9 +324,23 @@ class Appointment(models.Model):
             'cancelled': 'bg-danger',
         }
         return status_classes.get(self.status, 'bg-secondary')
+    
+    def normalize_lookup_fields(self):
+        """Refresh the normalized phone/email lookup columns"""
+        self.phone_normalized = normalize_phone(self.phone)
+        self.email_normalized = normalize_email(self.email)
+    
+    def save(self, *args, **kwargs):
+        self.normalize_lookup_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and self.patient_id is None:
+            self.patient = Patient.objects.match(self.name, self.email, self.phone)
+        if update_fields is not None and {'phone', 'email'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'phone_normalized', 'email_normalized'}
+        super().save(*args, **kwargs)
 
 
-class Contact(models.Model):
+class Contact(VersionedModel):
     """
     Model for storing contact form submissions
     """
@@ -133,7 +351,10 @@ class Contact(models.Model):
         ('closed', 'Closed'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = CompactUUIDField(primary_key=True, default=uuid7, editable=False)
+    # Indexed together with created_at below for the patient history
+    patient = models.ForeignKey(Patient, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='contacts', db_index=False, editable=False)
     name = models.CharField(max_length=100)
     email = models.EmailField()
     phone = models.CharField(max_length=15)
@@ -143,9 +364,18 @@ class Contact(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = StatusQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Contact Message'
+        indexes = [
+            # Keyset pagination of the admin list
+            models.Index(fields=['created_at', 'id'], name='contact_created_id_idx'),
+            models.Index(fields=['patient', 'created_at'], name='contact_patient_idx'),
+            # Status-filtered list pages, newest first
+            models.Index(fields=['status', 'created_at', 'id'], name='contact_status_created_idx'),
+        ]
         verbose_name_plural = 'Contact Messages'
     
     def __str__(self):
@@ -160,10 +390,15 @@ class Contact(models.Model):
             'closed': 'bg-secondary',
         }
         return status_classes.get(self.status, 'bg-secondary')
+    
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is None and self.patient_id is None:
+            self.patient = Patient.objects.match(self.name, self.email, self.phone)
+        super().save(*args, **kwargs)
 
 
 class Article(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = CompactUUIDField(primary_key=True, default=uuid7, editable=False)
     title = models.CharField(max_length=255)
     image = models.ImageField(upload_to='articles/')
     
@@ -171,11 +406,11 @@ class Article(models.Model):
         return self.title
 
 
-class Therapist(models.Model):
+class Therapist(VersionedModel):
     """
     Model for therapist/doctor profiles
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = CompactUUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=100, help_text="Full name (e.g., Dr. Emily Johnson)")
     title = models.CharField(max_length=100, help_text="Professional title (e.g., Senior Physiotherapist)")
     experience_years = models.PositiveIntegerField(help_text="Years of experience")
@@ -258,3 +493,633 @@ class Therapist(models.Model):
     def save(self, *args, **kwargs):
         self.clean()
         super().save(*args, **kwargs)
+
+
+class BlogCategory(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    slug = models.SlugField(max_length=100, unique=True, help_text="URL-friendly name")
+    description = models.TextField(blank=True, help_text="Brief description of the category")
+    is_active = models.BooleanField(default=True, help_text="Show this category on the website")
+    display_order = models.PositiveIntegerField(default=0, help_text="Display order (lower numbers first)")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['display_order', 'name']
+        verbose_name = 'Blog Category'
+        verbose_name_plural = 'Blog Categories'
+
+    def __str__(self):
+        return self.name
+
+
+class BlogTag(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    slug = models.SlugField(unique=True, help_text="URL-friendly name")
+    description = models.TextField(blank=True, help_text="Brief description of the tag")
+    is_active = models.BooleanField(default=True, help_text="Show this tag on the website")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Blog Tag'
+        verbose_name_plural = 'Blog Tags'
+
+    def __str__(self):
+        return self.name
+
+
+class BlogPostQuerySet(models.QuerySet):
+    def published(self):
+        """Posts visible on the website: published, with a publication time already reached"""
+        return self.filter(status='published', published_at__lte=timezone.now())
+
+    def add_views(self, counts):
+        """
+        Add buffered page views, a {post id: views} mapping, with a single
+        UPDATE ... SET view_count = view_count + CASE id WHEN ... END.
+        updated_at is left alone; a view is not an edit.
+        """
+        if not counts:
+            return 0
+        increment = models.Case(
+            *[models.When(pk=pk, then=models.Value(views)) for pk, views in counts.items()],
+            default=models.Value(0),
+            output_field=models.PositiveIntegerField(),
+        )
+        return self.filter(pk__in=list(counts)).update(view_count=F('view_count') + increment)
+
+
+class BlogPost(models.Model):
+    STATUS_CHOICES = [
+        ('draft', 'Draft'),
+        ('published', 'Published'),
+        ('archived', 'Archived'),
+    ]
+
+    title = models.CharField(max_length=200, help_text="Post title")
+    slug = models.SlugField(max_length=200, unique=True, help_text="URL-friendly title")
+    category = models.ForeignKey(BlogCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='posts')
+    tags = models.ManyToManyField(BlogTag, blank=True, related_name='posts')
+    excerpt = models.TextField(max_length=500, blank=True, help_text="Brief summary for blog listing")
+    content = models.TextField(help_text="Main content with rich formatting support")
+    # Rendered from content on save (see rendering.py) and served as is
+    content_html = models.TextField(blank=True, help_text="HTML version of content (auto-generated)")
+    reading_minutes = models.PositiveSmallIntegerField(default=1, editable=False)
+    render_version = models.PositiveSmallIntegerField(default=0, editable=False,
+                                                      help_text="Renderer version content_html was produced by")
+    # The excerpt generated from content at the last render
+    auto_excerpt = models.TextField(max_length=500, blank=True, editable=False)
+    featured_image = models.ImageField(upload_to='blog_images/', blank=True, null=True, help_text="Featured image for the post")
+
+    # SEO
+    meta_title = models.CharField(max_length=200, blank=True, help_text="SEO title (if different from post title)")
+    meta_description = models.TextField(max_length=300, blank=True, help_text="SEO description")
+    meta_keywords = models.CharField(max_length=200, blank=True, help_text="SEO keywords")
+
+    # Publishing
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
+    published_at = models.DateTimeField(null=True, blank=True, help_text="Publication date and time")
+    is_featured = models.BooleanField(default=False, help_text="Show this post as featured")
+    display_order = models.PositiveIntegerField(default=0, help_text="Display order (lower numbers first)")
+    allow_comments = models.BooleanField(default=True, help_text="Allow comments on this post")
+    allow_sharing = models.BooleanField(default=True, help_text="Allow social media sharing")
+    # Incremented in batches by viewcounts.py, never by save()
+    view_count = models.PositiveIntegerField(default=0, help_text="Number of times this post has been viewed")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    RENDERED_FIELDS = ['content_html', 'reading_minutes', 'excerpt', 'auto_excerpt', 'render_version']
+
+    objects = BlogPostQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-published_at', '-created_at']
+        verbose_name = 'Blog Post'
+        verbose_name_plural = 'Blog Posts'
+        indexes = [
+            # Keyset pagination of the published listing
+            models.Index(fields=['status', 'published_at', 'id'], name='blogpost_status_published_idx'),
+            # Category archives
+            models.Index(fields=['category', 'status', 'published_at'], name='blogpost_category_pub_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def get_absolute_url(self):
+        from django.urls import reverse
+        return reverse('astha_therapy_center_web:blog_single', kwargs={'slug': self.slug})
+
+    def render(self, rendered=None):
+        """
+        Fill content_html, reading time and the excerpt from content, or
+        from an already rendered result. The excerpt is only replaced while
+        it is blank or still the one generated last time, so edits to the
+        content update it but an excerpt the author wrote is kept.
+        """
+        rendered = rendered or render_content(self.content)
+        self.content_html = rendered.html
+        self.reading_minutes = rendered.reading_minutes
+        if not self.excerpt or self.excerpt == self.auto_excerpt:
+            self.excerpt = rendered.excerpt
+        self.auto_excerpt = rendered.excerpt
+        self.render_version = RENDERER_VERSION
+
+    def save(self, *args, **kwargs):
+        if self.status == 'published' and self.published_at is None:
+            self.published_at = timezone.now()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.render()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.RENDERED_FIELDS}
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Editing a post must not overwrite views flushed since it was loaded
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'view_count'
+            ]
+        super().save(*args, **kwargs)
+
+
+class CounterManager(models.Manager):
+    """
+    Manager for tables holding a `count` column per unique key
+    """
+    def increment(self, delta, **key):
+        """Atomically add `delta` to the count stored under `key`"""
+        if not delta:
+            return
+        if not self.filter(**key).update(count=F('count') + delta):
+            self.get_or_create(**key)
+            self.filter(**key).update(count=F('count') + delta)
+
+
+class StatusCounterManager(CounterManager):
+    def adjust(self, scope, status, delta):
+        """Atomically add `delta` to the counter for (scope, status)"""
+        self.increment(delta, scope=scope, status=status)
+
+    def snapshot(self):
+        """
+        Read every counter in one query as {scope: Counter({status: count})}
+        """
+        counters = defaultdict(Counter)
+        for scope, status, count in self.values_list('scope', 'status', 'count'):
+            counters[scope][status] = count
+        return counters
+
+    def actual_counts(self):
+        """
+        Count the tracked tables directly, keyed by (scope, status). Archived
+        rows count toward their model's scope as well as its archived_ one.
+        """
+        counts = Counter()
+        for model, archive_model in ARCHIVE_MODELS.items():
+            scope = model._meta.model_name
+            for source, scopes in ((model, [scope]), (archive_model, [scope, f'archived_{scope}'])):
+                rows = source._base_manager.order_by().values('status').annotate(count=Count('pk'))
+                for row in rows:
+                    for counted in scopes:
+                        counts[(counted, row['status'])] += row['count']
+        rows = Therapist._base_manager.order_by().values('is_active').annotate(count=Count('pk'))
+        for row in rows:
+            counts[('therapist', 'active' if row['is_active'] else 'inactive')] = row['count']
+        return counts
+
+    def reconcile(self, dry_run=False):
+        """
+        Compare the counters with the tracked tables and fix any drift.
+        Returns a list of (scope, status, stored, actual) for drifted counters.
+        """
+        with transaction.atomic(using=self.db):
+            # Lock the counters first so bookings that commit while we count
+            # apply their increments after our corrected values.
+            stored = {
+                (scope, status): count
+                for scope, status, count in self.select_for_update().values_list('scope', 'status', 'count')
+            }
+            actual = self.actual_counts()
+            drift = [
+                (scope, status, stored.get((scope, status), 0), actual.get((scope, status), 0))
+                for scope, status in sorted(set(stored) | set(actual))
+                if stored.get((scope, status), 0) != actual.get((scope, status), 0)
+            ]
+            if not dry_run:
+                for scope, status, _, count in drift:
+                    self.update_or_create(scope=scope, status=status, defaults={'count': count})
+        return drift
+
+
+class StatusCounter(models.Model):
+    """
+    Materialized row counts per status for appointments, contacts and
+    therapists, kept up to date by signals so dashboards avoid COUNT(*)
+    """
+    scope = models.CharField(max_length=30, help_text="Tracked model name (appointment, contact, therapist)")
+    status = models.CharField(max_length=20)
+    count = models.BigIntegerField(default=0)
+    
+    objects = StatusCounterManager()
+    
+    class Meta:
+        verbose_name = 'Status Counter'
+        verbose_name_plural = 'Status Counters'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'status'], name='unique_status_counter'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope}.{self.status} = {self.count}"
+    
+    @staticmethod
+    def status_of(instance):
+        """Counter status of a tracked instance, or None if the field was deferred"""
+        if isinstance(instance, Therapist):
+            if 'is_active' not in instance.__dict__:
+                return None
+            return 'active' if instance.is_active else 'inactive'
+        return instance.__dict__.get('status')
+
+
+class DailyRollupManager(CounterManager):
+    def adjust(self, key, delta):
+        """Add `delta` to the rollup row for a (scope, day, service, status) key"""
+        scope, day, service, status = key
+        self.increment(delta, scope=scope, day=day, service=service, status=status)
+
+    def for_range(self, scope, start, end):
+        """
+        Return (day, service, status, count) rows for `scope` between the
+        `start` and `end` dates inclusive, in a single query
+        """
+        return self.filter(scope=scope, day__range=(start, end), count__gt=0).values_list(
+            'day', 'service', 'status', 'count'
+        )
+
+    def summarize(self, scope, start, end):
+        """
+        Status, service and monthly totals for `scope` between `start` and
+        `end` inclusive, computed from a single rollup query
+        """
+        status_stats, service_stats, monthly_stats = Counter(), Counter(), Counter()
+        for day, service, status, count in self.for_range(scope, start, end):
+            status_stats[status] += count
+            if service:
+                service_stats[service] += count
+            monthly_stats[day.replace(day=1)] += count
+        return {
+            'status_stats': [{'status': k, 'count': v} for k, v in status_stats.most_common()],
+            'service_stats': [{'service': k, 'count': v} for k, v in service_stats.most_common()],
+            'monthly_stats': [{'month': k, 'count': v} for k, v in sorted(monthly_stats.items())],
+            'total': sum(status_stats.values()),
+        }
+
+    def rebuild(self, model, start, end, chunk_size=2000):
+        """
+        Recount the rollups of `model` for the days between `start` and `end`
+        inclusive from the raw rows, streamed `chunk_size` rows at a time.
+        Stored counts are overwritten, so running it twice is harmless.
+        Returns the number of source rows read.
+        """
+        scope = model._meta.model_name
+        tz = timezone.get_current_timezone()
+        since = datetime.combine(start, time.min, tzinfo=tz)
+        until = datetime.combine(end + timedelta(days=1), time.min, tzinfo=tz)
+        fields = ['created_at', 'status'] + (['service'] if scope in self.model.SERVICE_SCOPES else [])
+        with transaction.atomic(using=self.db):
+            # Lock the rollups first, like StatusCounterManager.reconcile():
+            # rows that commit while we count apply their increments after
+            # our corrected values
+            stored = {
+                (row.day, row.service, row.status): row
+                for row in self.select_for_update().filter(scope=scope, day__range=(start, end))
+            }
+            counts = Counter()
+            read = 0
+            # Archived rows keep counting toward the rollups
+            for source in (model, ARCHIVE_MODELS[model]):
+                rows = source._base_manager.filter(created_at__gte=since, created_at__lt=until).order_by().values_list(*fields)
+                for row in rows.iterator(chunk_size=chunk_size):
+                    created_at, status = row[0], row[1]
+                    service = row[2] if len(row) > 2 else ''
+                    counts[(timezone.localdate(created_at, tz), service, status)] += 1
+                    read += 1
+            # Locked rows are updated in place rather than replaced, so
+            # increments waiting on them still find them
+            changed, emptied = [], []
+            for key, row in stored.items():
+                if key not in counts:
+                    emptied.append(row.pk)
+                elif row.count != counts[key]:
+                    row.count = counts[key]
+                    changed.append(row)
+            self.filter(pk__in=emptied).delete()
+            self.bulk_update(changed, ['count'], batch_size=500)
+            self.bulk_create([
+                self.model(scope=scope, day=day, service=service, status=status, count=count)
+                for (day, service, status), count in counts.items() if (day, service, status) not in stored
+            ], batch_size=500)
+        return read
+
+
+class DailyRollup(models.Model):
+    """
+    Daily appointment and contact counts per service and status, kept up to
+    date by signals so the statistics pages never scan the raw tables
+    """
+    SERVICE_SCOPES = ('appointment',)
+    
+    scope = models.CharField(max_length=30, help_text="Tracked model name (appointment, contact)")
+    day = models.DateField(help_text="Local date the row was created on")
+    service = models.CharField(max_length=50, blank=True, default='')
+    status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+    
+    objects = DailyRollupManager()
+    
+    class Meta:
+        ordering = ['scope', 'day']
+        verbose_name = 'Daily Rollup'
+        verbose_name_plural = 'Daily Rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'day', 'service', 'status'], name='unique_daily_rollup'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope} {self.day} {self.service or '-'}/{self.status} = {self.count}"
+    
+    @classmethod
+    def key_of(cls, instance, previous=None):
+        """
+        (scope, day, service, status) rollup key of a tracked instance. Fields
+        that were deferred are taken from the `previous` key; returns None if
+        they cannot be resolved (e.g. the instance has not been saved yet).
+        """
+        values = instance.__dict__
+        scope = instance._meta.model_name
+        _, day, service, status = previous or (scope, None, None, None)
+        if values.get('created_at') is not None:
+            day = timezone.localdate(values['created_at'])
+        status = values.get('status', status)
+        service = values.get('service', service) if scope in cls.SERVICE_SCOPES else ''
+        if day is None or status is None or service is None:
+            return None
+        return (scope, day, service, status)
+
+
+class ContactSearchTerm(models.Model):
+    """
+    Inverted index of contact messages for backends without a FULLTEXT
+    index: one row per (term, contact) with the field-weighted frequency
+    """
+    term = models.CharField(max_length=64)
+    contact = models.ForeignKey(Contact, on_delete=models.CASCADE, related_name='search_terms')
+    weight = models.PositiveSmallIntegerField(default=1)
+    
+    class Meta:
+        verbose_name = 'Contact Search Term'
+        verbose_name_plural = 'Contact Search Terms'
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'contact'], name='unique_contact_search_term'),
+        ]
+    
+    def __str__(self):
+        return f"{self.term} -> {self.contact_id}"
+
+
+class BlogSearchTerm(models.Model):
+    """
+    Inverted index of published blog posts: one row per (term, post) with
+    the field-weighted frequency. Searches are served from an in-memory
+    copy (see blog_search.py).
+    """
+    term = BinaryCharField(max_length=64)
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='search_terms')
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        verbose_name = 'Blog Search Term'
+        verbose_name_plural = 'Blog Search Terms'
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'post'], name='unique_blog_search_term'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.post_id}"
+
+
+class SearchIndexVersion(models.Model):
+    """
+    Number of changes made to a search index table, so every worker can
+    tell when its in-memory copy is out of date
+    """
+    name = models.CharField(max_length=30, unique=True)
+    count = models.BigIntegerField(default=0)
+
+    objects = CounterManager()
+
+    class Meta:
+        verbose_name = 'Search Index Version'
+        verbose_name_plural = 'Search Index Versions'
+
+    def __str__(self):
+        return f"{self.name} v{self.count}"
+
+
+class RelatedPost(models.Model):
+    """
+    Precomputed "related articles" of a published post, best first, written
+    by `manage.py build_related` (see related.py)
+    """
+    source = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='+')
+    # Not cascaded: the job must see every list a deleted post drops out of
+    target = models.ForeignKey(BlogPost, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField(help_text="Cosine similarity of the two posts")
+
+    class Meta:
+        ordering = ['source', 'rank']
+        verbose_name = 'Related Post'
+        verbose_name_plural = 'Related Posts'
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'rank'], name='unique_related_post_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.source_id} -> {self.target_id}"
+
+
+class RelatedTherapist(models.Model):
+    """Precomputed "related therapists" of an active therapist, best first (see related.py)"""
+    source = models.ForeignKey(Therapist, on_delete=models.CASCADE, related_name='+')
+    # Not cascaded: the job must see every list a deleted therapist drops out of
+    target = models.ForeignKey(Therapist, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField(help_text="Cosine similarity of the two profiles")
+
+    class Meta:
+        ordering = ['source', 'rank']
+        verbose_name = 'Related Therapist'
+        verbose_name_plural = 'Related Therapists'
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'rank'], name='unique_related_therapist_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.source_id} -> {self.target_id}"
+
+
+class RelatedFingerprint(models.Model):
+    """
+    Digest of the features an item's related list was last computed from,
+    so the job only recomputes items that changed
+    """
+    kind = models.CharField(max_length=20, help_text="posts or therapists")
+    object_id = models.CharField(max_length=36)
+    digest = models.CharField(max_length=32)
+
+    class Meta:
+        verbose_name = 'Related Fingerprint'
+        verbose_name_plural = 'Related Fingerprints'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_related_fingerprint'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+class ChangeEventManager(models.Manager):
+    def record(self, scope, changes):
+        """
+        Append one event per (object_id, kind, status, previous_status)
+        tuple in `changes` with a single INSERT
+        """
+        self.bulk_create([
+            self.model(scope=scope, object_id=object_id, kind=kind, status=status, previous_status=previous or '')
+            for object_id, kind, status, previous in changes
+        ], batch_size=500)
+
+    def latest_id(self):
+        """Id of the newest event (0 if there are none), read from the primary key index"""
+        return self.aggregate(latest=models.Max('id'))['latest'] or 0
+
+    async def alatest_id(self):
+        return (await self.aaggregate(latest=models.Max('id')))['latest'] or 0
+
+    def prune(self, before):
+        """Delete events recorded before the `before` datetime; returns the number deleted"""
+        return self.filter(created_at__lt=before).delete()[0]
+
+
+class ChangeEvent(models.Model):
+    """
+    Append-only log of appointment and contact inserts and status changes.
+    The auto-increment id is the cursor the live admin feed reads from.
+    """
+    SCOPES = ('appointment', 'contact')
+    CREATED = 'created'
+    STATUS = 'status'
+    KIND_CHOICES = [
+        (CREATED, 'Created'),
+        (STATUS, 'Status changed'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    scope = models.CharField(max_length=30, help_text="Model name (appointment, contact)")
+    object_id = CompactUUIDField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20)
+    previous_status = models.CharField(max_length=20, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    objects = ChangeEventManager()
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Change Event'
+        verbose_name_plural = 'Change Events'
+    
+    def __str__(self):
+        return f"#{self.id} {self.scope} {self.object_id} {self.kind} {self.status}"
+
+
+class ArchivedAppointment(models.Model):
+    """
+    Closed appointment moved out of the hot table by the archiver (see
+    archive.py). Same columns as Appointment, plus when it was archived.
+    """
+    id = CompactUUIDField(primary_key=True, editable=False)
+    patient = models.ForeignKey(Patient, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='archived_appointments', db_index=False, editable=False)
+    name = models.CharField(max_length=100)
+    email = models.EmailField()
+    phone = models.CharField(max_length=15)
+    service = models.CharField(max_length=50, choices=Appointment.SERVICE_CHOICES)
+    appointment_date = models.DateField()
+    status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES)
+    notes = models.TextField(blank=True, null=True)
+    phone_normalized = models.CharField(max_length=15, blank=True, default='', editable=False)
+    email_normalized = models.CharField(max_length=254, blank=True, default='', editable=False)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    get_status_badge_class = Appointment.get_status_badge_class
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Archived Appointment'
+        verbose_name_plural = 'Archived Appointments'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='arch_appointment_created_idx'),
+            models.Index(fields=['phone_normalized'], name='arch_appointment_phone_idx'),
+            models.Index(fields=['email_normalized'], name='arch_appointment_email_idx'),
+            models.Index(fields=['patient', 'created_at'], name='arch_appointment_patient_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} - {self.get_service_display()} on {self.appointment_date} (archived)"
+
+
+class ArchivedContact(models.Model):
+    """
+    Closed contact message moved out of the hot table by the archiver (see
+    archive.py). Same columns as Contact, plus when it was archived.
+    """
+    id = CompactUUIDField(primary_key=True, editable=False)
+    patient = models.ForeignKey(Patient, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='archived_contacts', db_index=False, editable=False)
+    name = models.CharField(max_length=100)
+    email = models.EmailField()
+    phone = models.CharField(max_length=15)
+    subject = models.CharField(max_length=200)
+    message = models.TextField()
+    status = models.CharField(max_length=20, choices=Contact.STATUS_CHOICES)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    get_status_badge_class = Contact.get_status_badge_class
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Archived Contact Message'
+        verbose_name_plural = 'Archived Contact Messages'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='arch_contact_created_idx'),
+            models.Index(fields=['patient', 'created_at'], name='arch_contact_patient_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} - {self.subject} (archived)"
+
+
+# Archive table of each model tracked by StatusCounter and DailyRollup
+ARCHIVE_MODELS = {Appointment: ArchivedAppointment, Contact: ArchivedContact}
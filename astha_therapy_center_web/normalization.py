@@ -0,0 +1,38 @@
+import re
+
+from django.conf import settings
+
+NON_DIGITS_RE = re.compile(r'\D')
+# E.164 numbers have at most 15 digits
+MAX_PHONE_DIGITS = 15
+
+
+def default_country_code():
+    return getattr(settings, 'PHONE_DEFAULT_COUNTRY_CODE', '880')
+
+
+def normalize_phone(value):
+    """
+    Digits-only E.164 form of a phone number as typed by a patient, e.g.
+    '+880 16816-52122', '008801681652122' and '01681652122' all become
+    '8801681652122'. National numbers get the default country code.
+    """
+    value = (value or '').strip()
+    digits = NON_DIGITS_RE.sub('', value)
+    if not digits:
+        return ''
+    country_code = default_country_code()
+    if value.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif digits.startswith('0'):
+        digits = country_code + digits[1:]
+    elif not digits.startswith(country_code):
+        digits = country_code + digits
+    return digits[:MAX_PHONE_DIGITS]
+
+
+def normalize_email(value):
+    """Case-folded, trimmed email address used for lookups"""
+    return (value or '').strip().lower()
@@ -0,0 +1,98 @@
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class KeysetPage:
+    """
+    One page of a KeysetPaginator, shaped like django.core.paginator.Page
+    where the templates need it
+    """
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor, count=None):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginator:
+    """
+    Cursor-based pagination over (`field`, id), newest first; `field` is
+    created_at unless given.
+
+    Each page is one indexed range scan of `per_page + 1` rows, however deep
+    it is, and no COUNT(*) is issued. Cursors are signed, opaque tokens;
+    tampered or stale ones fall back to the first page.
+    """
+    salt = 'astha_therapy_center_web.pagination'
+
+    def __init__(self, queryset, per_page, count=None, field='created_at'):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.count = count
+        self.field = field
+
+    def encode(self, obj, direction):
+        return signing.dumps([getattr(obj, self.field).isoformat(), str(obj.pk), direction], salt=self.salt)
+
+    def decode(self, cursor):
+        """Return (position, pk, direction) for a cursor, or None if invalid"""
+        try:
+            position, pk, direction = signing.loads(cursor, salt=self.salt)
+            position = parse_datetime(position)
+        except (signing.BadSignature, TypeError, ValueError):
+            return None
+        if position is None or direction not in ('next', 'prev'):
+            return None
+        return position, pk, direction
+
+    def get_page(self, cursor=None):
+        # The redundant bound on the field gives the planner a sargable range
+        # on the (field, id) index alongside the tie-breaking OR.
+        position = self.decode(cursor) if cursor else None
+        field = self.field
+        if position is None:
+            rows = list(self.queryset.order_by(f'-{field}', '-id')[:self.per_page + 1])
+            has_next, has_previous = len(rows) > self.per_page, False
+            rows = rows[:self.per_page]
+        else:
+            value, pk, direction = position
+            if direction == 'next':
+                after = Q(**{f'{field}__lte': value}) & (Q(**{f'{field}__lt': value}) | Q(id__lt=pk))
+                rows = list(self.queryset.filter(after).order_by(f'-{field}', '-id')[:self.per_page + 1])
+                has_next, has_previous = len(rows) > self.per_page, True
+                rows = rows[:self.per_page]
+            else:
+                before = Q(**{f'{field}__gte': value}) & (Q(**{f'{field}__gt': value}) | Q(id__gt=pk))
+                rows = list(self.queryset.filter(before).order_by(field, 'id')[:self.per_page + 1])
+                has_next, has_previous = True, len(rows) > self.per_page
+                rows = rows[:self.per_page][::-1]
+            if not rows:
+                # Everything past the cursor was deleted; start over
+                return self.get_page()
+
+        return KeysetPage(
+            rows,
+            has_next=has_next,
+            has_previous=has_previous,
+            next_cursor=self.encode(rows[-1], 'next') if rows else None,
+            previous_cursor=self.encode(rows[0], 'prev') if rows else None,
+            count=self.count,
+        )
@@ -0,0 +1,243 @@
+import hashlib
+import json
+import math
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .blog import LIST_DEFERRED_FIELDS
+from .blog_search import post_terms
+from .models import BlogPost, BlogTag, RelatedFingerprint, RelatedPost, RelatedTherapist, Therapist
+from .search import tokenize
+
+# Neighbours stored per item; pages show the first RELATED_SHOWN still visible
+RELATED_LIMIT = 6
+RELATED_SHOWN = 3
+# Pairs less similar than this are not worth suggesting
+MIN_SCORE = 0.05
+# Scores are rounded so a pair gets the same score whichever side it is computed from
+SCORE_DECIMALS = 6
+# Heaviest terms kept per item; the long tail adds cost, not signal
+MAX_TERMS = 40
+# Share of the similarity each block of features carries when both items have it
+POST_BLOCKS = {'tags': 0.45, 'category': 0.2, 'terms': 0.35}
+THERAPIST_BLOCKS = {'title': 0.3, 'skills': 0.35, 'terms': 0.35}
+STOP_WORDS = frozenset("""
+    a about after all also an and any are as at be been before but by can could do does for from had has have
+    he her his how if in into is it its just may more most my no not of on one or our out over she so some
+    such than that the their them then there these they this those through to too up us very was we were
+    what when which while who will with would you your
+""".split())
+# Past this share of changed items, recomputing every list is as cheap
+# as the incremental bookkeeping and holds far fewer score rows in memory
+FULL_REBUILD_SHARE = 0.25
+# Rows per DELETE ... WHERE id IN (...)
+DELETE_BATCH_SIZE = 500
+
+
+def term_weights(counts):
+    """Sublinear weights of the heaviest MAX_TERMS terms of `counts`, stop words left out"""
+    terms = sorted(
+        ((term, 1 + math.log(count)) for term, count in counts.items() if term not in STOP_WORDS and count > 0),
+        key=lambda item: (-item[1], item[0]),
+    )
+    return dict(terms[:MAX_TERMS])
+
+
+def post_features():
+    """{post id: {block: {feature: weight}}} for every published post"""
+    posts = BlogPost.objects.published().select_related('category').only(
+        'id', 'title', 'excerpt', 'content', 'meta_keywords', 'category__slug', 'category__is_active',
+    ).prefetch_related(Prefetch('tags', queryset=BlogTag.objects.filter(is_active=True).only('slug'))).order_by()
+    return {
+        post.pk: {
+            'tags': {tag.slug: 1.0 for tag in post.tags.all()},
+            'category': {post.category.slug: 1.0} if post.category and post.category.is_active else {},
+            'terms': term_weights(post_terms(post, [])),
+        }
+        for post in posts.iterator(chunk_size=500)
+    }
+
+
+def therapist_features():
+    """{therapist id: {block: {feature: weight}}} for every active therapist"""
+    return {
+        therapist.pk: {
+            'title': {term: 1.0 for term in tokenize(therapist.title) if term not in STOP_WORDS},
+            'skills': {skill['name']: float(skill['percentage'])
+                       for skill in therapist.get_skills_data() if skill['percentage']},
+            'terms': term_weights(Counter(tokenize(f'{therapist.bio_short} {therapist.bio_full}'))),
+        }
+        for therapist in Therapist.objects.filter(is_active=True).iterator(chunk_size=500)
+    }
+
+
+SOURCES = {
+    'posts': (RelatedPost, post_features, POST_BLOCKS),
+    'therapists': (RelatedTherapist, therapist_features, THERAPIST_BLOCKS),
+}
+
+
+def fingerprint(features):
+    return hashlib.blake2b(json.dumps(features, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def vectorize(features, blocks):
+    """
+    Unit-length sparse vector {(block, feature): weight}. Each block is
+    normalized on its own and scaled by the square root of its share, so
+    the cosine of two items is the share-weighted sum of their per-block
+    cosines.
+    """
+    vector = {}
+    for block, share in blocks.items():
+        values = features.get(block) or {}
+        norm = math.sqrt(sum(value * value for value in values.values()))
+        for feature, value in values.items():
+            vector[(block, feature)] = value * math.sqrt(share) / norm
+    total = math.sqrt(sum(value * value for value in vector.values()))
+    return {key: value / total for key, value in vector.items()} if total else {}
+
+
+class SimilarityMatrix:
+    """
+    Unit vectors of all items in compressed-row form, plus a column-major
+    copy of the same entries, so one item's similarity to every other item
+    is a single gather and bincount over the columns it has
+    """
+    def __init__(self, vectors):
+        columns = {}
+        indptr, indices, data = [0], [], []
+        for vector in vectors:
+            for feature, weight in vector.items():
+                indices.append(columns.setdefault(feature, len(columns)))
+                data.append(weight)
+            indptr.append(len(indices))
+        self.size = len(vectors)
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.array(indices, dtype=np.int64)
+        self.data = np.array(data, dtype=np.float64)
+        rows = np.repeat(np.arange(self.size), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind='stable')
+        self.column_rows = rows[order]
+        self.column_data = self.data[order]
+        self.column_ptr = np.concatenate(([0], np.cumsum(np.bincount(self.indices, minlength=len(columns)))))
+
+    def similarities(self, row):
+        """Rounded cosine similarity of the item at `row` to every item"""
+        start, end = self.indptr[row], self.indptr[row + 1]
+        columns, weights = self.indices[start:end], self.data[start:end]
+        starts = self.column_ptr[columns]
+        lengths = self.column_ptr[columns + 1] - starts
+        # Positions of every entry in those columns
+        entries = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        scores = np.bincount(self.column_rows[entries], minlength=self.size,
+                             weights=self.column_data[entries] * np.repeat(weights, lengths))
+        return np.round(scores, SCORE_DECIMALS)
+
+
+def top_neighbours(scores, row, keys, limit=RELATED_LIMIT):
+    """[(key, score)] of the `limit` best scores but the item's own, ties broken by key (`keys` is sorted)"""
+    scores[row] = 0
+    candidates = np.flatnonzero(scores >= MIN_SCORE)
+    if len(candidates) > limit:
+        candidates = candidates[scores[candidates] >= np.partition(scores[candidates], -limit)[-limit]]
+    order = np.lexsort((candidates, -scores[candidates]))[:limit]
+    return [(keys[i], float(scores[i])) for i in candidates[order]]
+
+
+def rank_key(item):
+    key, score = item
+    return -score, key
+
+
+def build_related(kind, full=False):
+    """
+    Bring the stored related lists of `kind` ('posts' or 'therapists') up
+    to date. Only items whose features changed since the last run are
+    compared against everyone; another item's list is recomputed from
+    scratch only when a change pushed out neighbours that cannot be
+    replaced from what is already known. `full` recomputes every list.
+    Returns counts of items, changed and removed items and rewritten lists.
+    """
+    model, load_features, blocks = SOURCES[kind]
+    features = load_features()
+    keys = sorted(features)
+    digests = {str(key): fingerprint(features[key]) for key in keys}
+    stored = dict(RelatedFingerprint.objects.filter(kind=kind).values_list('object_id', 'digest'))
+    changed = [row for row, key in enumerate(keys) if full or stored.get(str(key)) != digests[str(key)]]
+    removed = set(stored) - set(digests)
+    result = {'items': len(keys), 'changed': len(changed), 'removed': len(removed), 'rewritten': 0}
+    if not changed and not removed:
+        return result
+
+    if len(changed) > len(keys) * FULL_REBUILD_SHARE:
+        full = True
+    current = defaultdict(list)
+    for source, target, score in model.objects.order_by('source', 'rank').values_list('source', 'target', 'score'):
+        current[source].append((target, score))
+
+    matrix = SimilarityMatrix([vectorize(features[key], blocks) for key in keys])
+    lists, changed_scores, stale = {}, {}, []
+    for row in (range(len(keys)) if full else changed):
+        scores = matrix.similarities(row)
+        if not full:
+            changed_scores[row] = scores
+        lists[keys[row]] = top_neighbours(scores, row, keys)
+
+    touched = {str(keys[row]) for row in changed} | removed
+    for row, key in enumerate(keys):
+        if key in lists:
+            continue
+        old = current.get(key, [])
+        known = [(target, score) for target, score in old if str(target) not in touched]
+        known += [(keys[other], float(scores[row])) for other, scores in changed_scores.items()
+                  if scores[row] >= MIN_SCORE]
+        new = sorted(known, key=rank_key)[:RELATED_LIMIT]
+        # Items outside the old list scored no better than its last entry;
+        # the new list is exact unless it now reaches below that entry
+        if len(old) < RELATED_LIMIT or (len(new) == RELATED_LIMIT and rank_key(new[-1]) <= rank_key(old[-1])):
+            lists[key] = new
+        else:
+            stale.append(row)
+    for row in stale:
+        lists[keys[row]] = top_neighbours(matrix.similarities(row), row, keys)
+
+    rewrite = {key: new for key, new in lists.items() if new != current.get(key, [])}
+    result['rewritten'] = len(rewrite)
+    with transaction.atomic():
+        obsolete = [*rewrite, *removed]
+        for offset in range(0, len(obsolete), DELETE_BATCH_SIZE):
+            model.objects.filter(source__in=obsolete[offset:offset + DELETE_BATCH_SIZE]).delete()
+        model.objects.bulk_create([
+            model(source_id=key, target_id=target, rank=rank, score=score)
+            for key, new in rewrite.items()
+            for rank, (target, score) in enumerate(new)
+        ], batch_size=1000)
+
+        removed = list(removed)
+        for offset in range(0, len(removed), DELETE_BATCH_SIZE):
+            RelatedFingerprint.objects.filter(kind=kind, object_id__in=removed[offset:offset + DELETE_BATCH_SIZE]).delete()
+        RelatedFingerprint.objects.bulk_create(
+            [RelatedFingerprint(kind=kind, object_id=object_id, digest=digest) for object_id, digest in digests.items()
+             if full or stored.get(object_id) != digest],
+            batch_size=1000, update_conflicts=True, unique_fields=['kind', 'object_id'], update_fields=['digest'],
+        )
+    return result
+
+
+def related_posts(post, limit=RELATED_SHOWN):
+    """Published posts related to `post`, best first, in one indexed query"""
+    links = RelatedPost.objects.filter(
+        source=post, target__status='published', target__published_at__lte=timezone.now(),
+    ).select_related('target__category').defer(*(f'target__{field}' for field in LIST_DEFERRED_FIELDS))
+    return [link.target for link in links[:limit]]
+
+
+def related_therapists(therapist, limit=RELATED_SHOWN):
+    """Active therapists related to `therapist`, best first, in one indexed query"""
+    links = RelatedTherapist.objects.filter(source=therapist, target__is_active=True).select_related('target')
+    return [link.target for link in links[:limit]]
@@ -0,0 +1,217 @@
+import html as html_entities
+import io
+import math
+import os
+import re
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.html import escape, strip_tags
+from django.utils.text import Truncator, slugify
+
+# Bump whenever the HTML produced for the same content changes, then run
+# `manage.py render_posts` to bring stored posts up to date
+RENDERER_VERSION = 2
+
+WORDS_PER_MINUTE = 200
+EXCERPT_WORDS = 40
+# Widths of the downscaled copies offered in an image's srcset
+IMAGE_WIDTHS = (480, 960)
+IMAGE_SIZES = '(max-width: 960px) 100vw, 960px'
+SAFE_URL_SCHEMES = {'', 'http', 'https', 'mailto'}
+
+FENCE_RE = re.compile(r'^```')
+HEADING_RE = re.compile(r'^(#{1,5})\s+(.+?)\s*#*$')
+QUOTE_RE = re.compile(r'^>\s?')
+BULLET_RE = re.compile(r'^[-*+]\s+')
+NUMBERED_RE = re.compile(r'^\d+[.)]\s+')
+# Link targets may contain balanced parentheses, as in .../Autism_(disorder)
+URL_PATTERN = r'(?:[^()\s]|\([^()\s]*\))+'
+INLINE_RE = re.compile(
+    r'`(?P<code>[^`]+)`'
+    rf'|!\[(?P<alt>[^\]]*)\]\((?P<src>{URL_PATTERN})\)'
+    rf'|\[(?P<label>[^\]]+)\]\((?P<href>{URL_PATTERN})\)'
+    r'|\*\*(?P<strong>.+?)\*\*'
+    r'|\*(?P<em>[^*\s][^*]*?)\*'
+)
+
+
+class RenderedPost:
+    """What the renderer stores for a post"""
+    def __init__(self, html, reading_minutes, excerpt):
+        self.html = html
+        self.reading_minutes = reading_minutes
+        self.excerpt = excerpt
+
+
+def safe_url(url):
+    """`url` if it is a link the site can serve (no javascript: and the like), else None"""
+    try:
+        scheme = urlsplit(url).scheme.lower()
+    except ValueError:
+        return None
+    return url if scheme in SAFE_URL_SCHEMES else None
+
+
+def image_variants(src):
+    """
+    (srcset, width, height) for an uploaded image, creating the downscaled
+    copies listed in the srcset on first use. Images outside MEDIA_URL, or
+    that cannot be opened, get (None, None, None).
+    """
+    from PIL import Image
+
+    if not src.startswith(settings.MEDIA_URL):
+        return None, None, None
+    name = src[len(settings.MEDIA_URL):]
+    try:
+        with default_storage.open(name) as source, Image.open(source) as image:
+            width, height = image.size
+            root, ext = os.path.splitext(name)
+            candidates = []
+            for target in IMAGE_WIDTHS:
+                if target >= width:
+                    break
+                variant = f'{root}-{target}w{ext}'
+                if not default_storage.exists(variant):
+                    resized = image.resize((target, round(height * target / width)), Image.LANCZOS)
+                    buffer = io.BytesIO()
+                    resized.save(buffer, format=image.format)
+                    default_storage.save(variant, ContentFile(buffer.getvalue()))
+                candidates.append(f'{settings.MEDIA_URL}{variant} {target}w')
+    except (OSError, ValueError):
+        return None, None, None
+    candidates.append(f'{src} {width}w')
+    return ', '.join(candidates), width, height
+
+
+def render_image(alt, src):
+    src = safe_url(src)
+    if src is None:
+        return escape(alt)
+    srcset, width, height = image_variants(src)
+    attrs = f'src="{escape(src)}" alt="{escape(alt)}" loading="lazy"'
+    if srcset:
+        attrs += f' srcset="{escape(srcset)}" sizes="{IMAGE_SIZES}" width="{width}" height="{height}"'
+    return f'<img {attrs}>'
+
+
+def render_inline(text):
+    """HTML for one line or paragraph of text; everything but the markup is escaped"""
+    parts, position = [], 0
+    for match in INLINE_RE.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        position = match.end()
+        if match['code'] is not None:
+            parts.append(f'<code>{escape(match["code"])}</code>')
+        elif match['src'] is not None:
+            parts.append(render_image(match['alt'], match['src']))
+        elif match['href'] is not None:
+            href = safe_url(match['href'])
+            label = render_inline(match['label'])
+            if href is None:
+                parts.append(label)
+            else:
+                external = ' rel="noopener" target="_blank"' if urlsplit(href).scheme.startswith('http') else ''
+                parts.append(f'<a href="{escape(href)}"{external}>{label}</a>')
+        elif match['strong'] is not None:
+            parts.append(f'<strong>{render_inline(match["strong"])}</strong>')
+        else:
+            parts.append(f'<em>{render_inline(match["em"])}</em>')
+    parts.append(escape(text[position:]))
+    return ''.join(parts)
+
+
+def parse_blocks(content):
+    """
+    Split the post source into (kind, payload) blocks: fenced code, headings,
+    quotes, bulleted and numbered lists and paragraphs
+    """
+    blocks, lines = [], content.replace('\r\n', '\n').split('\n')
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if not line.strip():
+            i += 1
+        elif FENCE_RE.match(line):
+            end = i + 1
+            while end < len(lines) and not FENCE_RE.match(lines[end]):
+                end += 1
+            blocks.append(('code', '\n'.join(lines[i + 1:end])))
+            i = end + 1
+        elif HEADING_RE.match(line):
+            level, text = HEADING_RE.match(line).groups()
+            blocks.append(('heading', (len(level), text)))
+            i += 1
+        else:
+            for kind, pattern in (('quote', QUOTE_RE), ('ul', BULLET_RE), ('ol', NUMBERED_RE), ('p', None)):
+                if pattern is None or pattern.match(line):
+                    break
+            items = []
+            while i < len(lines) and lines[i].strip() and not FENCE_RE.match(lines[i]) \
+                    and not HEADING_RE.match(lines[i]):
+                line = lines[i]
+                if kind in ('ul', 'ol'):
+                    pattern, other = (BULLET_RE, NUMBERED_RE) if kind == 'ul' else (NUMBERED_RE, BULLET_RE)
+                    if pattern.match(line):
+                        items.append(pattern.sub('', line, count=1))
+                    elif other.match(line) or QUOTE_RE.match(line):
+                        break
+                    elif items:
+                        # A wrapped list item continues the previous one
+                        items[-1] += ' ' + line.strip()
+                elif kind == 'quote':
+                    if not QUOTE_RE.match(line):
+                        break
+                    items.append(QUOTE_RE.sub('', line, count=1))
+                else:
+                    if QUOTE_RE.match(line) or BULLET_RE.match(line) or NUMBERED_RE.match(line):
+                        break
+                    items.append(line.strip())
+                i += 1
+            blocks.append((kind, items))
+    return blocks
+
+
+def render_content(content):
+    """
+    Render a post's source to sanitized HTML. The markup is a small subset
+    of Markdown (headings, lists, quotes, code, links, images, bold and
+    italic); all other text, including any HTML the author typed, is
+    escaped. Headings get unique anchor ids, uploaded images a srcset of
+    downscaled copies, and the first paragraph doubles as an excerpt.
+    """
+    html, anchors, first_paragraph = [], set(), ''
+    for kind, payload in parse_blocks(content or ''):
+        if kind == 'code':
+            html.append(f'<pre><code>{escape(payload)}</code></pre>')
+        elif kind == 'heading':
+            # The page title is the only <h1>
+            level, text = payload
+            anchor = base = slugify(text) or 'section'
+            suffix = 2
+            while anchor in anchors:
+                anchor, suffix = f'{base}-{suffix}', suffix + 1
+            anchors.add(anchor)
+            html.append(f'<h{level + 1} id="{anchor}">{render_inline(text)}</h{level + 1}>')
+        elif kind in ('ul', 'ol'):
+            items = ''.join(f'<li>{render_inline(item)}</li>' for item in payload)
+            html.append(f'<{kind}>{items}</{kind}>')
+        elif kind == 'quote':
+            html.append(f'<blockquote><p>{render_inline(" ".join(payload))}</p></blockquote>')
+        else:
+            paragraph = render_inline(' '.join(payload))
+            if not first_paragraph:
+                first_paragraph = paragraph
+            html.append(f'<p>{paragraph}</p>')
+
+    # Counted on the source; parsing the rendered HTML back costs more
+    # than rendering it
+    words = len((content or '').split())
+    return RenderedPost(
+        html='\n'.join(html),
+        reading_minutes=max(1, math.ceil(words / WORDS_PER_MINUTE)),
+        excerpt=Truncator(html_entities.unescape(strip_tags(first_paragraph))).words(EXCERPT_WORDS)[:500],
+    )
@@ -0,0 +1,121 @@
+import random
+from contextlib import ContextDecorator, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+APP_LABEL = 'astha_therapy_center_web'
+# Models the public pages read, served from a replica unless the request is pinned
+REPLICA_MODELS = {
+    f'{APP_LABEL}.{name}' for name in (
+        'therapist', 'blogpost', 'blogpost_tags', 'blogcategory', 'blogtag', 'blogsearchterm',
+        'searchindexversion', 'relatedpost', 'relatedtherapist',
+    )
+}
+# Set for REPLICA_PIN_SECONDS on a visitor whose request wrote to the primary
+REPLICA_PIN_COOKIE = 'dbpin'
+
+
+class RoutingState:
+    """Where the reads of one request (or command) may go"""
+    def __init__(self, pinned=False):
+        # Reads go to the primary: the visitor wrote moments ago
+        self.pinned = pinned
+        # This request wrote to the primary
+        self.wrote = False
+        # Depth of replica_reads blocks
+        self.replica_reads = 0
+        # Depth of background_writes blocks
+        self.background_writes = 0
+        # One replica per request, so its reads agree with each other
+        self.replica = None
+
+
+_state = ContextVar('database_routing')
+
+
+def get_state():
+    state = _state.get(None)
+    if state is None:
+        # Outside a request (management commands, the shell) every read goes
+        # to the primary: maintenance must not mix rows of different ages
+        state = RoutingState(pinned=True)
+        _state.set(state)
+    return state
+
+
+@contextmanager
+def routing_state(pinned=False):
+    """Fresh routing state for the duration of a request"""
+    token = _state.set(RoutingState(pinned))
+    try:
+        yield _state.get()
+    finally:
+        _state.reset(token)
+
+
+class replica_reads(ContextDecorator):
+    """
+    Send every read in the block to a replica, not only those of
+    REPLICA_MODELS; for statistics pages, which tolerate a little lag
+    """
+    def __enter__(self):
+        get_state().replica_reads += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        get_state().replica_reads -= 1
+
+
+class background_writes(ContextDecorator):
+    """
+    Writes in the block are bookkeeping the visitor did not ask for, such
+    as flushing buffered view counts: they do not pin the visitor to the
+    primary
+    """
+    def __enter__(self):
+        get_state().background_writes += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        get_state().background_writes -= 1
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes go to the primary. Reads of REPLICA_MODELS, and every read in a
+    replica_reads block, go to one of settings.DATABASE_REPLICAS, unless
+    the request already wrote or is pinned by ReplicaPinMiddleware: then
+    the visitor reads their own writes from the primary.
+    """
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            return None
+        state = get_state()
+        if state.pinned or state.wrote:
+            return PRIMARY
+        if not state.replica_reads and model._meta.label_lower not in REPLICA_MODELS:
+            return None
+        if state.replica is None:
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        # Session and other framework writes do not pin the visitor
+        if model._meta.app_label == APP_LABEL and not get_state().background_writes:
+            get_state().wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
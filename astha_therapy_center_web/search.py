@@ -0,0 +1,167 @@
+import re
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import Case, Max, Q, Sum, When
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import ContactSearchTerm
+from .normalization import normalize_email, normalize_phone
+
+TOKEN_RE = re.compile(r'\w+')
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+# Matches in the subject or sender outrank matches in the message body
+FIELD_WEIGHTS = {'subject': 3, 'name': 3, 'email': 2, 'message': 1}
+FULLTEXT_COLUMNS = 'name, email, subject, message'
+PHONE_QUERY_RE = re.compile(r'^\+?[\d\s().-]+$')
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+# Shorter digit strings are too unselective to treat as a phone prefix
+MIN_PHONE_DIGITS = 4
+
+
+def tokenize(text):
+    """Lowercased word tokens of `text`, ignoring single characters"""
+    return [token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall((text or '').lower()) if len(token) > 1]
+
+
+def uses_fulltext(using='default'):
+    """MySQL answers searches from its FULLTEXT index instead of the term table"""
+    return connections[using].vendor == 'mysql'
+
+
+def contact_terms(contact):
+    """Weighted term frequencies of a contact across its searchable fields"""
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(getattr(contact, field)):
+            weights[token] += weight
+    return weights
+
+
+def prefix_range(field, prefix):
+    """
+    Values of `field` starting with `prefix`, as a range so every backend can
+    use the B-tree index (LIKE 'x%' is not index-friendly on SQLite)
+    """
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '\U0010ffff'})
+
+
+def appointment_lookup(query):
+    """
+    Filter for the appointment search box. Phone numbers and email addresses
+    are looked up on the normalized, indexed columns (exact for complete
+    values, prefix otherwise); anything else searches the patient name and
+    any part of the email address, so "gmail" still finds gmail senders.
+    """
+    query = query.strip()
+    if '@' in query:
+        email = normalize_email(query)
+        if EMAIL_RE.match(email):
+            return Q(email_normalized=email)
+        return prefix_range('email_normalized', email)
+    if PHONE_QUERY_RE.match(query) and sum(c.isdigit() for c in query) >= MIN_PHONE_DIGITS:
+        return prefix_range('phone_normalized', normalize_phone(query))
+    # The name match scans the table anyway; the email adds no extra pass
+    return Q(name__icontains=query) | Q(email_normalized__contains=normalize_email(query))
+
+
+def index_contacts(contacts, replace=True):
+    """
+    (Re)build the inverted-index rows of `contacts` with one DELETE and one
+    batched INSERT
+    """
+    contacts = list(contacts)
+    if replace:
+        ContactSearchTerm.objects.filter(contact__in=[c.pk for c in contacts]).delete()
+    ContactSearchTerm.objects.bulk_create([
+        ContactSearchTerm(contact_id=contact.pk, term=term, weight=min(weight, 32767))
+        for contact in contacts
+        for term, weight in contact_terms(contact).items()
+    ], batch_size=1000)
+
+
+def search_contacts(queryset, query, limit=50, offset=0):
+    """
+    Contacts from `queryset` matching every word of `query` (each word also
+    matches as a prefix), best matches first, `limit` of them from `offset`
+    on. Each result carries a highlighted `snippet` of its message.
+    """
+    terms = tokenize(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+
+    if uses_fulltext(queryset.db):
+        boolean_query = ' '.join(f'+{term}*' for term in terms)
+        results = list(
+            queryset.annotate(
+                score=RawSQL(f'MATCH ({FULLTEXT_COLUMNS}) AGAINST (%s IN BOOLEAN MODE)', [boolean_query])
+            ).filter(score__gt=0).order_by('-score', '-created_at')[offset:offset + limit]
+        )
+    else:
+        conditions = [prefix_range('term', term) for term in terms]
+        matches = ContactSearchTerm.objects.using(queryset.db).filter(reduce(or_, conditions))
+        if queryset.query.has_filters():
+            matches = matches.filter(contact__in=queryset.values('pk'))
+        matches = (
+            matches.values('contact_id')
+            .annotate(
+                score=Sum('weight'),
+                **{f'matched_{i}': Max(Case(When(condition, then=1), default=0))
+                   for i, condition in enumerate(conditions)},
+            )
+            .filter(**{f'matched_{i}': 1 for i in range(len(conditions))})
+            .order_by('-score', 'contact_id')[offset:offset + limit]
+        )
+        ranked = [row['contact_id'] for row in matches]
+        found = queryset.in_bulk(ranked)
+        results = [found[pk] for pk in ranked if pk in found]
+
+    for contact in results:
+        contact.snippet = highlight(contact.message or contact.subject, terms)
+    return results
+
+
+def matching_contacts(queryset, query):
+    """
+    Unranked, unlimited form of search_contacts(): `queryset` narrowed to
+    the contacts matching every word of `query`, for exports
+    """
+    terms = tokenize(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return queryset.none()
+    if uses_fulltext(queryset.db):
+        boolean_query = ' '.join(f'+{term}*' for term in terms)
+        return queryset.annotate(
+            score=RawSQL(f'MATCH ({FULLTEXT_COLUMNS}) AGAINST (%s IN BOOLEAN MODE)', [boolean_query])
+        ).filter(score__gt=0)
+    for term in terms:
+        queryset = queryset.filter(
+            pk__in=ContactSearchTerm.objects.using(queryset.db).filter(prefix_range('term', term)).values('contact_id')
+        )
+    return queryset
+
+
+def highlight(text, terms, width=160):
+    """
+    HTML-escaped excerpt of `text` around the first match of `terms`, with
+    every matching word wrapped in <mark>
+    """
+    pattern = re.compile(r'\b(?:%s)\w*' % '|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    first = pattern.search(text)
+    start = max(0, first.start() - width // 3) if first else 0
+    excerpt = text[start:start + width]
+
+    parts, position = [], 0
+    for match in pattern.finditer(excerpt):
+        parts.append(escape(excerpt[position:match.start()]))
+        parts.append(f'<mark>{escape(match.group())}</mark>')
+        position = match.end()
+    parts.append(escape(excerpt[position:]))
+    prefix = '&hellip;' if start > 0 else ''
+    suffix = '&hellip;' if start + width < len(text) else ''
+    return mark_safe(prefix + ''.join(parts) + suffix)
@@ -0,0 +1,175 @@
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .analytics import invalidate_skill_summary
+from .backends import invalidate_cached_user
+from .blog import invalidate_taxonomy_counts
+from .blog_search import FIELD_WEIGHTS as BLOG_FIELD_WEIGHTS, bump_version, index_posts
+from .search import FIELD_WEIGHTS, index_contacts, uses_fulltext
+from .models import (
+    Appointment, BlogCategory, BlogPost, BlogTag, ChangeEvent, Contact, CustomUser, DailyRollup, StatusCounter, Therapist,
+)
+
+COUNTED_MODELS = (Appointment, Contact, Therapist)
+ROLLUP_MODELS = (Appointment, Contact)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def drop_cached_user(sender, instance, **kwargs):
+    """Password changes, deactivation and deletion must not be served from cache"""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def drop_cached_user_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_cached_user(user.pk)
+
+
+# =============================================================================
+# STATUS COUNTERS, DAILY ROLLUPS AND THE CHANGE LOG
+# =============================================================================
+
+def remember_tracked_state(sender, instance, **kwargs):
+    """Remember the status (and rollup key) an instance was loaded with"""
+    instance._counter_status = StatusCounter.status_of(instance)
+    if sender in ROLLUP_MODELS:
+        instance._rollup_key = DailyRollup.key_of(instance)
+
+
+def load_tracked_state(sender, instance, **kwargs):
+    """Fetch the stored state when it was deferred at load time but set since"""
+    if instance._state.adding:
+        return
+    missing_status = (
+        instance._counter_status is None and StatusCounter.status_of(instance) is not None
+    )
+    missing_rollup = (
+        sender in ROLLUP_MODELS and instance._rollup_key is None
+        and ('status' in instance.__dict__ or 'service' in instance.__dict__)
+    )
+    if not (missing_status or missing_rollup):
+        return
+    stored = sender._base_manager.using(instance._state.db).filter(pk=instance.pk).first()
+    if stored is not None:
+        instance._counter_status = stored._counter_status
+        if sender in ROLLUP_MODELS:
+            instance._rollup_key = stored._rollup_key
+
+
+def update_tracked_state(sender, instance, created, **kwargs):
+    scope = sender._meta.model_name
+    status = StatusCounter.status_of(instance)
+    if status is not None:
+        previous = None if created else instance._counter_status
+        if status != previous:
+            if previous is not None:
+                StatusCounter.objects.adjust(scope, previous, -1)
+            StatusCounter.objects.adjust(scope, status, 1)
+            if scope in ChangeEvent.SCOPES and (created or previous is not None):
+                kind = ChangeEvent.CREATED if created else ChangeEvent.STATUS
+                ChangeEvent.objects.record(scope, [(instance.pk, kind, status, previous)])
+        instance._counter_status = status
+
+    if sender in ROLLUP_MODELS:
+        previous = None if created else instance._rollup_key
+        key = DailyRollup.key_of(instance, previous)
+        if key is not None and key != previous:
+            if previous is not None:
+                DailyRollup.objects.adjust(previous, -1)
+            DailyRollup.objects.adjust(key, 1)
+        instance._rollup_key = key
+
+
+def release_tracked_state(sender, instance, **kwargs):
+    status = instance._counter_status or StatusCounter.status_of(instance)
+    if status is not None:
+        StatusCounter.objects.adjust(sender._meta.model_name, status, -1)
+    if sender in ROLLUP_MODELS:
+        key = instance._rollup_key or DailyRollup.key_of(instance)
+        if key is not None:
+            DailyRollup.objects.adjust(key, -1)
+
+
+for model in COUNTED_MODELS:
+    post_init.connect(remember_tracked_state, sender=model)
+    pre_save.connect(load_tracked_state, sender=model)
+    post_save.connect(update_tracked_state, sender=model)
+    post_delete.connect(release_tracked_state, sender=model)
+
+
+@receiver(post_save, sender=Therapist)
+@receiver(post_delete, sender=Therapist)
+def drop_skill_summary(sender, instance, **kwargs):
+    # After the commit: a recompute that starts earlier still sees the old rows
+    transaction.on_commit(invalidate_skill_summary)
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+@receiver(post_save, sender=BlogCategory)
+@receiver(post_delete, sender=BlogCategory)
+@receiver(post_save, sender=BlogTag)
+@receiver(post_delete, sender=BlogTag)
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def drop_taxonomy_counts(sender, **kwargs):
+    """View counts are written with update() and do not get here"""
+    transaction.on_commit(invalidate_taxonomy_counts)
+
+
+@receiver(post_save, sender=BlogPost)
+def index_blog_post(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Keep the blog search index in step with publishing and the searchable fields"""
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & {*BLOG_FIELD_WEIGHTS, 'status'}:
+        return
+    index_posts([instance])
+
+
+@receiver(post_delete, sender=BlogPost)
+def unindex_blog_post(sender, instance, **kwargs):
+    # The index rows go with the post; workers still need to reload
+    bump_version()
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def reindex_tagged_posts(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            index_posts([instance])
+    elif action == 'pre_clear':
+        instance._tagged_post_ids = list(instance.posts.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        ids = pk_set if action != 'post_clear' else instance._tagged_post_ids
+        index_posts(BlogPost.objects.filter(pk__in=ids))
+
+
+@receiver(post_save, sender=BlogTag)
+def reindex_tag_posts(sender, instance, created, raw=False, **kwargs):
+    """Renaming or hiding a tag changes what its posts match"""
+    if not (created or raw):
+        index_posts(instance.posts.all())
+
+
+@receiver(pre_delete, sender=BlogTag)
+def remember_tag_posts(sender, instance, **kwargs):
+    instance._tagged_post_ids = list(instance.posts.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=BlogTag)
+def reindex_untagged_posts(sender, instance, **kwargs):
+    index_posts(BlogPost.objects.filter(pk__in=instance._tagged_post_ids))
+
+
+@receiver(post_save, sender=Contact)
+def index_contact(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Keep the portable search index in step with the searchable fields"""
+    if raw or uses_fulltext(instance._state.db):
+        return
+    if update_fields is not None and not set(update_fields) & set(FIELD_WEIGHTS):
+        return
+    index_contacts([instance], replace=not created)
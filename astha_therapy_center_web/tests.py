@@ -1,3 +1,1890 @@
-from django.test import TestCase
+import asyncio
+import json
+import uuid
+import contextvars
+import csv
+import datetime
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, connections
+from django.db.models import Count
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from asgiref.sync import ThreadSensitiveContext, iscoroutinefunction
+import numpy as np
+
+from .analytics import SKILL_FIELDS, compute_skill_summary, invalidate_skill_summary, load_skill_matrix
+from . import blog_search
+from .backends import user_cache_key
+from .blog import compute_taxonomy_counts, get_taxonomy_counts
+from .caching import SharedFileCache, expires_early, hit_ratios
+from .db.pool import ConnectionPool, PooledDatabaseWrapperMixin, PoolTimeout
+from .exports import iter_rows
+from .ids import uuid7
+from .imports import import_csv
+from .live import changes_since
+from .models import (
+    Appointment, ArchivedAppointment, ArchivedContact, ChangeEvent, ConcurrentUpdateError, Contact, ContactSearchTerm,
+    BlogCategory, BlogPost, BlogSearchTerm, BlogTag, DailyRollup, Patient, RelatedPost, StatusCounter, Therapist,
+)
+from .pagination import KeysetPaginator
+from .related import build_related, related_posts, related_therapists
+from .rendering import RENDERER_VERSION, render_content
+from .middleware import ReplicaPinMiddleware
+from .routers import REPLICA_PIN_COOKIE, get_state, replica_reads, routing_state
+from .normalization import normalize_phone
+from .search import appointment_lookup, highlight, search_contacts
+from .viewcounts import ViewCounter, view_counter
+from .views_admin import CONTACT_SEARCH_PAGE_SIZE, AppointmentForm, TherapistForm
+
+User = get_user_model()
+
+
+def setUpModule():
+    """
+    Run the suite against caches of the same kinds as the real ones, in a
+    temporary directory, so it neither clears a checkout's sessions and
+    cached users nor sees cached entries from an earlier run
+    """
+    directory = tempfile.TemporaryDirectory()
+    unittest.addModuleCleanup(directory.cleanup)
+    override = override_settings(CACHES={
+        'default': {**settings.CACHES['default'], 'LOCATION': 'suite-shared'},
+        'suite-shared': {
+            'BACKEND': 'astha_therapy_center_web.caching.SharedFileCache',
+            'LOCATION': os.path.join(directory.name, 'shared'),
+        },
+        'sessions': {
+            'BACKEND': 'astha_therapy_center_web.caching.SharedFileCache',
+            'LOCATION': os.path.join(directory.name, 'sessions'),
+            'TIMEOUT': settings.CACHES['sessions'].get('TIMEOUT', 300),
+        },
+    })
+    override.enable()
+    unittest.addModuleCleanup(override.disable)
+
+
+class StaffLoginMixin:
+    """Logs a test client in as a staff user"""
+    def login_staff(self, client=None):
+        # Users cached by earlier tests may have had this user's id
+        caches['sessions'].clear()
+        self.user = User.objects.create_user('staff@example.com', 'Therapy-Pass-123', is_staff=True)
+        (client or self.client).force_login(self.user)
+        return self.user
+
+
+class AnonymousFastPathTests(TestCase):
+    """
+    Anonymous visitors must not cost any session or database work
+    """
+    static_pages = ['home', 'about', 'service', 'contact', 'appointment',
+                    'faqs', 'testimonials']
+
+    def test_static_public_pages_run_no_queries(self):
+        for url_name in self.static_pages:
+            with self.subTest(url_name=url_name), self.assertNumQueries(0):
+                response = self.client.get(reverse(f'astha_therapy_center_web:{url_name}'))
+                self.assertEqual(response.status_code, 200)
+
+    def test_public_pages_do_not_set_session_cookie(self):
+        response = self.client.get(reverse('astha_therapy_center_web:home'))
+        self.assertNotIn('sessionid', response.cookies)
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+
+    def test_contact_flash_message_uses_cookie_storage(self):
+        response = self.client.post(reverse('astha_therapy_center_web:contact'), {
+            'name': 'Test Patient',
+            'email': 'patient@example.com',
+            'phone': '01681652122',
+            'subject': 'Question',
+            'msg': 'Hello',
+        }, follow=True)
+        self.assertContains(response, 'Your message has been sent successfully!')
+        self.assertEqual(Contact.objects.count(), 1)
+        self.assertFalse(Session.objects.exists())
+
+
+class StaffSessionCacheTests(StaffLoginMixin, TestCase):
+    """
+    Authenticated staff requests are served from the sessions cache, which
+    every worker shares
+    """
+    def setUp(self):
+        self.login_staff()
+        self.dashboard_url = reverse('astha_therapy_center_web:therapy_admin')
+
+    def test_repeat_requests_skip_session_and_user_queries(self):
+        self.client.get(self.dashboard_url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.dashboard_url)
+        self.assertEqual(response.status_code, 200)
+        tables = [Session._meta.db_table, User._meta.db_table]
+        for query in queries:
+            self.assertFalse(any(table in query['sql'] for table in tables), query['sql'])
+
+    def test_logout_invalidates_cached_user(self):
+        self.client.get(self.dashboard_url)
+        self.assertIsNotNone(caches['sessions'].get(user_cache_key(self.user.pk)))
+        self.client.get(reverse('astha_therapy_center_web:logout'))
+        self.assertIsNone(caches['sessions'].get(user_cache_key(self.user.pk)))
+        self.assertEqual(self.client.get(self.dashboard_url).status_code, 302)
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.get(self.dashboard_url)
+        self.user.set_password('Another-Pass-456')
+        self.user.save()
+        self.assertEqual(self.client.get(self.dashboard_url).status_code, 302)
+
+    def test_logout_reaches_other_workers(self):
+        # What another worker process opens: the same files, nothing in memory
+        other_worker = SharedFileCache(settings.CACHES['sessions']['LOCATION'], {})
+        self.client.get(self.dashboard_url)
+        self.assertIsNotNone(other_worker.get(user_cache_key(self.user.pk)))
+        self.client.get(reverse('astha_therapy_center_web:logout'))
+        self.assertIsNone(other_worker.get(user_cache_key(self.user.pk)))
+
+
+def make_appointment(**kwargs):
+    fields = {
+        'name': 'Test Patient',
+        'email': 'patient@example.com',
+        'phone': '01681652122',
+        'service': 'manual_therapy',
+        'appointment_date': '2026-01-15',
+    }
+    fields.update(kwargs)
+    return Appointment.objects.create(**fields)
+
+
+def make_contact(**kwargs):
+    fields = {
+        'name': 'Test Patient',
+        'email': 'patient@example.com',
+        'phone': '01681652122',
+        'subject': 'Question',
+        'message': 'Hello',
+    }
+    fields.update(kwargs)
+    return Contact.objects.create(**fields)
+
+
+def make_therapist(using=None, **kwargs):
+    fields = {
+        'name': 'Dr. Test',
+        'title': 'Physiotherapist',
+        'experience_years': 5,
+        'email': 'dr@example.com',
+        'bio_short': 'Short',
+        'bio_full': 'Full',
+        'profile_image': 'therapist_images/test.jpg',
+    }
+    fields.update(kwargs)
+    return Therapist.objects.db_manager(using).create(**fields)
+
+
+class StatusCounterTests(TestCase):
+    """
+    Status counters follow inserts, status changes and deletes
+    """
+    def counts(self, scope):
+        return StatusCounter.objects.snapshot()[scope]
+
+    def test_save_and_delete_adjust_counters(self):
+        appointment = make_appointment()
+        make_appointment(status='confirmed')
+        self.assertEqual(self.counts('appointment'), {'pending': 1, 'confirmed': 1})
+
+        appointment.status = 'completed'
+        appointment.save()
+        self.assertEqual(self.counts('appointment'), {'pending': 0, 'confirmed': 1, 'completed': 1})
+
+        appointment.delete()
+        self.assertEqual(self.counts('appointment').total(), 1)
+
+    def test_deferred_status_is_looked_up_before_save(self):
+        contact = make_contact()
+        contact = Contact.objects.only('id').get(pk=contact.pk)
+        contact.status = 'replied'
+        contact.save()
+        self.assertEqual(self.counts('contact'), {'new': 0, 'replied': 1})
+
+    def test_set_status_updates_rows_and_counters(self):
+        contacts = [make_contact(), make_contact(), make_contact(status='read')]
+        changed = Contact.objects.filter(pk__in=[c.pk for c in contacts]).set_status('read')
+        self.assertEqual(len(changed), 2)
+        self.assertEqual(self.counts('contact'), {'new': 0, 'read': 3})
+
+    def test_reconcile_fixes_drift(self):
+        make_appointment()
+        Appointment.objects.update(status='cancelled')  # bypasses signals
+        drift = StatusCounter.objects.reconcile()
+        self.assertEqual(sorted(drift), [
+            ('appointment', 'cancelled', 0, 1),
+            ('appointment', 'pending', 1, 0),
+        ])
+        self.assertEqual(StatusCounter.objects.reconcile(), [])
+
+
+class DashboardQueryCountTests(StaffLoginMixin, TestCase):
+    """
+    Dashboards read their statistics from the counters in one query
+    """
+    def setUp(self):
+        self.login_staff()
+        for status in ('pending', 'confirmed', 'completed'):
+            make_appointment(status=status)
+        make_contact()
+        make_therapist()
+
+    def assertRenderQueries(self, url_name, num):
+        url = reverse(f'astha_therapy_center_web:{url_name}')
+        self.client.get(url)  # load the session into the cache tier
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_therapy_admin_runs_one_query(self):
+        response = self.assertRenderQueries('therapy_admin', 1)
+        self.assertEqual(response.context['total_appointments'], 3)
+        self.assertEqual(response.context['total_therapists'], 1)
+
+    def test_admin_dashboard_runs_counter_and_recent_queries(self):
+        # live feed cursor, counters and recent appointments
+        response = self.assertRenderQueries('admin_dashboard', 3)
+        self.assertEqual(response.context['live_cursor'], ChangeEvent.objects.latest_id())
+        self.assertEqual(response.context['confirmed_appointments'], 1)
+        self.assertEqual(response.context['new_contacts'], 1)
+
+
+class DailyRollupTests(StaffLoginMixin, TestCase):
+    """
+    Daily rollups follow the raw tables and serve the statistics pages
+    """
+    def rollups(self, scope):
+        return {
+            (service, status): count
+            for _, service, status, count in DailyRollup.objects.for_range(scope, timezone.localdate(), timezone.localdate())
+        }
+
+    def test_rollups_follow_status_and_service_changes(self):
+        appointment = make_appointment()
+        make_contact()
+        appointment.status = 'confirmed'
+        appointment.service = 'hand_therapy'
+        appointment.save()
+        self.assertEqual(self.rollups('appointment'), {('hand_therapy', 'confirmed'): 1})
+        self.assertEqual(self.rollups('contact'), {('', 'new'): 1})
+
+        Appointment.objects.all().set_status('completed')
+        self.assertEqual(self.rollups('appointment'), {('hand_therapy', 'completed'): 1})
+
+        Appointment.objects.get(pk=appointment.pk).delete()
+        self.assertEqual(self.rollups('appointment'), {})
+
+    def test_backfill_matches_incremental_rollups(self):
+        make_appointment()
+        make_appointment(service='hand_therapy', status='confirmed')
+        make_contact()
+        incremental = (self.rollups('appointment'), self.rollups('contact'))
+        DailyRollup.objects.all().delete()
+        call_command('backfill_rollups', days=1, chunk_size=1, stdout=StringIO())
+        self.assertEqual((self.rollups('appointment'), self.rollups('contact')), incremental)
+
+        # Drifted rows are corrected in place and stale ones removed
+        DailyRollup.objects.filter(scope='appointment').update(count=7)
+        DailyRollup.objects.create(scope='contact', day=timezone.localdate(), status='closed', count=3)
+        kept = set(DailyRollup.objects.filter(scope='appointment').values_list('pk', flat=True))
+        call_command('backfill_rollups', days=1, stdout=StringIO())
+        self.assertEqual((self.rollups('appointment'), self.rollups('contact')), incremental)
+        self.assertEqual(set(DailyRollup.objects.filter(scope='appointment').values_list('pk', flat=True)), kept)
+
+    def test_statistics_views_run_one_query(self):
+        self.login_staff()
+        make_appointment()
+        make_appointment(service='hand_therapy')
+        make_contact()
+        for url_name in ('admin_appointment_statistics', 'admin_contact_statistics'):
+            url = reverse(f'astha_therapy_center_web:{url_name}')
+            self.client.get(url)  # load the session into the cache tier
+            with self.subTest(url_name=url_name), self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('astha_therapy_center_web:admin_appointment_statistics'))
+        self.assertEqual(response.context['total'], 2)
+        self.assertEqual(len(response.context['service_stats']), 2)
+
+        response = self.client.get(
+            reverse('astha_therapy_center_web:admin_appointment_statistics'), {'start': '2000-01-01', 'end': '2000-01-31'}
+        )
+        self.assertEqual(response.context['total'], 0)
+
+
+class TherapistSkillAnalyticsTests(StaffLoginMixin, TestCase):
+    """
+    Skill analytics are computed in one pass and cached until a therapist changes
+    """
+    def setUp(self):
+        invalidate_skill_summary()
+        self.login_staff()
+        self.url = reverse('astha_therapy_center_web:admin_therapist_skills_data')
+
+    def test_summary_matches_reference_statistics(self):
+        rng = np.random.default_rng(7)
+        matrix = rng.integers(0, 101, size=(500, len(SKILL_FIELDS) + 1)).astype(np.uint16)
+        summary = compute_skill_summary(matrix)
+        skills = matrix[:, :len(SKILL_FIELDS)].astype(float)
+        for i, skill in enumerate(summary['skills']):
+            self.assertAlmostEqual(skill['mean'], round(skills[:, i].mean(), 1))
+            self.assertEqual(skill['percentiles']['p50'], np.percentile(skills[:, i], 50, method='inverted_cdf'))
+            self.assertEqual(skill['histogram'], np.histogram(skills[:, i], bins=summary['histogram_bins'])[0].tolist())
+        np.testing.assert_allclose(summary['correlation']['matrix'], np.corrcoef(skills, rowvar=False), atol=1e-3)
+
+    def test_endpoint_is_cached_until_a_therapist_changes(self):
+        therapist = make_therapist(skill_manual_therapy=80)
+        make_therapist(skill_manual_therapy=60, is_active=False)
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            data = self.client.get(self.url).json()
+        self.assertEqual(data['count'], 1)
+        manual = next(skill for skill in data['skills'] if skill['field'] == 'skill_manual_therapy')
+        self.assertEqual(manual['mean'], 80)
+
+        therapist.skill_manual_therapy = 90
+        with self.captureOnCommitCallbacks(execute=True):
+            therapist.save()
+            # Until the commit, other workers would recompute from the old row
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(self.url).json(), data)
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url).json()
+        manual = next(skill for skill in data['skills'] if skill['field'] == 'skill_manual_therapy')
+        self.assertEqual(manual['mean'], 90)
+
+    def test_statistics_page_renders(self):
+        make_therapist()
+        response = self.client.get(reverse('astha_therapy_center_web:admin_therapist_statistics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['active_count'], 1)
+
+
+class KeysetPaginationTests(StaffLoginMixin, TestCase):
+    """
+    Admin lists page with opaque cursors instead of OFFSET and COUNT(*)
+    """
+    def setUp(self):
+        self.appointments = [make_appointment(name=f'Patient {i}', status='confirmed' if i % 2 else 'pending')
+                             for i in range(25)]
+        self.newest_first = [a.pk for a in sorted(self.appointments, key=lambda a: (a.created_at, a.pk), reverse=True)]
+
+    def test_walk_forward_and_back(self):
+        paginator = KeysetPaginator(Appointment.objects.all(), 10)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        third = paginator.get_page(second.next_cursor)
+        self.assertEqual([a.pk for page in (first, second, third) for a in page], self.newest_first)
+        self.assertFalse(first.has_previous())
+        self.assertFalse(third.has_next())
+        self.assertTrue(second.has_next() and second.has_previous())
+        back = paginator.get_page(third.previous_cursor)
+        self.assertEqual([a.pk for a in back], [a.pk for a in second])
+        self.assertEqual([a.pk for a in paginator.get_page(back.previous_cursor)], [a.pk for a in first])
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        page = KeysetPaginator(Appointment.objects.all(), 10).get_page('not-a-cursor')
+        self.assertEqual([a.pk for a in page], self.newest_first[:10])
+
+    def test_list_view_filters_and_queries(self):
+        self.login_staff()
+        url = reverse('astha_therapy_center_web:admin_appointment_list')
+        self.client.get(url)  # load the session into the cache tier
+        with self.assertNumQueries(3):  # live feed cursor + counters + one page
+            response = self.client.get(url, {'status': 'pending'})
+        page = response.context['page_obj']
+        self.assertEqual(page.count, 13)
+        self.assertTrue(all(a.status == 'pending' for a in page))
+        response = self.client.get(url, {'status': 'pending', 'cursor': page.next_cursor})
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+        response = self.client.get(url, {'search': 'Patient 1'})
+        self.assertIsNone(response.context['page_obj'].count)
+        self.assertEqual(len(response.context['page_obj']), 10)  # Patient 1, 10-19
+
+        make_contact()
+        response = self.client.get(reverse('astha_therapy_center_web:admin_contact_list'))
+        self.assertContains(response, 'Contact Messages (1 total)')
+
+
+class ContactSearchTests(StaffLoginMixin, TestCase):
+    """
+    Contact search is ranked, prefix-aware and served from the term index
+    """
+    def setUp(self):
+        self.back = make_contact(subject='Back pain', message='My lower back hurts after running.')
+        self.knee = make_contact(subject='Knee injury', message='Twisted my knee; the back of it is swollen.')
+        self.other = make_contact(subject='Opening hours', message='When are you open on Friday?')
+
+    def search(self, query):
+        return [c.pk for c in search_contacts(Contact.objects.all(), query)]
+
+    def test_ranked_prefix_and_all_terms(self):
+        self.assertEqual(self.search('back'), [self.back.pk, self.knee.pk])  # subject outranks message
+        self.assertEqual(self.search('swoll'), [self.knee.pk])
+        self.assertEqual(self.search('back knee'), [self.knee.pk])
+        self.assertEqual(self.search('back friday'), [])
+        self.assertEqual(self.search('!!'), [])
+
+    def test_partial_email_without_at_sign(self):
+        sender = make_contact(email='Rahim.Uddin@Gmail.com', subject='Question', message='Hello')
+        self.assertEqual(self.search('gmail'), [sender.pk])
+        self.assertEqual(self.search('uddin'), [sender.pk])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.other.message = 'Do you treat shoulder pain?'
+        self.other.save()
+        self.assertEqual(self.search('shoulder'), [self.other.pk])
+        self.assertEqual(self.search('friday'), [])
+        self.other.delete()
+        self.assertFalse(ContactSearchTerm.objects.filter(term='shoulder').exists())
+
+        ContactSearchTerm.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('back'), [self.back.pk, self.knee.pk])
+
+    def test_highlight_escapes_and_marks(self):
+        snippet = highlight('<b>Back</b> & backache', ['back'])
+        self.assertEqual(snippet, '&lt;b&gt;<mark>Back</mark>&lt;/b&gt; &amp; <mark>backache</mark>')
+
+    def test_contact_list_search(self):
+        self.login_staff()
+        url = reverse('astha_therapy_center_web:admin_contact_list')
+        response = self.client.get(url, {'search': 'knee'})
+        self.assertEqual([c.pk for c in response.context['contacts']], [self.knee.pk])
+        self.assertContains(response, '<mark>knee</mark>')
+        response = self.client.get(url, {'search': 'back', 'status': 'closed'})
+        self.assertEqual(len(response.context['contacts']), 0)
+
+        for i in range(CONTACT_SEARCH_PAGE_SIZE + 4):
+            make_contact(subject=f'Knee follow-up {i}')
+        first = self.client.get(url, {'search': 'knee'}).context['contacts']
+        self.assertEqual((len(first), first.has_next(), first.count), (CONTACT_SEARCH_PAGE_SIZE, True, None))
+        second = self.client.get(url, {'search': 'knee', 'cursor': first.next_cursor}).context['contacts']
+        self.assertEqual((len(second), second.has_next(), second.has_previous()), (5, False, True))
+        self.assertFalse({c.pk for c in first} & {c.pk for c in second})
+
+
+class AppointmentLookupTests(TestCase):
+    """
+    Appointment search matches phone numbers and emails however they were typed
+    """
+    def test_normalize_phone(self):
+        for typed in ['+880 16816-52122', '008801681652122', '01681652122', '8801681652122', '1681652122']:
+            self.assertEqual(normalize_phone(typed), '8801681652122')
+        self.assertEqual(normalize_phone('+44 20 7946 0958'), '442079460958')
+        self.assertEqual(normalize_phone(''), '')
+
+    def test_lookup_by_phone_email_and_name(self):
+        appointment = make_appointment(name='Rahim Uddin', email='Rahim@Example.com', phone='+880 16816-52122')
+        karim = make_appointment(name='Karim', email='karim@gmail.com', phone='01711000000')
+
+        def found(query):
+            return list(Appointment.objects.filter(appointment_lookup(query)).values_list('pk', flat=True))
+
+        for query in ['01681652122', '+8801681', '016816', 'rahim@example.COM', 'RAHIM@', 'rahim']:
+            self.assertEqual(found(query), [appointment.pk], query)
+        self.assertEqual(found('52122'), [])  # suffixes are not indexed
+        self.assertEqual(found('Gmail'), [karim.pk])
+
+        appointment.phone = '01999000000'
+        appointment.save(update_fields=['phone'])
+        self.assertEqual(found('01999'), [appointment.pk])
+
+
+class PatientTests(StaffLoginMixin, TestCase):
+    """
+    Bookings and messages are linked to one patient per normalized email or phone
+    """
+    def test_submissions_match_existing_patient(self):
+        appointment = make_appointment(email='Rahim@Example.com', phone='+880 16816-52122')
+        by_phone = make_contact(email='other@example.com', phone='01681652122')
+        by_email = make_appointment(email='rahim@example.com', phone='01711000000')
+        stranger = make_contact(email='karim@example.com', phone='01811000000')
+        self.assertIsNotNone(appointment.patient_id)
+        self.assertEqual(by_phone.patient_id, appointment.patient_id)
+        self.assertEqual(by_email.patient_id, appointment.patient_id)
+        self.assertNotEqual(stranger.patient_id, appointment.patient_id)
+        self.assertEqual(Patient.objects.count(), 2)
+
+    def test_backfill_links_and_merges_duplicates(self):
+        first = make_appointment(email='rahim@example.com', phone='01681652122')
+        second = make_contact(email='karim@example.com', phone='01711000000')
+        # A row from before patients existed, and a message linked to a
+        # duplicate patient that shares a phone number with the first one
+        Appointment.objects.filter(pk=first.pk).update(patient=None)
+        Patient.objects.filter(pk=first.patient_id).delete()
+        duplicate = Patient.objects.create(name='Duplicate', email='other@example.com', phone='+8801681652122')
+        legacy = make_contact(email='other@example.com', phone='01999000000')
+        self.assertEqual(legacy.patient_id, duplicate.pk)
+        # A second patient record for the same email, e.g. from a race
+        twin = Patient.objects.create(name='Twin', email='KARIM@example.com', phone='01811000000')
+        twin_contact = make_contact(email='twin@example.com', phone='01811000000')
+        self.assertEqual(twin_contact.patient_id, twin.pk)
+
+        call_command('backfill_patients', chunk_size=1, stdout=StringIO())
+        self.assertEqual(Patient.objects.count(), 2)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        legacy.refresh_from_db()
+        self.assertEqual(first.patient_id, duplicate.pk)  # the oldest patient is kept
+        self.assertEqual(legacy.patient_id, duplicate.pk)
+        self.assertNotEqual(second.patient_id, duplicate.pk)
+        twin_contact.refresh_from_db()
+        self.assertEqual(twin_contact.patient_id, second.patient_id)
+        self.assertFalse(Patient.objects.filter(pk=twin.pk).exists())
+
+    def test_history_endpoint(self):
+        self.login_staff()
+        appointments = [make_appointment(name=f'Visit {i}') for i in range(3)]
+        contact = make_contact()
+        patient = appointments[0].patient
+        url = reverse('astha_therapy_center_web:admin_patient_history', args=[patient.pk])
+        self.client.get(url)  # load the session into the cache tier
+        with self.assertNumQueries(3):  # patient + appointments + messages
+            data = self.client.get(url).json()
+        self.assertEqual([a['id'] for a in data['appointments']],
+                         [str(a.pk) for a in sorted(appointments, key=lambda a: a.created_at, reverse=True)])
+        self.assertEqual([c['id'] for c in data['contacts']], [str(contact.pk)])
+        response = self.client.get(reverse('astha_therapy_center_web:admin_appointment_detail', args=[appointments[0].pk]))
+        self.assertContains(response, url)
+
+
+class BulkStatusUpdateTests(StaffLoginMixin, TestCase):
+    """
+    The bulk status endpoints change any number of rows in constant queries
+    """
+    def setUp(self):
+        self.login_staff()
+        self.url = reverse('astha_therapy_center_web:admin_appointment_bulk_update_status')
+        self.client.get(reverse('astha_therapy_center_web:therapy_admin'))  # load the session into the cache tier
+
+    def post(self, url, payload):
+        return self.client.post(url, json.dumps(payload), content_type='application/json')
+
+    def test_per_id_results_and_counters(self):
+        pending = [make_appointment() for _ in range(50)]
+        done = make_appointment(status='completed')
+        missing = str(uuid.uuid4())
+        ids = [str(a.pk) for a in pending] + [str(done.pk), missing, 'not-a-uuid']
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self.post(self.url, {'ids': ids, 'status': 'completed'}).json()
+        self.assertLessEqual(len(queries), 12)
+        self.assertEqual(sum(1 for q in queries if q['sql'].startswith('UPDATE "astha_therapy_center_web_appointment"')), 1)
+
+        self.assertTrue(data['success'])
+        self.assertEqual(data['updated'], 50)
+        results = {r['id']: r for r in data['results']}
+        self.assertEqual(results[str(pending[0].pk)], {'id': str(pending[0].pk), 'result': 'updated', 'previous_status': 'pending'})
+        self.assertEqual(results[str(done.pk)]['result'], 'unchanged')
+        self.assertEqual(results[missing]['result'], 'not_found')
+        self.assertEqual(results['not-a-uuid']['result'], 'invalid')
+
+        counts = StatusCounter.objects.snapshot()['appointment']
+        self.assertEqual((counts['pending'], counts['completed']), (0, 51))
+        self.assertEqual(Appointment.objects.filter(status='completed').count(), 51)
+
+    def test_rejects_bad_requests(self):
+        appointment = make_appointment()
+        self.assertEqual(self.post(self.url, {'ids': [str(appointment.pk)], 'status': 'bogus'}).status_code, 400)
+        self.assertEqual(self.post(self.url, {'ids': [], 'status': 'completed'}).status_code, 400)
+        self.assertEqual(self.client.post(self.url, 'nope', content_type='application/json').status_code, 400)
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.status, 'pending')
+
+    def test_repeated_ids_report_once(self):
+        appointment = make_appointment()
+        spellings = [str(appointment.pk), str(appointment.pk).upper(), appointment.pk.hex]
+        data = self.post(self.url, {'ids': spellings + ['nope', 'nope'], 'status': 'confirmed'}).json()
+        self.assertEqual(data['updated'], 1)
+        self.assertEqual(data['results'], [
+            {'id': str(appointment.pk), 'result': 'updated', 'previous_status': 'pending'},
+            {'id': 'nope', 'result': 'invalid'},
+        ])
+
+    def test_contacts(self):
+        contacts = [make_contact() for _ in range(3)]
+        url = reverse('astha_therapy_center_web:admin_contact_bulk_update_status')
+        data = self.post(url, {'ids': [str(c.pk) for c in contacts], 'status': 'closed'}).json()
+        self.assertEqual(data['updated'], 3)
+        self.assertEqual(StatusCounter.objects.snapshot()['contact']['closed'], 3)
+
+
+class OptimisticConcurrencyTests(StaffLoginMixin, TestCase):
+    """
+    Admin writes touch only the changed columns and never overwrite a
+    concurrent change
+    """
+    def setUp(self):
+        self.login_staff()
+        self.client.get(reverse('astha_therapy_center_web:therapy_admin'))  # load the session into the cache tier
+
+    def updates(self, queries, table):
+        return [q['sql'] for q in queries if q['sql'].startswith(f'UPDATE "astha_therapy_center_web_{table}"')]
+
+    def test_stale_instance_is_rejected(self):
+        appointment = make_appointment(notes='Original')
+        mine, theirs = Appointment.objects.get(pk=appointment.pk), Appointment.objects.get(pk=appointment.pk)
+        theirs.notes = 'Theirs'
+        theirs.save()
+        self.assertEqual(theirs.version, 2)
+        mine.notes = 'Mine'
+        with self.assertRaises(ConcurrentUpdateError):
+            mine.save()
+        self.assertEqual(mine.version, 1)
+        appointment.refresh_from_db()
+        self.assertEqual((appointment.notes, appointment.version), ('Theirs', 2))
+
+    def test_status_endpoint_writes_status_only_and_reports_conflicts(self):
+        appointment = make_appointment(notes='x' * 5000)
+        url = reverse('astha_therapy_center_web:admin_appointment_update_status', args=[appointment.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, json.dumps({'status': 'confirmed', 'version': 1}),
+                                        content_type='application/json')
+        self.assertEqual(response.json()['version'], 2)
+        [update] = self.updates(queries, 'appointment')
+        self.assertNotIn('"notes"', update)
+        self.assertIn('"version" = 1', update.split('WHERE')[1])
+
+        response = self.client.post(url, json.dumps({'status': 'completed', 'version': 1}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(response.json()['conflict'])
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.status, 'confirmed')
+        self.assertEqual(StatusCounter.objects.snapshot()['appointment']['confirmed'], 1)
+
+    def test_edit_form_saves_changed_fields_and_detects_conflicts(self):
+        contact = make_contact(message='m' * 5000)
+        url = reverse('astha_therapy_center_web:admin_contact_edit', args=[contact.pk])
+        form = {'name': contact.name, 'email': contact.email, 'phone': contact.phone,
+                'subject': 'Changed', 'message': contact.message, 'status': contact.status, 'version': 1}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, form)
+        self.assertEqual(response.status_code, 302)
+        [update] = self.updates(queries, 'contact')
+        self.assertIn('"subject"', update)
+        self.assertNotIn('"message"', update)
+
+        response = self.client.post(url, dict(form, subject='Stale edit'))
+        self.assertEqual(response.status_code, 409)
+        self.assertContains(response, 'changed by someone else', status_code=409)
+        contact.refresh_from_db()
+        self.assertEqual((contact.subject, contact.version), ('Changed', 2))
+
+    def test_viewing_a_message_marks_it_read_narrowly(self):
+        contact = make_contact(message='m' * 5000)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('astha_therapy_center_web:admin_contact_detail', args=[contact.pk]))
+        [update] = self.updates(queries, 'contact')
+        self.assertNotIn('"message"', update)
+        contact.refresh_from_db()
+        self.assertEqual((contact.status, contact.version), ('read', 2))
+
+    def test_therapist_toggle_and_bulk_updates_bump_versions(self):
+        therapist = make_therapist()
+        url = reverse('astha_therapy_center_web:admin_therapist_update_status', args=[therapist.pk])
+        response = self.client.post(url, json.dumps({'status': 'inactive', 'version': 1}), content_type='application/json')
+        self.assertEqual(response.json()['version'], 2)
+        response = self.client.post(url, json.dumps({'status': 'active', 'version': 1}), content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+
+        appointment = make_appointment()
+        Appointment.objects.filter(pk=appointment.pk).set_status('completed')
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.version, 2)
+
+
+class ExportTests(StaffLoginMixin, TestCase):
+    """
+    Exports stream every matching row in bounded keyset chunks
+    """
+    def setUp(self):
+        self.login_staff()
+        self.url = reverse('astha_therapy_center_web:admin_appointment_export')
+
+    def download(self, url, params):
+        response = self.client.get(url, params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_iter_rows_walks_every_row_in_chunks(self):
+        appointments = [make_appointment(name=f'Patient {i}') for i in range(7)]
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(iter_rows(Appointment.objects.all(), ['id', 'name'], chunk_size=3))
+        self.assertEqual(len(queries), 3)
+        self.assertTrue(all('LIMIT 3' in q['sql'] for q in queries))
+        newest_first = sorted(appointments, key=lambda a: (a.created_at, a.pk), reverse=True)
+        self.assertEqual([row[0] for row in rows], [a.pk for a in newest_first])
+
+    def test_csv_export_applies_list_filters(self):
+        make_appointment(name='Rahim', status='confirmed', notes='Line one\nline "two"')
+        make_appointment(name='Karim', status='pending')
+        response, body = self.download(self.url, {'status': 'confirmed'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="appointments-', response['Content-Disposition'])
+        rows = list(csv.reader(StringIO(body.decode('utf-8-sig'))))
+        self.assertEqual(rows[0][:2], ['ID', 'Name'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], 'Rahim')
+        self.assertEqual(rows[1][6], 'Confirmed')
+        self.assertEqual(rows[1][7], 'Line one\nline "two"')
+
+        tomorrow = (timezone.localdate() + timezone.timedelta(days=1)).isoformat()
+        _, body = self.download(self.url, {'start': tomorrow})
+        self.assertEqual(len(list(csv.reader(StringIO(body.decode('utf-8-sig'))))), 1)
+        self.assertEqual(self.client.get(self.url, {'format': 'pdf'}).status_code, 400)
+
+    def test_xlsx_and_contact_exports(self):
+        make_appointment(name='Rahim & <Sons>')
+        _, body = self.download(self.url, {'format': 'xlsx'})
+        with zipfile.ZipFile(BytesIO(body)) as workbook:
+            self.assertIn('xl/workbook.xml', workbook.namelist())
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertIn('Rahim &amp; &lt;Sons&gt;', sheet)
+        self.assertEqual(sheet.count('<row>'), 2)
+
+        make_appointment(name='Bell\x07 \x1b[0m', notes='=HYPERLINK("http://example.com")')
+        _, body = self.download(self.url, {'format': 'xlsx'})
+        with zipfile.ZipFile(BytesIO(body)) as workbook:
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        ElementTree.fromstring(sheet)
+        self.assertIn('Bell [0m', sheet)
+        _, body = self.download(self.url, {'format': 'csv'})
+        rows = list(csv.reader(StringIO(body.decode('utf-8-sig'))))
+        self.assertEqual(rows[1][7], '\'=HYPERLINK("http://example.com")')
+
+        make_contact(subject='Knee pain')
+        make_contact(subject='Opening hours')
+        _, body = self.download(reverse('astha_therapy_center_web:admin_contact_export'), {'search': 'knee'})
+        rows = list(csv.reader(StringIO(body.decode('utf-8-sig'))))
+        self.assertEqual([row[4] for row in rows[1:]], ['Knee pain'])
+
+
+APPOINTMENT_CSV_HEADER = 'name,email,phone,service,appointment_date,status,notes\n'
+
+
+def appointment_csv(rows):
+    return StringIO(APPOINTMENT_CSV_HEADER + ''.join(
+        f'Patient {i},patient{i}@example.com,01{i:09d},manual_therapy,2026-03-01,pending,\n'
+        for i in rows
+    ))
+
+
+class BulkImportTests(StaffLoginMixin, TestCase):
+    """
+    Imports validate with the admin forms and insert in batches
+    """
+    def test_valid_rows_are_inserted_and_invalid_rows_reported(self):
+        source = StringIO(
+            APPOINTMENT_CSV_HEADER
+            + 'Rahim,rahim@example.com,+8801711-000000,manual_therapy,2026-03-01,confirmed,First visit\n'
+            + 'Karim,not-an-email,01711000001,manual_therapy,2026-03-01,pending,\n'
+            + 'Salma,salma@example.com,01711000002,astrology,2026-03-01,pending,\n'
+        )
+        rejects = StringIO()
+        result = import_csv(source, AppointmentForm, rejects=rejects)
+        self.assertEqual((result.total, result.created, result.rejected), (3, 1, 2))
+
+        appointment = Appointment.objects.get()
+        self.assertEqual(appointment.phone_normalized, '8801711000000')
+        self.assertEqual(appointment.patient.email, 'rahim@example.com')
+        self.assertEqual(StatusCounter.objects.get(scope='appointment', status='confirmed').count, 1)
+        self.assertEqual(DailyRollup.objects.get(scope='appointment').count, 1)
+
+        report = list(csv.reader(StringIO(rejects.getvalue())))
+        self.assertEqual(report[0][:3], ['line', 'errors', 'name'])
+        self.assertEqual([row[0] for row in report[1:]], ['3', '4'])
+        self.assertIn('email:', report[1][1])
+        self.assertIn('service:', report[2][1])
+        self.assertEqual(report[2][2], 'Salma')
+
+    def test_queries_grow_per_batch_not_per_row(self):
+        import_csv(appointment_csv(range(3)), AppointmentForm)  # creates the counter rows
+        with CaptureQueriesContext(connection) as small:
+            import_csv(appointment_csv(range(3, 6)), AppointmentForm, batch_size=50)
+        with CaptureQueriesContext(connection) as large:
+            import_csv(appointment_csv(range(100, 140)), AppointmentForm, batch_size=50)
+        self.assertEqual(Appointment.objects.count(), 46)
+        self.assertEqual(len(large), len(small))
+        with CaptureQueriesContext(connection) as batched:
+            import_csv(appointment_csv(range(200, 240)), AppointmentForm, batch_size=20)
+        self.assertEqual(len(batched), 2 * len(small))
+
+    def test_therapist_import_takes_image_paths(self):
+        header = 'name,title,experience_years,email,bio_short,bio_full,profile_image,is_active,display_order'
+        skills = ''.join(f',{field}' for field, _ in SKILL_FIELDS)
+        source = StringIO(
+            header + skills + '\n'
+            + 'Dr. Rahman,Physiotherapist,5,rahman@example.com,Short,Full,therapist_images/rahman.jpg,true,1'
+            + ',80' * len(SKILL_FIELDS) + '\n'
+            + 'Dr. Khan,Physiotherapist,5,khan@example.com,Short,Full,,false,2' + ',120' * len(SKILL_FIELDS) + '\n'
+        )
+        result = import_csv(source, TherapistForm)
+        self.assertEqual((result.created, result.rejected), (1, 1))
+        source = StringIO(
+            header + skills + '\n'
+            + 'Dr. Khan,Physiotherapist,5,khan@example.com,Short,Full,,true,2' + ',80' * len(SKILL_FIELDS) + '\n'
+        )
+        rejects = StringIO()
+        self.assertEqual(import_csv(source, TherapistForm, rejects=rejects).rejected, 1)
+        self.assertIn('profile_image:', rejects.getvalue())
+        therapist = Therapist.objects.get()
+        self.assertEqual(therapist.profile_image.name, 'therapist_images/rahman.jpg')
+        self.assertEqual(StatusCounter.objects.get(scope='therapist', status='active').count, 1)
+
+    def test_created_at_column_is_kept(self):
+        source = StringIO(
+            APPOINTMENT_CSV_HEADER.replace('\n', ',created_at\n')
+            + 'Rahim,rahim@example.com,01711000000,manual_therapy,2025-01-10,completed,,2025-01-05 09:30\n'
+            + 'Karim,karim@example.com,01711000001,manual_therapy,2026-03-01,pending,,\n'
+        )
+        self.assertEqual(import_csv(source, AppointmentForm).created, 2)
+        old = Appointment.objects.get(name='Rahim')
+        self.assertEqual(timezone.localtime(old.created_at).strftime('%Y-%m-%d %H:%M'), '2025-01-05 09:30')
+        self.assertEqual(Appointment.objects.get(name='Karim').created_at.date(), timezone.now().date())
+        self.assertEqual(DailyRollup.objects.get(status='completed').day, datetime.date(2025, 1, 5))
+
+    def test_database_errors_reject_the_batch(self):
+        bulk_create = Appointment.objects.bulk_create
+        calls = []
+
+        def fail_second_batch(instances, **kwargs):
+            calls.append(len(instances))
+            if len(calls) == 2:
+                raise IntegrityError('simulated')
+            return bulk_create(instances, **kwargs)
+
+        rejects = StringIO()
+        with mock.patch.object(Appointment.objects, 'bulk_create', fail_second_batch):
+            result = import_csv(appointment_csv(range(5)), AppointmentForm, batch_size=2, rejects=rejects)
+        self.assertEqual((result.created, result.rejected), (3, 2))
+        self.assertEqual(Appointment.objects.count(), 3)
+        self.assertEqual(StatusCounter.objects.get(scope='appointment', status='pending').count, 3)
+        report = list(csv.reader(StringIO(rejects.getvalue())))
+        self.assertEqual([row[0] for row in report[1:]], ['4', '5'])
+        self.assertIn('simulated', report[1][1])
+
+    def test_upload_view_and_command(self):
+        self.login_staff()
+        url = reverse('astha_therapy_center_web:admin_bulk_import')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        upload = BytesIO(('\ufeff' + appointment_csv(range(2)).getvalue() + 'Bad,,,,,,\n').encode('utf-8'))
+        upload.name = 'appointments.csv'
+        response = self.client.post(url, {'kind': 'appointments', 'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].created, 2)
+        self.assertEqual([reject['line'] for reject in response.context['rejects']], ['4'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'appointments.csv')
+            with open(path, 'w', newline='') as source:
+                source.write(appointment_csv(range(10, 15)).getvalue() + 'Bad,,,,,,\n')
+            out = StringIO()
+            call_command('bulk_import', 'appointments', path, '--batch-size', '2', stdout=out)
+            self.assertIn('imported 5 of 6 rows', out.getvalue())
+            with open(path + '.rejects.csv', newline='') as rejects:
+                self.assertEqual(len(list(csv.reader(rejects))), 2)
+        self.assertEqual(Appointment.objects.count(), 7)
+
+
+class LiveFeedTests(StaffLoginMixin, TestCase):
+    """
+    The change log records inserts and status changes; the feed sends only
+    what happened after the client's cursor
+    """
+    def setUp(self):
+        self.login_staff()
+        self.url = reverse('astha_therapy_center_web:admin_live_changes')
+
+    def test_inserts_and_status_changes_are_logged(self):
+        appointment = make_appointment()
+        contact = make_contact()
+        appointment.status = 'confirmed'
+        appointment.save()
+        appointment.notes = 'No status change'
+        appointment.save()
+        Contact.objects.filter(pk=contact.pk).set_status('read')
+        make_therapist()
+        self.assertEqual(
+            list(ChangeEvent.objects.values_list('scope', 'object_id', 'kind', 'status', 'previous_status')),
+            [
+                ('appointment', appointment.pk, 'created', 'pending', ''),
+                ('contact', contact.pk, 'created', 'new', ''),
+                ('appointment', appointment.pk, 'status', 'confirmed', 'pending'),
+                ('contact', contact.pk, 'status', 'read', 'new'),
+            ],
+        )
+
+    def test_feed_returns_deltas_after_cursor(self):
+        make_appointment(name='Before')
+        cursor = self.client.get(self.url).json()['cursor']
+        self.assertEqual(cursor, ChangeEvent.objects.latest_id())
+
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url, {'after': cursor}).json()
+        self.assertEqual((data['cursor'], data['events'], data['counters']), (cursor, [], None))
+
+        appointment = make_appointment(name='Rahim')
+        Appointment.objects.filter(pk=appointment.pk).set_status('confirmed')
+        data = self.client.get(self.url, {'after': cursor, 'wait': '1'}).json()
+        self.assertEqual([(e['kind'], e['object']['name']) for e in data['events']],
+                         [('created', 'Rahim'), ('status', 'Rahim')])
+        self.assertEqual(data['events'][1]['object']['status'], 'confirmed')
+        self.assertEqual(data['counters']['appointment'], {'pending': 1, 'confirmed': 1})
+        self.assertEqual(data['cursor'], ChangeEvent.objects.latest_id())
+        self.assertEqual(self.client.get(self.url, {'after': data['cursor']}).json()['events'], [])
+
+    def test_events_behind_a_gap_wait_until_it_settles(self):
+        cursor = ChangeEvent.objects.latest_id()
+        for name in ('First', 'Uncommitted', 'Third'):
+            make_appointment(name=name)
+        first, missing, third = ChangeEvent.objects.filter(id__gt=cursor)
+        missing.delete()  # as if its transaction had not committed yet
+        data = changes_since(cursor)
+        self.assertEqual([event['id'] for event in data['events']], [first.id])
+        self.assertEqual(changes_since(first.id)['cursor'], first.id)
+
+        ChangeEvent.objects.filter(pk=third.pk).update(created_at=timezone.now() - timezone.timedelta(minutes=1))
+        self.assertEqual([event['id'] for event in changes_since(first.id)['events']], [third.id])
+
+    def test_wsgi_requests_are_not_held(self):
+        response = self.client.get(reverse('astha_therapy_center_web:admin_dashboard'))
+        self.assertFalse(response.context['live_long_poll'])
+        cursor = response.context['live_cursor']
+        data = self.client.get(self.url, {'after': cursor, 'wait': '1'}).json()
+        self.assertEqual((data['cursor'], data['events']), (cursor, []))
+
+    def test_waiting_requests_share_one_poller(self):
+        from .live import ChangeFeed
+
+        async def scenario():
+            feed = ChangeFeed(interval=0.01)
+            polls = 0
+
+            def counted():
+                nonlocal polls
+                polls += 1
+                return 7 if polls > 2 else 5
+            with mock.patch('astha_therapy_center_web.live.read_latest_id', counted):
+                results = await asyncio.gather(*[feed.wait(5, timeout=1) for _ in range(20)])
+                await asyncio.sleep(0.05)  # the poller stops once nobody waits
+            return results, polls, feed.task
+
+        results, polls, task = asyncio.run(scenario())
+        self.assertEqual(results, [7] * 20)
+        self.assertLessEqual(polls, 4)
+        self.assertIsNone(task)
+
+    def test_feed_requires_login_and_prune(self):
+        make_appointment()
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+        ChangeEvent.objects.update(created_at=timezone.now() - timezone.timedelta(days=30))
+        make_appointment()
+        out = StringIO()
+        call_command('prune_change_log', '--days', '7', stdout=out)
+        self.assertIn('Deleted 1 change events', out.getvalue())
+        self.assertEqual(ChangeEvent.objects.count(), 1)
+
+
+class ConcurrentLongPollTests(StaffLoginMixin, TransactionTestCase):
+    """
+    Long-polls held by one event loop each return as soon as their own
+    events arrive, whichever request started the shared poller
+    """
+    def setUp(self):
+        self.login_staff(self.async_client)
+        self.url = reverse('astha_therapy_center_web:admin_live_changes')
+
+    def test_waiters_return_at_different_times(self):
+        latest = 0
+
+        def fake_changes(cursor):
+            # The change log, without reads racing writes on other threads
+            events = [{'id': i} for i in range(cursor + 1, latest + 1)]
+            return {'cursor': latest if events else cursor, 'events': events, 'counters': None}
+
+        async def request(after):
+            # Like an ASGI server: one thread-sensitive context per request
+            async with ThreadSensitiveContext():
+                response = await self.async_client.get(self.url, {'after': after, 'wait': '1'})
+            return [event['id'] for event in response.json()['events']]
+
+        async def scenario():
+            nonlocal latest
+            loop = asyncio.get_running_loop()
+            first, second = asyncio.create_task(request(0)), asyncio.create_task(request(1))
+            await asyncio.sleep(0.5)
+            latest = 1
+            self.assertEqual(await first, [1])
+            # The request that started the poller is gone; the other still hears
+            started = loop.time()
+            latest = 2
+            self.assertEqual(await second, [2])
+            return loop.time() - started
+
+        with mock.patch('astha_therapy_center_web.views_admin.FEED_TIMEOUT', 8), \
+                mock.patch('astha_therapy_center_web.views_admin.changes_since', fake_changes), \
+                mock.patch('astha_therapy_center_web.live.read_latest_id', lambda: latest):
+            # A loop of its own, as under an ASGI server, not the test's
+            self.assertLess(asyncio.run(scenario()), 4)
+
+
+class ListProjectionTests(StaffLoginMixin, TestCase):
+    """
+    List pages load only the columns they render, through the composite
+    indexes for their filters
+    """
+    def setUp(self):
+        self.login_staff()
+
+    def assertUsesIndex(self, queryset, index_name):
+        self.assertIn(index_name, queryset.explain())
+
+    def test_lists_skip_long_text_columns(self):
+        make_appointment(notes='Long clinical notes')
+        make_contact(message='Long message body')
+        make_therapist()
+        for url_name, column in [
+            ('admin_appointment_list', '"notes"'),
+            ('admin_contact_list', '"message"'),
+            ('admin_therapist_list', '"bio_full"'),
+        ]:
+            url = reverse(f'astha_therapy_center_web:{url_name}')
+            self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(any(column in query['sql'] for query in queries), url_name)
+
+        # Detail pages still load the full row
+        appointment = Appointment.objects.get()
+        response = self.client.get(reverse('astha_therapy_center_web:admin_appointment_detail', args=[appointment.pk]))
+        self.assertContains(response, 'Long clinical notes')
+
+    def test_date_and_service_filters(self):
+        make_appointment(name='Rahim', appointment_date='2026-03-01', service='manual_therapy')
+        make_appointment(name='Karim', appointment_date='2026-03-01', service='chronic_pain')
+        make_appointment(name='Salma', appointment_date='2026-03-02', service='manual_therapy')
+        url = reverse('astha_therapy_center_web:admin_appointment_list')
+        response = self.client.get(url, {'date': '2026-03-01', 'service': 'manual_therapy'})
+        self.assertEqual([a.name for a in response.context['page_obj']], ['Rahim'])
+        self.assertIsNone(response.context['page_obj'].count)
+        response = self.client.get(url, {'date': 'not-a-date'})
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_query_plans_use_composite_indexes(self):
+        for i in range(20):
+            make_appointment(status=('pending', 'confirmed')[i % 2])
+            make_contact()
+        page = Appointment.objects.filter(status='pending').order_by('-created_at', '-id')[:11]
+        self.assertUsesIndex(page, 'appointment_status_created_idx')
+        self.assertUsesIndex(Contact.objects.filter(status='new').order_by('-created_at', '-id')[:11],
+                             'contact_status_created_idx')
+        self.assertUsesIndex(Appointment.objects.filter(appointment_date='2026-03-01', service='manual_therapy'),
+                             'appointment_date_service_idx')
+        # Index-only: the per-service counts of a day never touch the table
+        day = (Appointment.objects.filter(appointment_date='2026-03-01')
+               .values('service').annotate(total=Count('service')).order_by())
+        plan = day.explain()
+        self.assertIn('appointment_date_service_idx', plan)
+        if connection.vendor == 'sqlite':
+            self.assertIn('COVERING INDEX', plan)
+
+
+class ArchiveTests(StaffLoginMixin, TestCase):
+    """
+    Closed rows past the retention age move to the archive tables in
+    chunks, stay counted, and can be searched and restored on demand
+    """
+    def setUp(self):
+        self.login_staff()
+        self.old = timezone.now() - timezone.timedelta(days=400)
+
+    def age(self, *instances):
+        for instance in instances:
+            type(instance)._base_manager.filter(pk=instance.pk).update(created_at=self.old)
+
+    def test_archives_old_closed_rows_in_chunks(self):
+        closed = [make_appointment(name=f'Closed {i}', status='completed') for i in range(5)]
+        open_old = make_appointment(name='Still pending', status='pending')
+        recent = make_appointment(name='Recent', status='cancelled')
+        contact = make_contact(subject='Knee pain')
+        contact.status = 'closed'
+        contact.save()
+        self.age(*closed, open_old, contact)
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('archive_rows', '--chunk-size', '2', stdout=out)
+        self.assertIn('appointment: archived 5 closed rows', out.getvalue())
+        self.assertIn('contact: archived 1 closed rows', out.getvalue())
+        self.assertIn('appointment completed: 4 rows archived', out.getvalue())
+        # Five appointments in chunks of two: three transactions, no per-row writes
+        self.assertEqual(sum('archivedappointment' in q['sql'] and q['sql'].startswith('INSERT')
+                             for q in queries.captured_queries), 3)
+
+        self.assertEqual(set(Appointment.objects.values_list('name', flat=True)), {'Still pending', 'Recent'})
+        archived = ArchivedAppointment.objects.get(pk=closed[0].pk)
+        self.assertEqual((archived.name, archived.created_at), ('Closed 0', self.old))
+        self.assertEqual(archived.patient_id, closed[0].patient_id)
+        self.assertFalse(ContactSearchTerm.objects.filter(contact=contact.pk).exists())
+
+        # Dashboards still count archived rows; the lists count the hot table
+        self.assertEqual(StatusCounter.objects.snapshot()['appointment']['completed'], 5)
+        response = self.client.get(reverse('astha_therapy_center_web:admin_appointment_list'))
+        self.assertEqual(response.context['page_obj'].count, 2)
+        self.assertEqual(DailyRollup.objects.summarize('appointment', self.old.date(), timezone.localdate())['total'], 7)
+
+    def test_archive_search_and_restore(self):
+        appointment = make_appointment(name='Rahim', phone='01711000000', status='completed')
+        contact = make_contact(subject='Shoulder exercises', status='replied')
+        self.age(appointment, contact)
+        call_command('archive_rows', stdout=StringIO())
+
+        url = reverse('astha_therapy_center_web:admin_archive_list')
+        response = self.client.get(url, {'search': '+880 1711'})
+        self.assertEqual([row.pk for row in response.context['page_obj']], [appointment.pk])
+        response = self.client.get(url, {'kind': 'contacts', 'search': 'shoulder'})
+        self.assertEqual([row.pk for row in response.context['page_obj']], [contact.pk])
+        self.assertEqual(len(self.client.get(url, {'kind': 'contacts'}).context['page_obj']), 1)
+
+        restore = reverse('astha_therapy_center_web:admin_archive_restore', args=['contacts', contact.pk])
+        response = self.client.post(restore)
+        self.assertRedirects(response, reverse('astha_therapy_center_web:admin_contact_detail', args=[contact.pk]))
+        restored = Contact.objects.get(pk=contact.pk)
+        self.assertEqual((restored.subject, restored.created_at), ('Shoulder exercises', self.old))
+        self.assertFalse(ArchivedContact.objects.exists())
+        self.assertEqual([c.pk for c in search_contacts(Contact.objects.all(), 'shoulder')], [contact.pk])
+        self.assertEqual(StatusCounter.objects.snapshot()['archived_contact']['replied'], 0)
+        self.assertEqual(self.client.post(restore).status_code, 302)
+
+    def test_maintenance_commands_keep_counting_archived_rows(self):
+        for i in range(3):
+            make_appointment(name=f'Closed {i}', status='completed')
+        make_contact(status='closed')
+        call_command('archive_rows', '--days', '0', stdout=StringIO())
+        self.assertEqual(ArchivedAppointment.objects.count(), 3)
+        counters = StatusCounter.objects.snapshot()
+        rollups = sorted(DailyRollup.objects.values_list('scope', 'day', 'service', 'status', 'count'))
+
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('in sync', out.getvalue())
+        call_command('backfill_rollups', '--since', '2020-01-01', stdout=StringIO())
+        self.assertEqual(StatusCounter.objects.snapshot(), counters)
+        self.assertEqual(counters['archived_appointment']['completed'], 3)
+        self.assertEqual(sorted(DailyRollup.objects.values_list('scope', 'day', 'service', 'status', 'count')), rollups)
+        self.assertEqual(DailyRollup.objects.summarize('appointment', timezone.localdate(), timezone.localdate())['total'], 3)
+
+
+class TimeOrderedKeyTests(TestCase):
+    """
+    New rows get version 7 UUIDs, which sort by creation time, and the
+    compact key column round-trips the same ids the URLs use
+    """
+    def test_uuid7_layout_and_order(self):
+        before = timezone.now().timestamp() * 1000
+        ids = [uuid7() for _ in range(5000)]
+        self.assertEqual({(value.version, value.variant) for value in ids}, {(7, uuid.RFC_4122)})
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertGreaterEqual(ids[0].int >> 80, int(before))
+        self.assertEqual(sorted(str(value) for value in ids), [str(value) for value in ids])
+
+    def test_mysql_stores_sixteen_bytes(self):
+        field = Appointment._meta.pk
+        mysql = SimpleNamespace(vendor='mysql', features=SimpleNamespace(has_native_uuid_field=False))
+        value = uuid7()
+        self.assertEqual(field.db_type(mysql), 'binary(16)')
+        self.assertEqual(field.get_db_prep_value(str(value), mysql), value.bytes)
+        self.assertEqual(field.from_db_value(value.bytes, None, mysql), value)
+        self.assertEqual(field.from_db_value(value.hex, None, connection), value)
+
+    def test_keys_and_urls(self):
+        first = make_appointment(name='First')
+        second = make_appointment(name='Second')
+        self.assertEqual(first.pk.version, 7)
+        self.assertLess(first.pk, second.pk)
+        self.assertEqual(list(Appointment.objects.order_by('id').values_list('name', flat=True)), ['First', 'Second'])
+        self.assertEqual(ChangeEvent.objects.filter(object_id=second.pk).get().kind, ChangeEvent.CREATED)
+
+        # Rows keyed before the switch keep their random UUIDs and URLs
+        legacy = make_therapist(id=uuid.uuid4())
+        response = self.client.get(reverse('astha_therapy_center_web:therapist_single', args=[legacy.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['therapist'].pk, legacy.pk)
+
+
+class BlogTests(TestCase):
+    """
+    The blog is served from the blog tables, and page views are buffered
+    and written in one batched UPDATE instead of one per view
+    """
+    def setUp(self):
+        view_counter.discard()
+        self.post = BlogPost.objects.create(title='Knee pain', slug='knee-pain', content='Rest.', status='published')
+        self.other = BlogPost.objects.create(title='Back pain', slug='back-pain', content='Move.', status='published')
+        self.draft = BlogPost.objects.create(title='Draft', slug='draft', content='Soon.')
+
+    def tearDown(self):
+        view_counter.discard()
+
+    def test_list_and_detail(self):
+        self.post.tags.add(BlogTag.objects.create(name='Knees', slug='knees'))
+        response = self.client.get(reverse('astha_therapy_center_web:blogs'))
+        self.assertEqual({post.slug for post in response.context['page_obj']}, {'knee-pain', 'back-pain'})
+
+        response = self.client.get(self.post.get_absolute_url())
+        self.assertContains(response, 'Knee pain')
+        self.assertContains(response, 'Knees')
+        self.assertEqual(self.client.get(self.draft.get_absolute_url()).status_code, 404)
+        self.assertRedirects(self.client.get(reverse('astha_therapy_center_web:blog')),
+                             reverse('astha_therapy_center_web:blogs'), status_code=301)
+        self.assertContains(self.client.get(reverse('astha_therapy_center_web:sitemap')), '/blog/knee-pain/')
+
+    def test_views_are_flushed_in_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            for post in (self.post, self.post, self.other):
+                self.client.get(post.get_absolute_url())
+        self.assertFalse(any(q['sql'].startswith('UPDATE') for q in queries.captured_queries))
+        self.assertEqual(view_counter.unflushed(self.post.pk), 2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(view_counter.flush(), 2)
+        counts = dict(BlogPost.objects.values_list('slug', 'view_count'))
+        self.assertEqual(counts, {'knee-pain': 2, 'back-pain': 1, 'draft': 0})
+
+        # Editing a post loaded before the flush keeps the flushed views
+        self.draft.status = 'published'
+        self.draft.save()
+        stale = BlogPost.objects.get(pk=self.post.pk)
+        BlogPost.objects.add_views({self.post.pk: 5})
+        stale.title = 'Knee pain, revisited'
+        stale.save()
+        self.assertEqual(BlogPost.objects.get(pk=self.post.pk).view_count, 7)
+        self.assertIsNotNone(BlogPost.objects.get(pk=self.draft.pk).published_at)
+
+    def test_flushes_when_enough_views_are_waiting(self):
+        counter = ViewCounter(interval=3600, max_pending=3)
+        counter.hit(self.post.pk)
+        counter.hit(self.other.pk)
+        self.assertEqual(BlogPost.objects.get(pk=self.post.pk).view_count, 0)
+        counter.hit(self.post.pk)
+        self.assertEqual(counter.unflushed(self.post.pk), 0)
+        self.assertEqual(BlogPost.objects.get(pk=self.post.pk).view_count, 2)
+
+
+class BlogRenderingTests(TestCase):
+    """
+    Post HTML is rendered and sanitized once, when the post is saved, and
+    re-rendered in bulk when the renderer changes
+    """
+    def test_renders_sanitized_html(self):
+        rendered = render_content(
+            '# Knee pain\n'
+            'Rest **well** and see [us](/contact/) <script>alert(1)</script>\n'
+            '[bad](javascript:alert) now. See [autism](https://en.wikipedia.org/wiki/Autism_(disorder)).\n\n'
+            '# Knee pain\n'
+            '- ice\n- rest\n\n'
+            + 'word ' * 450
+        )
+        self.assertIn('<h2 id="knee-pain">Knee pain</h2>', rendered.html)
+        self.assertIn('<h2 id="knee-pain-2">', rendered.html)
+        self.assertIn('<strong>well</strong>', rendered.html)
+        self.assertIn('<a href="/contact/">us</a>', rendered.html)
+        self.assertIn('href="https://en.wikipedia.org/wiki/Autism_(disorder)"', rendered.html)
+        self.assertIn('>autism</a>.</p>', rendered.html)
+        self.assertIn('&lt;script&gt;', rendered.html)
+        self.assertNotIn('javascript', rendered.html)
+        self.assertIn('<ul><li>ice</li><li>rest</li></ul>', rendered.html)
+        self.assertEqual(rendered.reading_minutes, 3)
+        self.assertTrue(rendered.excerpt.startswith('Rest well and see us <script>'))
+
+    def test_uploaded_images_get_a_srcset(self):
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            os.makedirs(os.path.join(media_root, 'blog_images'))
+            Image.new('RGB', (1200, 600)).save(os.path.join(media_root, 'blog_images', 'knee.jpg'))
+            html = render_content('![Knee](/media/blog_images/knee.jpg)').html
+            self.assertIn('srcset="/media/blog_images/knee-480w.jpg 480w, /media/blog_images/knee-960w.jpg 960w, '
+                          '/media/blog_images/knee.jpg 1200w"', html)
+            self.assertIn('width="1200" height="600"', html)
+            with Image.open(os.path.join(media_root, 'blog_images', 'knee-480w.jpg')) as variant:
+                self.assertEqual(variant.size, (480, 240))
+
+    def test_save_stores_html_and_command_rerenders(self):
+        post = BlogPost.objects.create(title='Neck', slug='neck', content='## Posture\nSit *tall*.', status='published')
+        self.assertEqual(post.excerpt, 'Sit tall.')
+        stored = BlogPost.objects.get(pk=post.pk)
+        self.assertEqual(stored.content_html, '<h3 id="posture">Posture</h3>\n<p>Sit <em>tall</em>.</p>')
+        self.assertEqual(stored.render_version, RENDERER_VERSION)
+        self.assertContains(self.client.get(post.get_absolute_url()), '<em>tall</em>')
+
+        BlogPost.objects.update(content_html='', render_version=0, view_count=9)
+        out = StringIO()
+        call_command('render_posts', '--workers', '2', stdout=out)
+        self.assertIn('Rendered 1 posts', out.getvalue())
+        stored = BlogPost.objects.get(pk=post.pk)
+        self.assertIn('<em>tall</em>', stored.content_html)
+        self.assertEqual((stored.render_version, stored.view_count), (RENDERER_VERSION, 9))
+        call_command('render_posts', stdout=out)
+        self.assertIn('All posts are rendered', out.getvalue())
+
+    def test_command_reindexes_generated_excerpts(self):
+        post = BlogPost.objects.create(title='Neck', slug='neck', content='Sit tall.', status='published')
+        # A content change made without save() leaves the stored excerpt stale
+        BlogPost.objects.filter(pk=post.pk).update(content='Stretch daily.', render_version=0)
+        call_command('render_posts', '--workers', '1', stdout=StringIO())
+        self.assertEqual(BlogPost.objects.get(pk=post.pk).excerpt, 'Stretch daily.')
+        terms = set(BlogSearchTerm.objects.filter(post=post).values_list('term', flat=True))
+        self.assertIn('stretch', terms)
+        self.assertNotIn('sit', terms)
+
+    def test_generated_excerpt_follows_the_content(self):
+        post = BlogPost.objects.create(title='Neck', slug='neck', content='Sit tall.')
+        post.content = 'Stand tall.'
+        post.save()
+        self.assertEqual(BlogPost.objects.get(pk=post.pk).excerpt, 'Stand tall.')
+
+        post.excerpt = 'Posture tips from our therapists.'
+        post.save()
+        post.content = 'Walk tall.'
+        post.save()
+        self.assertEqual(BlogPost.objects.get(pk=post.pk).excerpt, 'Posture tips from our therapists.')
+
+
+class BlogListingTests(TestCase):
+    """
+    Blog listings cost a fixed number of queries however many posts,
+    categories and tags they show, and page by publication time
+    """
+    def setUp(self):
+        caches['default'].clear()
+        self.knee = BlogCategory.objects.create(name='Knee', slug='knee')
+        self.back = BlogCategory.objects.create(name='Back', slug='back')
+        self.tags = [BlogTag.objects.create(name=f'Tag {i}', slug=f'tag-{i}') for i in range(3)]
+
+    def make_posts(self, count, start=0):
+        now = timezone.now()
+        for i in range(start, start + count):
+            post = BlogPost.objects.create(
+                title=f'Post {i}', slug=f'post-{i}', content='Text', status='published',
+                category=self.knee if i % 2 else self.back, published_at=now - timezone.timedelta(hours=i),
+            )
+            post.tags.add(*self.tags)
+
+    def assert_listing_queries(self, url, expected):
+        self.client.get(url)  # fill the taxonomy cache
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_listing_urls_run_fixed_queries(self):
+        urls = [
+            (reverse('astha_therapy_center_web:blogs'), 2),
+            (reverse('astha_therapy_center_web:blog_category', args=['knee']), 3),
+            (reverse('astha_therapy_center_web:blog_tag', args=['tag-1']), 3),
+        ]
+        for posts in (3, 12):
+            self.make_posts(posts - BlogPost.objects.count(), start=BlogPost.objects.count())
+            for url, expected in urls:
+                with self.subTest(url=url, posts=posts):
+                    response = self.assert_listing_queries(url, expected)
+                    self.assertContains(response, 'Tag 2')
+        first_page = self.client.get(reverse('astha_therapy_center_web:blogs')).context['page_obj']
+        self.assertTrue(first_page.has_next())
+        self.assert_listing_queries(reverse('astha_therapy_center_web:blogs') + '?cursor=' + first_page.next_cursor, 2)
+        self.assertEqual(self.client.get(reverse('astha_therapy_center_web:blog_tag', args=['nope'])).status_code, 404)
+
+    def test_pages_follow_publication_time(self):
+        self.make_posts(12)
+        # Created last, published first: listed by publication time, not creation
+        BlogPost.objects.filter(slug='post-0').update(published_at=timezone.now() - timezone.timedelta(days=30))
+        url = reverse('astha_therapy_center_web:blogs')
+        first = self.client.get(url).context['page_obj']
+        self.assertEqual([post.slug for post in first], [f'post-{i}' for i in range(1, 10)])
+        second = self.client.get(url, {'cursor': first.next_cursor}).context['page_obj']
+        self.assertEqual([post.slug for post in second], ['post-10', 'post-11', 'post-0'])
+        self.assertFalse(second.has_next())
+
+    def test_taxonomy_counts_are_cached_and_invalidated(self):
+        self.make_posts(3)
+        BlogPost.objects.create(title='Draft', slug='draft', content='Text', category=self.knee)
+        counts = get_taxonomy_counts()
+        self.assertEqual(counts['categories'], [{'name': 'Back', 'slug': 'back', 'count': 2},
+                                                {'name': 'Knee', 'slug': 'knee', 'count': 1}])
+        with self.assertNumQueries(0):
+            get_taxonomy_counts()
+
+        # Buffered view counts are not edits and keep the cache
+        BlogPost.objects.add_views({BlogPost.objects.get(slug='post-0').pk: 3})
+        with self.assertNumQueries(0):
+            get_taxonomy_counts()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BlogPost.objects.get(slug='post-0').tags.remove(self.tags[0])
+            with self.assertNumQueries(0):
+                get_taxonomy_counts()  # kept until the commit
+        self.assertEqual(get_taxonomy_counts()['tags'][0], {'name': 'Tag 0', 'slug': 'tag-0', 'count': 2})
+        self.tags[0].is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tags[0].save()
+        self.assertEqual([tag['slug'] for tag in get_taxonomy_counts()['tags']], ['tag-1', 'tag-2'])
+
+
+class BlogSearchTests(TestCase):
+    """
+    Blog search ranks published posts with BM25 over an in-memory copy of
+    the inverted index, which workers reload when its version moves
+    """
+    def setUp(self):
+        blog_search._index = None
+        caches['default'].clear()
+        self.frozen = BlogPost.objects.create(
+            title='Frozen shoulder', slug='frozen-shoulder', status='published',
+            content='Frozen shoulder stiffens the joint. Gentle shoulder exercises help.',
+        )
+        self.knee = BlogPost.objects.create(
+            title='Knee pain', slug='knee-pain', status='published',
+            content='Knee pain after running. Stretch the calf and the hip, not the shoulder.',
+        )
+        self.autism = BlogPost.objects.create(title='Early support', slug='early-support', status='published',
+                                              content='Play based therapy for young children.')
+        self.autism.tags.add(BlogTag.objects.create(name='Autism', slug='autism'))
+        BlogPost.objects.create(title='Frozen shoulder draft', slug='draft', content='Frozen shoulder')
+
+    def search(self, query):
+        return [post.slug for post in blog_search.search_posts(query)]
+
+    def test_ranks_published_posts(self):
+        self.assertEqual(self.search('frozen shoulder'), ['frozen-shoulder', 'knee-pain'])
+        self.assertEqual(self.search('autism'), ['early-support'])
+        self.assertEqual(self.search('shoulders'), [])
+        self.assertEqual(self.search('should'), ['frozen-shoulder', 'knee-pain'])
+        self.assertEqual(self.search('sciatica'), [])
+
+    def test_non_ascii_terms_stay_distinct_and_searchable(self):
+        post = BlogPost.objects.create(title='Résumé and resume', slug='accents', status='published',
+                                       content='Straße, strasse, Zürich and zurich; боль в спине.')
+        self.assertEqual(BlogSearchTerm.objects.filter(post=post, term__in=['résumé', 'resume', 'straße', 'strasse'])
+                         .count(), 4)
+        index = blog_search.get_index()
+        self.assertEqual(index.terms, sorted(index.terms))
+        for query in ('résumé', 'straße', 'zürich', 'zurich', 'боль', 'спин'):
+            self.assertEqual(self.search(query), ['accents'], query)
+
+    def test_bm25_prefers_frequent_terms_in_short_documents(self):
+        index = blog_search.BlogSearchIndex(1, [
+            ('back', 1, 3), ('back', 2, 1), ('back', 3, 1),
+            ('pain', 1, 1), ('pain', 2, 1), ('pain', 3, 1), ('pain', 4, 1),
+            ('sciatica', 3, 40),
+        ])
+        self.assertEqual([post for post, _ in index.search('back pain')], [1, 2, 3, 4])
+
+    def test_updates_incrementally_and_reloads_on_version_change(self):
+        index = blog_search.get_index()
+        with self.assertNumQueries(0):
+            self.assertIs(blog_search.get_index(), index)
+
+        self.knee.status = 'draft'
+        self.knee.save()
+        post = BlogPost.objects.create(title='Shoulder surgery recovery', slug='surgery', content='Rehab plan.')
+        # Not reloaded until the version is checked, but unpublished posts never reach the page
+        self.assertEqual([pk for pk, _ in blog_search.get_index().search('shoulder')], [self.frozen.pk, self.knee.pk])
+        self.assertEqual(self.search('shoulder'), ['frozen-shoulder'])
+        blog_search.get_index(check_interval=0)
+        self.assertEqual([pk for pk, _ in blog_search.get_index().search('shoulder')], [self.frozen.pk])
+
+        post.status = 'published'
+        post.save()
+        tag = BlogTag.objects.get(slug='autism')
+        tag.name = 'Autism spectrum'
+        tag.save()
+        self.assertIsNot(blog_search.get_index(check_interval=0), index)
+        self.assertEqual(self.search('shoulder'), ['frozen-shoulder', 'surgery'])
+        self.assertEqual(self.search('spectrum'), ['early-support'])
+        tag.delete()
+        blog_search.get_index(check_interval=0)
+        self.assertEqual(self.search('autism'), [])
+
+    def test_search_page_queries(self):
+        url = reverse('astha_therapy_center_web:blog_search')
+        self.client.get(url, {'q': 'shoulder'})
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'q': 'frozen shoulder'})
+        self.assertEqual([post.slug for post in response.context['page_obj']], ['frozen-shoulder', 'knee-pain'])
+        self.assertContains(self.client.get(url, {'q': 'sciatica'}), 'No articles match')
+
+
+class RelatedItemsTests(TestCase):
+    """
+    Related posts and therapists are precomputed offline; incremental runs
+    only recompute what changed and end up where a full rebuild would
+    """
+    def make_post(self, slug, tags, category=None, content='', status='published'):
+        post = BlogPost.objects.create(title=slug.replace('-', ' '), slug=slug, status=status,
+                                       category=category, content=content)
+        post.tags.set(tags)
+        return post
+
+    def snapshot(self):
+        return list(RelatedPost.objects.values_list('source', 'rank', 'target', 'score'))
+
+    def test_related_posts(self):
+        physio = BlogCategory.objects.create(name='Physiotherapy', slug='physiotherapy')
+        shoulder = BlogTag.objects.create(name='Shoulder', slug='shoulder')
+        pain = BlogTag.objects.create(name='Pain', slug='pain')
+        autism = BlogTag.objects.create(name='Autism', slug='autism')
+        frozen = self.make_post('frozen-shoulder', [shoulder, pain], physio, 'Stiff shoulder joint exercises')
+        rotator = self.make_post('rotator-cuff', [shoulder, pain], physio, 'Shoulder joint strength exercises')
+        self.make_post('play-therapy', [autism], content='Play based support for children')
+        self.make_post('shoulder-draft', [shoulder, pain], physio, 'Shoulder joint', status='draft')
+
+        self.assertEqual(build_related('posts'), {'items': 3, 'changed': 3, 'removed': 0, 'rewritten': 2})
+        self.assertEqual(related_posts(frozen), [rotator])
+        url = reverse('astha_therapy_center_web:blog_single', args=['frozen-shoulder'])
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertContains(response, 'related articles')
+        self.assertContains(response, rotator.get_absolute_url())
+
+        with self.assertNumQueries(3):
+            self.assertEqual(build_related('posts')['changed'], 0)
+        rotator.status = 'draft'
+        rotator.save()
+        self.assertEqual(related_posts(frozen), [])  # hidden before the job runs
+        self.assertEqual(build_related('posts'), {'items': 2, 'changed': 0, 'removed': 1, 'rewritten': 1})
+        self.assertFalse(RelatedPost.objects.exists())
+
+    def test_incremental_runs_match_full_rebuild(self):
+        generator = random.Random(7)
+        categories = [BlogCategory.objects.create(name=f'Category {i}', slug=f'category-{i}') for i in range(3)]
+        tags = [BlogTag.objects.create(name=f'Tag {i}', slug=f'tag-{i}') for i in range(8)]
+        words = [f'word{i}' for i in range(30)]
+
+        def make(slug):
+            return self.make_post(slug, generator.sample(tags, generator.randint(1, 3)), generator.choice(categories),
+                                  ' '.join(generator.choices(words, k=12)))
+
+        posts = [make(f'post-{i}') for i in range(40)]
+        build_related('posts')
+        for post in posts[:3]:
+            post.tags.set(generator.sample(tags, 2))
+        for post in posts[3:5]:
+            post.status = 'draft'
+            post.save()
+        posts[5].delete()
+        posts[6].content = ' '.join(generator.choices(words, k=12))
+        posts[6].save()
+        make('post-new-1'), make('post-new-2')
+
+        result = build_related('posts')
+        self.assertEqual((result['changed'], result['removed']), (6, 3))
+        incremental = self.snapshot()
+        self.assertEqual(build_related('posts', full=True)['rewritten'], 0)
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_related_therapists(self):
+        skills = {'skill_manual_therapy': 90, 'skill_exercise_prescription': 80, 'skill_patient_diagnosis': 60}
+        physio = make_therapist(name='Dr. A', title='Senior Physiotherapist', bio_full='Sports injuries and back pain',
+                                **skills)
+        other = make_therapist(name='Dr. B', title='Physiotherapist', bio_full='Back pain and posture', **skills)
+        make_therapist(name='Dr. C', title='Speech Therapist', bio_full='Language delay in children',
+                       skill_interpersonal=95)
+        make_therapist(name='Dr. D', title='Physiotherapist', bio_full='Back pain', is_active=False, **skills)
+
+        call_command('build_related', kind='therapists', stdout=StringIO())
+        self.assertEqual(related_therapists(physio)[0], other)
+        response = self.client.get(reverse('astha_therapy_center_web:therapist_single', args=[physio.pk]))
+        self.assertContains(response, 'related therapists')
+        self.assertContains(response, other.get_absolute_url())
+
+
+class ConnectionPoolTests(TestCase):
+    """
+    Pooled database connections are reused across requests, checked,
+    recycled and bounded
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'pool.sqlite3')
+
+    def connect(self):
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def test_pool_reuses_and_bounds_connections(self):
+        pool = ConnectionPool(self.connect, max_size=1, timeout=0.05)
+        self.addCleanup(pool.close)
+        first, reused = pool.get()
+        self.assertFalse(reused)
+        with self.assertRaises(PoolTimeout):
+            pool.get()
+        pool.put(first)
+        self.assertEqual(pool.get(), (first, True))
+        pool.put(first, rollback=True)
+        self.assertEqual(pool.size, 1)
+
+    def test_pool_drops_broken_and_old_connections(self):
+        def check(connection):
+            raise sqlite3.OperationalError('gone away')
+
+        pool = ConnectionPool(self.connect, check=check, min_size=1, check_idle=0)
+        self.addCleanup(pool.close)
+        self.assertEqual(pool.size, 1)
+        connection, reused = pool.get()  # the warm connection fails its check
+        self.assertFalse(reused)
+        pool.put(connection, check=True)
+        self.assertEqual(pool.size, 0)
+
+        pool = ConnectionPool(self.connect, recycle=0)
+        self.addCleanup(pool.close)
+        connection, _ = pool.get()
+        pool.put(connection)
+        self.assertEqual((pool.size, len(pool.idle)), (0, 0))
+
+    def test_backend_hands_connections_back_per_request(self):
+        settings_dict = {
+            'ENGINE': 'astha_therapy_center_web.db.sqlite3', 'NAME': self.path, 'CONN_MAX_AGE': 0,
+            'OPTIONS': {'pool': {'max_size': 2}},
+        }
+        handler = ConnectionHandler({DEFAULT_DB_ALIAS: settings_dict, 'pooled': settings_dict})
+        self.addCleanup(PooledDatabaseWrapperMixin.close_pool, 'pooled')
+        db = handler['pooled']
+        with db.cursor() as cursor:
+            cursor.execute('CREATE TABLE visit (id integer)')
+        raw = db.connection
+        db.close_if_unusable_or_obsolete()  # end of the request
+        self.assertIsNone(db.connection)
+        self.assertEqual(db.pool.size, 1)
+
+        # A transaction left open is rolled back before the next request
+        db.set_autocommit(False)
+        self.assertIs(db.connection, raw)
+        with db.cursor() as cursor:
+            cursor.execute('INSERT INTO visit VALUES (1)')
+        db.close()
+        with db.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM visit')
+            self.assertEqual(cursor.fetchone(), (0,))
+        self.assertIs(db.connection, raw)
+        db.close()
+
+        persistent = ConnectionHandler({DEFAULT_DB_ALIAS: {**settings_dict, 'CONN_MAX_AGE': 60}})
+        with self.assertRaises(ImproperlyConfigured):
+            persistent[DEFAULT_DB_ALIAS].cursor()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(TestCase):
+    """
+    Therapist and blog reads go to a replica (here a second SQLite file)
+    until the visitor writes; from then on they read their own writes
+    """
+    # Resolved when the class is set up, after the replica alias is added
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.settings['replica'] = {
+            **connections.settings[DEFAULT_DB_ALIAS], 'NAME': os.path.join(cls.directory.name, 'replica.sqlite3'),
+        }
+        with connections['replica'].schema_editor() as editor:
+            editor.create_model(Therapist)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.directory.cleanup()
+
+    def setUp(self):
+        with routing_state():
+            make_therapist(using='replica', name='Dr. Replica')
+        self.enterContext(routing_state())
+
+    def names(self):
+        return list(Therapist.objects.values_list('name', flat=True))
+
+    def test_reads_follow_writes_to_the_primary(self):
+        self.assertEqual(self.names(), ['Dr. Replica'])
+        self.assertEqual(Appointment.objects.all().db, DEFAULT_DB_ALIAS)
+        with replica_reads():
+            self.assertEqual(Appointment.objects.all().db, 'replica')
+
+        make_therapist(name='Dr. Primary')
+        self.assertEqual(self.names(), ['Dr. Primary'])
+        with replica_reads():
+            self.assertEqual(Appointment.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_visitor_who_wrote_is_pinned_for_a_while(self):
+        url = reverse('astha_therapy_center_web:therapist')
+        self.assertContains(self.client.get(url), 'dr. replica')
+        response = self.client.post(reverse('astha_therapy_center_web:contact'), {
+            'name': 'Test Patient', 'email': 'patient@example.com', 'phone': '01681652122',
+            'subject': 'Question', 'msg': 'Hello',
+        })
+        self.assertEqual(response.cookies[REPLICA_PIN_COOKIE]['max-age'], 5)
+        self.assertNotContains(self.client.get(url), 'dr. replica')
+
+        self.client.cookies.pop(REPLICA_PIN_COOKIE)
+        self.assertContains(self.client.get(url), 'dr. replica')
+
+    def test_middleware_serves_async_stacks_natively(self):
+        async def view(request):
+            get_state().wrote = True
+            return HttpResponse()
+
+        middleware = ReplicaPinMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = asyncio.run(middleware(RequestFactory().get('/')))
+        self.assertEqual(response.cookies[REPLICA_PIN_COOKIE]['max-age'], 5)
+
+    def test_view_count_flushes_do_not_pin_readers(self):
+        view_counter.discard()
+        self.addCleanup(view_counter.discard)
+        post = BlogPost.objects.create(title='Neck', slug='neck', content='Sit tall.', status='published')
+        # The primary doubles as the replica here: only the pinning is tested
+        with self.settings(DATABASE_REPLICAS=[DEFAULT_DB_ALIAS]), mock.patch.object(view_counter, 'max_pending', 1):
+            response = self.client.get(post.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+        self.assertEqual(BlogPost.objects.get(pk=post.pk).view_count, 1)
+
+    def test_cached_recomputes_and_commands_read_the_primary(self):
+        self.assertEqual(len(load_skill_matrix()), 0)
+        self.assertEqual(compute_taxonomy_counts(), {'categories': [], 'tags': []})
+        # A command runs outside any request's routing state
+        self.assertEqual(contextvars.Context().run(self.names), [])
+
+
+class TieredCacheTests(TestCase):
+    """
+    The default cache serves from process memory in front of a shared tier,
+    recomputes each key once at a time, refreshes costly entries early and
+    counts hits per key prefix
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(CACHES={
+            'default': {
+                'BACKEND': 'astha_therapy_center_web.caching.TieredCache',
+                'LOCATION': 'test-shared',
+                'OPTIONS': {'MAX_ENTRIES': 2, 'LOCAL_TIMEOUT': 60},
+            },
+            'test-shared': {
+                'BACKEND': 'astha_therapy_center_web.caching.SharedFileCache',
+                'LOCATION': directory.name,
+            },
+            'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        }))
+        self.cache = caches['default']
+        self.cache.clear()
+        self.cache.stats.reset(self.cache.shared)
+
+    def test_tiers_and_hit_ratios(self):
+        self.cache.set('blog:a', [1])
+        self.cache.get('blog:a').append(2)  # callers get copies
+        self.assertEqual(self.cache.get('blog:a'), [1])
+        self.cache.shared.set('blog:b', ('shared', None, 0))
+        self.assertEqual(self.cache.get('blog:b'), 'shared')
+        self.cache.set('other', 3)  # evicts blog:a, the least recently used
+        self.assertEqual(len(self.cache.local.entries), 2)
+        self.assertEqual(self.cache.get('blog:a'), [1])
+        self.assertIsNone(self.cache.get('blog:missing'))
+
+        self.cache.delete('other')
+        self.assertIsNone(self.cache.get('other'))
+        self.assertFalse(self.cache.add('blog:b', 'again'))
+        self.assertTrue(self.cache.shared.add('lock:x', 1))
+        self.assertFalse(self.cache.shared.add('lock:x', 2))
+
+        ratios = hit_ratios()
+        self.assertEqual({key: ratios['blog'][key] for key in ('local', 'shared', 'miss')},
+                         {'local': 2, 'shared': 2, 'miss': 1})
+        self.assertEqual(ratios['blog']['hit_ratio'], 0.8)
+        self.assertEqual(ratios['-']['miss'], 1)
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(caches['default'].get_or_compute('page:x', compute)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(hit_ratios()['page']['waited'], 3)
+
+    def test_delete_during_a_recompute_discards_its_result(self):
+        def compute():
+            self.cache.delete('blog:x')  # an invalidation lands meanwhile
+            return 'outdated'
+
+        self.assertEqual(self.cache.get_or_compute('blog:x', compute), 'outdated')
+        self.assertIsNone(self.cache.get('blog:x'))
+        self.assertEqual(self.cache.get_or_compute('blog:x', lambda: 'current'), 'current')
+        self.assertEqual(self.cache.get('blog:x'), 'current')
+
+    def test_costly_entries_are_refreshed_early_by_one_caller(self):
+        self.assertFalse(expires_early(time.time() + 300, 0))
+        self.assertFalse(expires_early(None, 10))
+        self.assertTrue(expires_early(time.time() - 1, 0.1))
+
+        # Took "forever" to compute: due for an early refresh at once
+        self.cache.write('analytics:x', 'old', 300, None, delta=1e9)
+        token = self.cache.lock('analytics:x', None)
+        self.assertEqual(self.cache.get_or_compute('analytics:x', lambda: 'new'), 'old')
+        self.cache.unlock('analytics:x', None, token)
+        self.assertEqual(self.cache.get_or_compute('analytics:x', lambda: 'new'), 'new')
+        self.assertEqual(self.cache.get('analytics:x'), 'new')
+        self.assertEqual(hit_ratios()['analytics']['early'], 1)
@@ -13,7 +13,11 @@ urlpatterns = [
     path('contact/', views.contact, name='contact'),
     path('appointment/', views.appointment, name='appointment'),
     path('blogs/', views.blogs, name='blogs'),
+    path('blogs/search/', views.blog_search, name='blog_search'),
+    path('blogs/category/<slug:slug>/', views.blog_category, name='blog_category'),
+    path('blogs/tag/<slug:slug>/', views.blog_tag, name='blog_tag'),
     path('blog/', views.blog, name='blog'),
+    path('blog/<slug:slug>/', views.blog_single, name='blog_single'),
     path('faqs/', views.faqs, name='faqs'),
     path('testimonials/', views.testimonials, name='testimonials'),
     path('therapist/<uuid:therapist_id>/', views.therapist_single, name='therapist_single'),
@@ -31,15 +35,25 @@ urlpatterns = [
     
     # Admin URLs
     path('therapy_admin/', views.therapy_admin, name='therapy_admin'),
+    path('therapy_admin/overview/', views_admin.admin_dashboard, name='admin_dashboard'),
+    path('therapy_admin/changes/', views_admin.live_changes, name='admin_live_changes'),
     # Appointment Admin URLs
     path('therapy_admin/appointments/', views_admin.appointment_list, name='admin_appointment_list'),
+    path('therapy_admin/appointments/statistics/', views_admin.appointment_statistics, name='admin_appointment_statistics'),
+    path('therapy_admin/appointments/bulk-update-status/', views_admin.appointment_bulk_update_status, name='admin_appointment_bulk_update_status'),
+    path('therapy_admin/appointments/export/', views_admin.appointment_export, name='admin_appointment_export'),
     path('therapy_admin/appointments/create/', views_admin.appointment_create, name='admin_appointment_create'),
     path('therapy_admin/appointments/<uuid:appointment_id>/', views_admin.appointment_detail, name='admin_appointment_detail'),
     path('therapy_admin/appointments/<uuid:appointment_id>/edit/', views_admin.appointment_edit, name='admin_appointment_edit'),
     path('therapy_admin/appointments/<uuid:appointment_id>/delete/', views_admin.appointment_delete, name='admin_appointment_delete'),
     path('therapy_admin/appointments/<uuid:appointment_id>/update-status/', views_admin.appointment_update_status, name='admin_appointment_update_status'),
+    # Patient Admin URLs
+    path('therapy_admin/patients/<uuid:patient_id>/history/', views_admin.patient_history, name='admin_patient_history'),
     # Contact Admin URLs
     path('therapy_admin/contacts/', views_admin.contact_list, name='admin_contact_list'),
+    path('therapy_admin/contacts/statistics/', views_admin.contact_statistics, name='admin_contact_statistics'),
+    path('therapy_admin/contacts/export/', views_admin.contact_export, name='admin_contact_export'),
+    path('therapy_admin/contacts/bulk-update-status/', views_admin.contact_bulk_update_status, name='admin_contact_bulk_update_status'),
     path('therapy_admin/contacts/<uuid:contact_id>/', views_admin.contact_detail, name='admin_contact_detail'),
     path('therapy_admin/contacts/<uuid:contact_id>/edit/', views_admin.contact_edit, name='admin_contact_edit'),
     path('therapy_admin/contacts/<uuid:contact_id>/delete/', views_admin.contact_delete, name='admin_contact_delete'),
@@ -47,9 +61,17 @@ urlpatterns = [
     
     # Therapist Admin URLs
     path('therapy_admin/therapists/', views_admin.therapist_list, name='admin_therapist_list'),
+    path('therapy_admin/therapists/statistics/', views_admin.therapist_statistics, name='admin_therapist_statistics'),
+    path('therapy_admin/therapists/statistics/data/', views_admin.therapist_skills_data, name='admin_therapist_skills_data'),
     path('therapy_admin/therapists/create/', views_admin.therapist_create, name='admin_therapist_create'),
     path('therapy_admin/therapists/<uuid:therapist_id>/', views_admin.therapist_detail, name='admin_therapist_detail'),
     path('therapy_admin/therapists/<uuid:therapist_id>/edit/', views_admin.therapist_edit, name='admin_therapist_edit'),
     path('therapy_admin/therapists/<uuid:therapist_id>/delete/', views_admin.therapist_delete, name='admin_therapist_delete'),
     path('therapy_admin/therapists/<uuid:therapist_id>/update-status/', views_admin.therapist_update_status, name='admin_therapist_update_status'),
+    
+    # Archive URLs
+    path('therapy_admin/archive/', views_admin.archive_list, name='admin_archive_list'),
+    path('therapy_admin/archive/<str:kind>/<uuid:row_id>/restore/', views_admin.archive_restore, name='admin_archive_restore'),
+    # Bulk Import URLs
+    path('therapy_admin/import/', views_admin.bulk_import, name='admin_bulk_import'),
 ]
@@ -0,0 +1,65 @@
+import atexit
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from .models import BlogPost
+from .routers import background_writes
+
+
+class ViewCounter:
+    """
+    Blog post views buffered in process memory. Hits are plain dictionary
+    increments; once `interval` seconds have passed since the last flush or
+    `max_pending` views are waiting, the request that notices writes them
+    all with one batched UPDATE. A crashed worker loses at most that many
+    views; a normal shutdown flushes what is left.
+    """
+    def __init__(self, interval, max_pending):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.pending_total = 0
+        self.last_flush = time.monotonic()
+
+    def hit(self, post_id):
+        with self.lock:
+            self.pending[post_id] += 1
+            self.pending_total += 1
+            due = self.pending_total >= self.max_pending or time.monotonic() - self.last_flush >= self.interval
+        if due:
+            self.flush()
+
+    def unflushed(self, post_id):
+        """Views of `post_id` not written to the database yet"""
+        return self.pending.get(post_id, 0)
+
+    def flush(self):
+        """Write the buffered views; returns the number of posts updated"""
+        with self.lock:
+            counts, self.pending, self.pending_total = self.pending, Counter(), 0
+            self.last_flush = time.monotonic()
+        if not counts:
+            return 0
+        try:
+            # Whichever reader happens to flush did not write anything itself
+            with background_writes():
+                return BlogPost.objects.add_views(counts)
+        except DatabaseError:
+            # Keep the views for the next flush rather than failing the page
+            with self.lock:
+                self.pending.update(counts)
+                self.pending_total += sum(counts.values())
+            return 0
+
+    def discard(self):
+        with self.lock:
+            self.pending, self.pending_total = Counter(), 0
+
+
+view_counter = ViewCounter(settings.BLOG_VIEW_FLUSH_INTERVAL, settings.BLOG_VIEW_FLUSH_MAX_PENDING)
+atexit.register(view_counter.flush)
@@ -9,7 +9,12 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
-from .models import Appointment, Contact, Therapist
+from .blog import get_taxonomy_counts, listing
+from .blog_search import search_posts
+from .models import Appointment, BlogCategory, BlogPost, BlogTag, Contact, Therapist, StatusCounter
+from .pagination import KeysetPaginator
+from .related import related_posts, related_therapists
+from .viewcounts import view_counter
 from bot_response import get_bot_response, get_initial_greeting
 
 # Get the custom user model
@@ -77,11 +82,70 @@ def contact(request):
     
     return render(request, 'web/contact.html')
 
+BLOG_PAGE_SIZE = 9
+
+def render_blog_list(request, posts, **context):
+    """
+    One keyset-paginated page of `posts`, newest first: a query for the
+    posts with their categories, one for their tags, and the sidebar counts
+    from cache
+    """
+    paginator = KeysetPaginator(listing(posts), BLOG_PAGE_SIZE, field='published_at')
+    context.update({
+        'page_obj': paginator.get_page(request.GET.get('cursor')),
+        'taxonomy': get_taxonomy_counts(),
+    })
+    return render(request, 'web/blog.html', context)
+
 def blogs(request):
-    return render(request, 'web/blog.html')
+    return render_blog_list(request, BlogPost.objects.published())
+
+def blog_category(request, slug):
+    """Published posts of one category"""
+    try:
+        category = BlogCategory.objects.only('name', 'slug').get(slug=slug, is_active=True)
+    except BlogCategory.DoesNotExist:
+        return render(request, 'web/404.html', status=404)
+    return render_blog_list(request, BlogPost.objects.published().filter(category=category), category=category)
+
+def blog_tag(request, slug):
+    """Published posts with one tag"""
+    try:
+        tag = BlogTag.objects.only('name', 'slug').get(slug=slug, is_active=True)
+    except BlogTag.DoesNotExist:
+        return render(request, 'web/404.html', status=404)
+    return render_blog_list(request, BlogPost.objects.published().filter(tags=tag), tag=tag)
 
 def blog(request):
-    return render(request, 'web/blog-single.html')
+    """The old placeholder post URL; posts now live at blog/<slug>/"""
+    return redirect('astha_therapy_center_web:blogs', permanent=True)
+
+def blog_search(request):
+    """Published posts matching the search box, best matches first (see blog_search.py)"""
+    query = request.GET.get('q', '').strip()
+    context = {
+        'page_obj': search_posts(query) if query else [],
+        'query': query,
+        'taxonomy': get_taxonomy_counts(),
+    }
+    return render(request, 'web/blog.html', context)
+
+def blog_single(request, slug):
+    """View for an individual blog post"""
+    try:
+        post = BlogPost.objects.published().get(slug=slug)
+    except BlogPost.DoesNotExist:
+        return render(request, 'web/404.html', status=404)
+
+    # Counted in memory and written in batches (see viewcounts.py)
+    view_counter.hit(post.pk)
+    context = {
+        'post': post,
+        'tags': post.tags.filter(is_active=True),
+        # Precomputed by `manage.py build_related`
+        'related_posts': related_posts(post),
+    }
+    return render(request, 'web/blog-single.html', context)
 
 def faqs(request):
     return render(request, 'web/faqs.html')
@@ -98,6 +162,7 @@ def therapist_single(request, therapist_id):
     
     context = {
         'therapist': therapist,
+        'related_therapists': related_therapists(therapist),
     }
     return render(request, 'web/therapist-single.html', context)
 
@@ -219,12 +284,13 @@ def therapy_admin(request):
     """
     Therapy admin dashboard (requires login)
     """
-    # Get statistics for dashboard
-    total_appointments = Appointment.objects.count()
-    pending_appointments = Appointment.objects.filter(status='pending').count()
-    total_contacts = Contact.objects.count()
-    new_contacts = Contact.objects.filter(status='new').count()
-    total_therapists = Therapist.objects.filter(is_active=True).count()
+    # Get statistics for dashboard (single query on the status counters)
+    counters = StatusCounter.objects.snapshot()
+    total_appointments = counters['appointment'].total()
+    pending_appointments = counters['appointment']['pending']
+    total_contacts = counters['contact'].total()
+    new_contacts = counters['contact']['new']
+    total_therapists = counters['therapist']['active']
     
     context = {
         'total_appointments': total_appointments,
@@ -260,6 +326,12 @@ def sitemap(request):
         {'url': 'faqs/', 'priority': '0.5', 'changefreq': 'monthly', 'lastmod': current_date},
         {'url': 'testimonials/', 'priority': '0.5', 'changefreq': 'monthly', 'lastmod': current_date},
     ]
+    posts = BlogPost.objects.published().only('slug', 'updated_at')
+    pages.extend(
+        {'url': post.get_absolute_url().lstrip('/'), 'priority': '0.5', 'changefreq': 'monthly',
+         'lastmod': post.updated_at.strftime('%Y-%m-%d')}
+        for post in posts
+    )
     
     context = {
         'pages': pages,
@@ -2,16 +2,90 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.http import JsonResponse
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 from django.db.models import Q
 from django import forms
-from .models import Appointment, Contact, Therapist
+from .models import (
+    Appointment, ChangeEvent, Contact, Patient, Therapist, StatusCounter, DailyRollup, ConcurrentUpdateError,
+)
+from .analytics import get_skill_summary
+from .pagination import KeysetPage, KeysetPaginator
+from .search import appointment_lookup, matching_contacts, search_contacts
+from .exports import (
+    APPOINTMENT_EXPORT_COLUMNS, CONTACT_EXPORT_COLUMNS, iter_rows, labelled, stream_csv, stream_xlsx,
+)
+from .archive import TIERS, hot_counts, restore_row, search_archive
+from .imports import import_csv
+from .live import (
+    FEED_POLL_INTERVAL, FEED_SHORT_POLL_INTERVAL, FEED_TIMEOUT, can_long_poll, changes_since, get_feed,
+)
+from .routers import replica_reads
+from asgiref.sync import sync_to_async
+import asyncio
+import csv
+import io
+import itertools
 import json
-from datetime import datetime
+import uuid
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 
 
-class AppointmentForm(forms.ModelForm):
+CONFLICT_MESSAGE = 'This record was changed by someone else while you were editing it. Reload to see their changes.'
+
+# Columns the list pages render. Lists load only these; notes, messages and
+# biographies are read by the detail views.
+APPOINTMENT_LIST_FIELDS = ['id', 'name', 'email', 'phone', 'service', 'appointment_date', 'status', 'created_at']
+CONTACT_LIST_FIELDS = ['id', 'name', 'email', 'subject', 'status', 'created_at']
+THERAPIST_LIST_FIELDS = [
+    'id', 'name', 'title', 'email', 'experience_years', 'profile_image', 'is_active', 'display_order',
+]
+
+
+class VersionedModelForm(forms.ModelForm):
+    """
+    ModelForm for VersionedModel instances. It carries the version the form
+    was rendered from and, when editing, saves only the fields the user
+    changed as a conditional update (see VersionedModel); a concurrent
+    change raises ConcurrentUpdateError.
+    """
+    version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.instance._state.adding:
+            self.fields['version'].initial = self.instance.version
+    
+    def save(self, commit=True):
+        instance = super().save(commit=False)
+        if instance._state.adding:
+            if commit:
+                instance.save()
+            return instance
+        if self.cleaned_data.get('version'):
+            instance.version = self.cleaned_data['version']
+        changed = [name for name in self.changed_data if name in self._meta.fields]
+        if commit and changed:
+            instance.save(update_fields=changed + ['updated_at'])
+        return instance
+
+
+def conflict_response():
+    return JsonResponse({'success': False, 'conflict': True, 'message': CONFLICT_MESSAGE}, status=409)
+
+
+def read_version(data):
+    """The version a client last saw, from a JSON body, or None if absent"""
+    try:
+        return int(data['version'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class AppointmentForm(VersionedModelForm):
     """
     Form for creating and editing appointments
     """
@@ -34,23 +108,25 @@ def admin_dashboard(request):
     """
     Main admin dashboard with overview statistics
     """
-    # Get appointment statistics
-    total_appointments = Appointment.objects.count()
-    pending_appointments = Appointment.objects.filter(status='pending').count()
-    confirmed_appointments = Appointment.objects.filter(status='confirmed').count()
-    completed_appointments = Appointment.objects.filter(status='completed').count()
+    # The feed cursor is read first so no change between the two reads is missed
+    live_cursor = ChangeEvent.objects.latest_id()
+    # Get appointment and contact statistics (single query on the status counters)
+    counters = StatusCounter.objects.snapshot()
+    total_appointments = counters['appointment'].total()
+    pending_appointments = counters['appointment']['pending']
+    confirmed_appointments = counters['appointment']['confirmed']
+    completed_appointments = counters['appointment']['completed']
     
-    # Get contact statistics
-    total_contacts = Contact.objects.count()
-    new_contacts = Contact.objects.filter(status='new').count()
-    read_contacts = Contact.objects.filter(status='read').count()
-    replied_contacts = Contact.objects.filter(status='replied').count()
+    total_contacts = counters['contact'].total()
+    new_contacts = counters['contact']['new']
+    read_contacts = counters['contact']['read']
+    replied_contacts = counters['contact']['replied']
     
     # Recent appointments
-    recent_appointments = Appointment.objects.all()[:5]
+    recent_appointments = Appointment.objects.only(*APPOINTMENT_LIST_FIELDS)[:5]
     
     # Recent contact messages
-    recent_contacts = Contact.objects.all()[:5]
+    recent_contacts = Contact.objects.only(*CONTACT_LIST_FIELDS)[:5]
     
     context = {
         'total_appointments': total_appointments,
@@ -63,10 +139,27 @@ def admin_dashboard(request):
         'replied_contacts': replied_contacts,
         'recent_appointments': recent_appointments,
         'recent_contacts': recent_contacts,
+        'live_cursor': live_cursor,
+        'live_long_poll': can_long_poll(request),
+        'live_poll_interval': FEED_SHORT_POLL_INTERVAL,
     }
     return render(request, 'admin/admin_dashboard.html', context)
 
 
+def filter_appointments(appointments, search_query, status_filter, date_filter='', service_filter=''):
+    """Apply the appointment list's search box and status, date and service filters"""
+    if search_query:
+        appointments = appointments.filter(appointment_lookup(search_query))
+    if status_filter:
+        appointments = appointments.filter(status=status_filter)
+    appointment_date = parse_date(date_filter) if date_filter else None
+    if appointment_date:
+        appointments = appointments.filter(appointment_date=appointment_date)
+    if service_filter:
+        appointments = appointments.filter(service=service_filter)
+    return appointments
+
+
 @login_required
 def appointment_list(request):
     """
@@ -74,31 +167,33 @@ def appointment_list(request):
     """
     search_query = request.GET.get('search', '')
     status_filter = request.GET.get('status', '')
+    date_filter = request.GET.get('date', '')
+    service_filter = request.GET.get('service', '')
+    appointments = filter_appointments(
+        Appointment.objects.only(*APPOINTMENT_LIST_FIELDS), search_query, status_filter, date_filter, service_filter
+    )
+    live_cursor = ChangeEvent.objects.latest_id()
     
-    appointments = Appointment.objects.all()
-    
-    # Apply search filter
-    if search_query:
-        appointments = appointments.filter(
-            Q(name__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(phone__icontains=search_query)
-        )
-    
-    # Apply status filter
-    if status_filter:
-        appointments = appointments.filter(status=status_filter)
-    
-    # Pagination
-    paginator = Paginator(appointments, 10)  # Show 10 appointments per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination (no COUNT(*), constant cost at any depth); the total
+    # comes from the status counters when only the status filter is applied
+    total = None
+    if not (search_query or date_filter or service_filter):
+        counters = hot_counts('appointment')
+        total = counters[status_filter] if status_filter else counters.total()
+    paginator = KeysetPaginator(appointments, 10, count=total)  # Show 10 appointments per page
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'page_obj': page_obj,
         'search_query': search_query,
         'status_filter': status_filter,
+        'date_filter': date_filter,
+        'service_filter': service_filter,
         'status_choices': Appointment.STATUS_CHOICES,
+        'service_choices': Appointment.SERVICE_CHOICES,
+        'live_cursor': live_cursor,
+        'live_long_poll': can_long_poll(request),
+        'live_poll_interval': FEED_SHORT_POLL_INTERVAL,
     }
     return render(request, 'admin/appointment_list.html', context)
 
@@ -126,7 +221,7 @@ def appointment_detail(request, appointment_id):
     """
     View appointment details
     """
-    appointment = get_object_or_404(Appointment, id=appointment_id)
+    appointment = get_object_or_404(Appointment.objects.select_related('patient'), id=appointment_id)
     context = {'appointment': appointment}
     return render(request, 'admin/appointment_detail.html', context)
 
@@ -138,12 +233,18 @@ def appointment_edit(request, appointment_id):
     """
     appointment = get_object_or_404(Appointment, id=appointment_id)
     
+    status = 200
     if request.method == 'POST':
         form = AppointmentForm(request.POST, instance=appointment)
         if form.is_valid():
-            appointment = form.save()
-            messages.success(request, f'Appointment for {appointment.name} updated successfully!')
-            return redirect('astha_therapy_center_web:admin_appointment_detail', appointment_id=appointment.id)
+            try:
+                appointment = form.save()
+            except ConcurrentUpdateError:
+                form.add_error(None, CONFLICT_MESSAGE)
+                status = 409
+            else:
+                messages.success(request, f'Appointment for {appointment.name} updated successfully!')
+                return redirect('astha_therapy_center_web:admin_appointment_detail', appointment_id=appointment.id)
     else:
         form = AppointmentForm(instance=appointment)
     
@@ -152,7 +253,7 @@ def appointment_edit(request, appointment_id):
         'appointment': appointment,
         'title': f'Edit Appointment - {appointment.name}'
     }
-    return render(request, 'admin/appointment_form.html', context)
+    return render(request, 'admin/appointment_form.html', context, status=status)
 
 
 @login_required
@@ -184,14 +285,21 @@ def appointment_update_status(request, appointment_id):
         new_status = data.get('status')
         
         if new_status in dict(Appointment.STATUS_CHOICES):
+            version = read_version(data)
+            if version is not None:
+                appointment.version = version
             appointment.status = new_status
-            appointment.save()
+            try:
+                appointment.save(update_fields=['status', 'updated_at'])
+            except ConcurrentUpdateError:
+                return conflict_response()
             
             return JsonResponse({
                 'success': True,
                 'message': f'Status updated to {appointment.get_status_display()}',
                 'new_status': new_status,
-                'badge_class': appointment.get_status_badge_class()
+                'badge_class': appointment.get_status_badge_class(),
+                'version': appointment.version,
             })
         else:
             return JsonResponse({'success': False, 'message': 'Invalid status'})
@@ -200,36 +308,223 @@ def appointment_update_status(request, appointment_id):
         return JsonResponse({'success': False, 'message': str(e)})
 
 
-@login_required
-def appointment_statistics(request):
+# Largest batch accepted by the bulk status endpoints
+BULK_STATUS_LIMIT = 500
+
+
+def bulk_update_status(request, model):
     """
-    Appointment statistics and analytics
+    Apply one status to a list of rows with a single UPDATE (see
+    StatusQuerySet.set_status) and report the outcome per ID: updated,
+    unchanged, not_found or invalid
     """
-    from django.db.models import Count
-    from collections import defaultdict
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid JSON body'}, status=400)
+    ids = data.get('ids') if isinstance(data, dict) else None
+    new_status = data.get('status') if isinstance(data, dict) else None
+    if new_status not in dict(model.STATUS_CHOICES):
+        return JsonResponse({'success': False, 'message': 'Invalid status'}, status=400)
+    if not isinstance(ids, list) or not ids:
+        return JsonResponse({'success': False, 'message': 'ids must be a non-empty list'}, status=400)
+    if len(ids) > BULK_STATUS_LIMIT:
+        return JsonResponse({'success': False, 'message': f'At most {BULK_STATUS_LIMIT} ids per request'}, status=400)
+    
+    # Keyed by the canonical id, so spellings of one id report once
+    results, valid = {}, set()
+    for raw_id in ids:
+        try:
+            pk = uuid.UUID(str(raw_id))
+        except ValueError:
+            results.setdefault(str(raw_id), {'result': 'invalid'})
+            continue
+        valid.add(pk)
+        results.setdefault(str(pk), None)
     
-    # Status distribution
-    status_stats = Appointment.objects.values('status').annotate(count=Count('status'))
+    changed = dict(model.objects.filter(pk__in=list(valid)).set_status(new_status)) if valid else {}
+    # Rows that were not changed either already had the status or do not exist
+    rest = [pk for pk in valid if pk not in changed]
+    existing = set(model.objects.filter(pk__in=rest).values_list('pk', flat=True)) if rest else set()
+    for pk in valid:
+        if pk in changed:
+            results[str(pk)] = {'result': 'updated', 'previous_status': changed[pk]}
+        elif pk in existing:
+            results[str(pk)] = {'result': 'unchanged'}
+        else:
+            results[str(pk)] = {'result': 'not_found'}
     
-    # Service distribution
-    service_stats = Appointment.objects.values('service').annotate(count=Count('service'))
+    status_label = dict(model.STATUS_CHOICES)[new_status]
+    return JsonResponse({
+        'success': True,
+        'message': f'{len(changed)} updated to {status_label}',
+        'new_status': new_status,
+        'badge_class': model(status=new_status).get_status_badge_class(),
+        'updated': len(changed),
+        'results': [dict(id=key, **result) for key, result in results.items()],
+    })
+
+
+@login_required
+@require_http_methods(["POST"])
+def appointment_bulk_update_status(request):
+    """
+    AJAX endpoint to move several appointments to one status
+    """
+    return bulk_update_status(request, Appointment)
+
+
+@login_required
+@require_http_methods(["POST"])
+def contact_bulk_update_status(request):
+    """
+    AJAX endpoint to move several contact messages to one status
+    """
+    return bulk_update_status(request, Contact)
+
+
+@login_required
+@require_http_methods(["GET"])
+def patient_history(request, patient_id):
+    """
+    JSON endpoint with a patient's latest appointments and messages, newest
+    first, for the detail pages. Each list is one range scan of the
+    (patient, created_at) index.
+    """
+    patient = get_object_or_404(Patient, id=patient_id)
+    limit = 20
+    appointments = patient.appointments.only(
+        'id', 'patient', 'service', 'appointment_date', 'status', 'created_at'
+    ).order_by('-created_at')[:limit]
+    contacts = patient.contacts.only('id', 'patient', 'subject', 'status', 'created_at').order_by('-created_at')[:limit]
+    return JsonResponse({
+        'patient': {'id': str(patient.id), 'name': patient.name, 'email': patient.email, 'phone': patient.phone},
+        'appointments': [
+            {
+                'id': str(appointment.id),
+                'service': appointment.get_service_display(),
+                'appointment_date': appointment.appointment_date.isoformat(),
+                'status': appointment.get_status_display(),
+                'badge_class': appointment.get_status_badge_class(),
+                'created_at': appointment.created_at.isoformat(),
+                'url': reverse('astha_therapy_center_web:admin_appointment_detail', args=[appointment.id]),
+            }
+            for appointment in appointments
+        ],
+        'contacts': [
+            {
+                'id': str(contact.id),
+                'subject': contact.subject,
+                'status': contact.get_status_display(),
+                'badge_class': contact.get_status_badge_class(),
+                'created_at': contact.created_at.isoformat(),
+                'url': reverse('astha_therapy_center_web:admin_contact_detail', args=[contact.id]),
+            }
+            for contact in contacts
+        ],
+    })
+
+
+def export_response(request, queryset, columns, basename):
+    """
+    Stream `queryset` as CSV (default) or XLSX (?format=xlsx), restricted to
+    rows created between the optional ?start= and ?end= dates. Rows are read
+    in keyset chunks, so memory does not grow with the export size.
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in ('csv', 'xlsx'):
+        return HttpResponseBadRequest('format must be csv or xlsx')
+    try:
+        start = parse_date(request.GET.get('start', ''))
+        end = parse_date(request.GET.get('end', ''))
+    except ValueError:
+        return HttpResponseBadRequest('start and end must be valid YYYY-MM-DD dates')
+    if start:
+        queryset = queryset.filter(created_at__gte=timezone.make_aware(datetime.combine(start, time.min)))
+    if end:
+        queryset = queryset.filter(created_at__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)))
     
-    # Monthly appointments (last 6 months)
-    from datetime import datetime, timedelta
-    from django.db.models.functions import TruncMonth
+    fields = [field for field, _ in columns]
+    headers = [header for _, header in columns]
+    rows = labelled(queryset.model, fields, iter_rows(queryset, fields))
+    if export_format == 'xlsx':
+        response = StreamingHttpResponse(
+            stream_xlsx(headers, rows),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+    else:
+        response = StreamingHttpResponse(stream_csv(headers, rows), content_type='text/csv; charset=utf-8')
+    filename = f'{basename}-{timezone.localdate().isoformat()}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+@require_http_methods(["GET"])
+def appointment_export(request):
+    """
+    Export the appointments matching the list filters
+    """
+    appointments = filter_appointments(
+        Appointment.objects.all(), request.GET.get('search', ''), request.GET.get('status', ''),
+        request.GET.get('date', ''), request.GET.get('service', ''),
+    )
+    return export_response(request, appointments, APPOINTMENT_EXPORT_COLUMNS, 'appointments')
+
+
+@login_required
+@require_http_methods(["GET"])
+def contact_export(request):
+    """
+    Export the contact messages matching the list filters
+    """
+    contacts = Contact.objects.all()
+    if request.GET.get('status'):
+        contacts = contacts.filter(status=request.GET['status'])
+    if request.GET.get('search'):
+        contacts = matching_contacts(contacts, request.GET['search'])
+    return export_response(request, contacts, CONTACT_EXPORT_COLUMNS, 'contacts')
+
+
+def get_statistics_range(request):
+    """
+    Read the ?start=/&end= date range for the statistics pages, defaulting
+    to the last six months
+    """
+    try:
+        end = parse_date(request.GET.get('end', '')) or timezone.localdate()
+        start = parse_date(request.GET.get('start', '')) or end - timedelta(days=180)
+    except ValueError:
+        end = timezone.localdate()
+        start = end - timedelta(days=180)
+    if start > end:
+        start, end = end, start
+    return start, end
+
+
+@login_required
+@replica_reads()
+def appointment_statistics(request):
+    """
+    Appointment statistics and analytics (served from the daily rollups)
+    """
+    start, end = get_statistics_range(request)
+    stats = DailyRollup.objects.summarize('appointment', start, end)
     
-    six_months_ago = datetime.now() - timedelta(days=180)
-    monthly_stats = (Appointment.objects
-                    .filter(created_at__gte=six_months_ago)
-                    .annotate(month=TruncMonth('created_at'))
-                    .values('month')
-                    .annotate(count=Count('id'))
-                    .order_by('month'))
+    status_labels = dict(Appointment.STATUS_CHOICES)
+    service_labels = dict(Appointment.SERVICE_CHOICES)
+    for row in stats['status_stats']:
+        row['label'] = status_labels.get(row['status'], row['status'])
+    for row in stats['service_stats']:
+        row['label'] = service_labels.get(row['service'], row['service'])
     
     context = {
-        'status_stats': status_stats,
-        'service_stats': service_stats,
-        'monthly_stats': monthly_stats,
+        'status_stats': stats['status_stats'],
+        'service_stats': stats['service_stats'],
+        'monthly_stats': stats['monthly_stats'],
+        'total': stats['total'],
+        'start': start,
+        'end': end,
     }
     return render(request, 'admin/appointment_statistics.html', context)
 
@@ -238,7 +533,7 @@ def appointment_statistics(request):
 # CONTACT MANAGEMENT VIEWS
 # =============================================================================
 
-class ContactForm(forms.ModelForm):
+class ContactForm(VersionedModelForm):
     class Meta:
         model = Contact
         fields = ['name', 'email', 'phone', 'subject', 'message', 'status']
@@ -252,32 +547,41 @@ class ContactForm(forms.ModelForm):
         }
 
 
+# Ranked contact search results per page
+CONTACT_SEARCH_PAGE_SIZE = 20
+
+
 @login_required
 def contact_list(request):
     """
     Display list of all contact messages with search and filter
     """
-    contact_list = Contact.objects.all()
-    
-    # Search functionality
+    contact_list = Contact.objects.only(*CONTACT_LIST_FIELDS)
     search_query = request.GET.get('search', '')
-    if search_query:
-        contact_list = contact_list.filter(
-            Q(name__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(subject__icontains=search_query) |
-            Q(message__icontains=search_query)
-        )
     
     # Filter by status
     status_filter = request.GET.get('status', '')
     if status_filter:
         contact_list = contact_list.filter(status=status_filter)
     
-    # Pagination
-    paginator = Paginator(contact_list, 10)  # 10 contacts per page
-    page_number = request.GET.get('page')
-    contacts = paginator.get_page(page_number)
+    if search_query:
+        # Ranked full-text search, paged by rank: the cursor is the page
+        # number. Messages are loaded for the highlighted snippets.
+        try:
+            page = max(1, int(request.GET.get('cursor', 1)))
+        except ValueError:
+            page = 1
+        results = search_contacts(contact_list.only(*CONTACT_LIST_FIELDS, 'message'), search_query,
+                                  limit=CONTACT_SEARCH_PAGE_SIZE + 1, offset=(page - 1) * CONTACT_SEARCH_PAGE_SIZE)
+        has_next = len(results) > CONTACT_SEARCH_PAGE_SIZE
+        contacts = KeysetPage(results[:CONTACT_SEARCH_PAGE_SIZE], has_next, page > 1, page + 1, page - 1)
+    else:
+        # Keyset pagination (no COUNT(*), constant cost at any depth); the
+        # total comes from the status counters
+        counters = hot_counts('contact')
+        total = counters[status_filter] if status_filter else counters.total()
+        paginator = KeysetPaginator(contact_list, 10, count=total)  # 10 contacts per page
+        contacts = paginator.get_page(request.GET.get('cursor'))
     
     # Get status choices for filter dropdown
     status_choices = Contact.STATUS_CHOICES
@@ -296,12 +600,15 @@ def contact_detail(request, contact_id):
     """
     Display contact message details
     """
-    contact = get_object_or_404(Contact, id=contact_id)
+    contact = get_object_or_404(Contact.objects.select_related('patient'), id=contact_id)
     
-    # Mark as read when viewed
+    # Mark as read when viewed; if a colleague changed it meanwhile, show theirs
     if contact.status == 'new':
         contact.status = 'read'
-        contact.save()
+        try:
+            contact.save(update_fields=['status', 'updated_at'])
+        except ConcurrentUpdateError:
+            contact.refresh_from_db()
     
     return render(request, 'admin/contact_detail.html', {'contact': contact})
 
@@ -313,12 +620,18 @@ def contact_edit(request, contact_id):
     """
     contact = get_object_or_404(Contact, id=contact_id)
     
+    status = 200
     if request.method == 'POST':
         form = ContactForm(request.POST, instance=contact)
         if form.is_valid():
-            form.save()
-            messages.success(request, 'Contact message updated successfully!')
-            return redirect('astha_therapy_center_web:admin_contact_detail', contact_id=contact.id)
+            try:
+                form.save()
+            except ConcurrentUpdateError:
+                form.add_error(None, CONFLICT_MESSAGE)
+                status = 409
+            else:
+                messages.success(request, 'Contact message updated successfully!')
+                return redirect('astha_therapy_center_web:admin_contact_detail', contact_id=contact.id)
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
@@ -328,7 +641,7 @@ def contact_edit(request, contact_id):
         'form': form,
         'contact': contact,
         'action': 'Edit'
-    })
+    }, status=status)
 
 
 @login_required
@@ -358,13 +671,20 @@ def contact_update_status(request, contact_id):
         new_status = data.get('status')
         
         if new_status in [choice[0] for choice in Contact.STATUS_CHOICES]:
+            version = read_version(data)
+            if version is not None:
+                contact.version = version
             contact.status = new_status
-            contact.save()
+            try:
+                contact.save(update_fields=['status', 'updated_at'])
+            except ConcurrentUpdateError:
+                return conflict_response()
             return JsonResponse({
                 'success': True, 
                 'message': f'Status updated to {contact.get_status_display()}',
                 'new_status': new_status,
-                'badge_class': contact.get_status_badge_class()
+                'badge_class': contact.get_status_badge_class(),
+                'version': contact.version,
             })
         else:
             return JsonResponse({'success': False, 'message': 'Invalid status'})
@@ -374,29 +694,24 @@ def contact_update_status(request, contact_id):
 
 
 @login_required
+@replica_reads()
 def contact_statistics(request):
     """
-    Contact statistics and analytics
+    Contact statistics and analytics (served from the daily rollups)
     """
-    from django.db.models import Count
-    from datetime import datetime, timedelta
-    from django.db.models.functions import TruncMonth
-    
-    # Status distribution
-    status_stats = Contact.objects.values('status').annotate(count=Count('status'))
+    start, end = get_statistics_range(request)
+    stats = DailyRollup.objects.summarize('contact', start, end)
     
-    # Monthly contacts (last 6 months)
-    six_months_ago = datetime.now() - timedelta(days=180)
-    monthly_stats = (Contact.objects
-                    .filter(created_at__gte=six_months_ago)
-                    .annotate(month=TruncMonth('created_at'))
-                    .values('month')
-                    .annotate(count=Count('id'))
-                    .order_by('month'))
+    status_labels = dict(Contact.STATUS_CHOICES)
+    for row in stats['status_stats']:
+        row['label'] = status_labels.get(row['status'], row['status'])
     
     context = {
-        'status_stats': status_stats,
-        'monthly_stats': monthly_stats,
+        'status_stats': stats['status_stats'],
+        'monthly_stats': stats['monthly_stats'],
+        'total': stats['total'],
+        'start': start,
+        'end': end,
     }
     return render(request, 'admin/contact_statistics.html', context)
 
@@ -405,7 +720,7 @@ def contact_statistics(request):
 # THERAPIST MANAGEMENT VIEWS
 # =============================================================================
 
-class TherapistForm(forms.ModelForm):
+class TherapistForm(VersionedModelForm):
     """
     Form for creating and editing therapists
     """
@@ -455,7 +770,7 @@ def therapist_list(request):
     search_query = request.GET.get('search', '')
     status_filter = request.GET.get('status', '')
     
-    therapists = Therapist.objects.all()
+    therapists = Therapist.objects.only(*THERAPIST_LIST_FIELDS)
     
     # Apply search filter
     if search_query:
@@ -526,12 +841,18 @@ def therapist_edit(request, therapist_id):
     """
     therapist = get_object_or_404(Therapist, id=therapist_id)
     
+    status = 200
     if request.method == 'POST':
         form = TherapistForm(request.POST, request.FILES, instance=therapist)
         if form.is_valid():
-            therapist = form.save()
-            messages.success(request, f'Therapist {therapist.name} updated successfully!')
-            return redirect('astha_therapy_center_web:admin_therapist_detail', therapist_id=therapist.id)
+            try:
+                therapist = form.save()
+            except ConcurrentUpdateError:
+                form.add_error(None, CONFLICT_MESSAGE)
+                status = 409
+            else:
+                messages.success(request, f'Therapist {therapist.name} updated successfully!')
+                return redirect('astha_therapy_center_web:admin_therapist_detail', therapist_id=therapist.id)
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
@@ -542,7 +863,7 @@ def therapist_edit(request, therapist_id):
         'therapist': therapist,
         'title': f'Edit Therapist - {therapist.name}'
     }
-    return render(request, 'admin/therapist_form.html', context)
+    return render(request, 'admin/therapist_form.html', context, status=status)
 
 
 @login_required
@@ -574,14 +895,21 @@ def therapist_update_status(request, therapist_id):
         new_status = data.get('status')
         
         if new_status in ['active', 'inactive']:
+            version = read_version(data)
+            if version is not None:
+                therapist.version = version
             therapist.is_active = (new_status == 'active')
-            therapist.save()
+            try:
+                therapist.save(update_fields=['is_active', 'updated_at'])
+            except ConcurrentUpdateError:
+                return conflict_response()
             
             return JsonResponse({
                 'success': True,
                 'message': f'Status updated to {"Active" if therapist.is_active else "Inactive"}',
                 'new_status': 'active' if therapist.is_active else 'inactive',
-                'badge_class': 'badge-success' if therapist.is_active else 'badge-secondary'
+                'badge_class': 'badge-success' if therapist.is_active else 'badge-secondary',
+                'version': therapist.version,
             })
         else:
             return JsonResponse({'success': False, 'message': 'Invalid status'})
@@ -591,48 +919,197 @@ def therapist_update_status(request, therapist_id):
 
 
 @login_required
+@replica_reads()
 def therapist_statistics(request):
     """
     Therapist statistics and analytics
     """
-    from django.db.models import Count, Avg
-    
-    # Active vs inactive therapists
-    active_count = Therapist.objects.filter(is_active=True).count()
-    inactive_count = Therapist.objects.filter(is_active=False).count()
-    
-    # Average experience years
-    avg_experience = Therapist.objects.filter(is_active=True).aggregate(
-        avg_experience=Avg('experience_years')
-    )['avg_experience'] or 0
-    
-    # Skills statistics
-    skills_stats = {
-        'patient_diagnosis': Therapist.objects.filter(is_active=True).aggregate(
-            avg=Avg('skill_patient_diagnosis')
-        )['avg'] or 0,
-        'treatment_planning': Therapist.objects.filter(is_active=True).aggregate(
-            avg=Avg('skill_treatment_planning')
-        )['avg'] or 0,
-        'manual_therapy': Therapist.objects.filter(is_active=True).aggregate(
-            avg=Avg('skill_manual_therapy')
-        )['avg'] or 0,
-        'exercise_prescription': Therapist.objects.filter(is_active=True).aggregate(
-            avg=Avg('skill_exercise_prescription')
-        )['avg'] or 0,
-        'electrotherapy': Therapist.objects.filter(is_active=True).aggregate(
-            avg=Avg('skill_electrotherapy')
-        )['avg'] or 0,
-        'interpersonal': Therapist.objects.filter(is_active=True).aggregate(
-            avg=Avg('skill_interpersonal')
-        )['avg'] or 0,
+    counters = StatusCounter.objects.snapshot()['therapist']
+    summary = get_skill_summary()
+    
+    context = {
+        'active_count': counters['active'],
+        'inactive_count': counters['inactive'],
+        'total_therapists': counters.total(),
+        'avg_experience': summary['avg_experience'],
+        'skills_stats': {skill['field'][len('skill_'):]: skill['mean'] for skill in summary['skills']},
+        'skills': summary['skills'],
     }
+    return render(request, 'admin/therapist_statistics.html', context)
+
+
+@login_required
+@require_http_methods(["GET"])
+@replica_reads()
+def therapist_skills_data(request):
+    """
+    JSON endpoint with skill means, percentiles, histograms and correlations
+    of the active therapists, for the dashboard charts
+    """
+    return JsonResponse(get_skill_summary())
+
+
+# =============================================================================
+# LIVE FEED
+# =============================================================================
+
+@login_required
+@require_http_methods(["GET"])
+async def live_changes(request):
+    """
+    Long-poll endpoint of the live dashboard. Returns the change events
+    after the `after` cursor; when there are none and `wait=1` is given,
+    holds the request until one arrives or the poll times out. Only ASGI
+    servers hold requests; under WSGI it answers at once and pages poll
+    every FEED_SHORT_POLL_INTERVAL seconds instead. Without a cursor it
+    returns the current one to start from.
+    """
+    try:
+        cursor = int(request.GET['after'])
+    except (KeyError, ValueError):
+        return JsonResponse({'cursor': await ChangeEvent.objects.alatest_id(), 'events': [], 'counters': None})
+    
+    payload = await sync_to_async(changes_since)(cursor)
+    if payload['events'] or request.GET.get('wait') != '1' or not can_long_poll(request):
+        return JsonResponse(payload)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + FEED_TIMEOUT
+    while not payload['events'] and loop.time() < deadline:
+        latest = await get_feed().wait(cursor, deadline - loop.time())
+        if latest is None or latest == cursor:
+            break
+        if latest < cursor:
+            # The log was pruned or reset past the client; restart from its end
+            payload['cursor'] = latest
+            break
+        payload = await sync_to_async(changes_since)(cursor)
+        if not payload['events']:
+            # Newer events are held back behind one still committing
+            await asyncio.sleep(FEED_POLL_INTERVAL)
+    return JsonResponse(payload)
+
+
+# =============================================================================
+# ARCHIVE VIEWS
+# =============================================================================
+
+ARCHIVE_KINDS = {
+    'appointments': 'appointment',
+    'contacts': 'contact',
+}
+# Ranked archive search results shown at once, like the contact search
+ARCHIVE_SEARCH_LIMIT = 50
+
+
+@login_required
+def archive_list(request):
+    """
+    Browse and search the archived appointments and contact messages. The
+    archive is only read here, on demand, never by the regular lists.
+    """
+    kind = request.GET.get('kind', 'appointments')
+    if kind not in ARCHIVE_KINDS:
+        kind = 'appointments'
+    tier = TIERS[ARCHIVE_KINDS[kind]]
+    search_query = request.GET.get('search', '').strip()
+    status_filter = request.GET.get('status', '')
+    
+    rows = tier.archive_model.objects.all()
+    if status_filter:
+        rows = rows.filter(status=status_filter)
+    if search_query:
+        results = list(rows.filter(search_archive(tier, search_query)).order_by('-created_at')[:ARCHIVE_SEARCH_LIMIT])
+        page_obj = KeysetPage(results, False, False, None, None, count=len(results))
+    else:
+        page_obj = KeysetPaginator(rows, 20).get_page(request.GET.get('cursor'))
     
     context = {
-        'active_count': active_count,
-        'inactive_count': inactive_count,
-        'total_therapists': active_count + inactive_count,
-        'avg_experience': round(avg_experience, 1),
-        'skills_stats': skills_stats,
+        'page_obj': page_obj,
+        'kind': kind,
+        'search_query': search_query,
+        'status_filter': status_filter,
+        'status_choices': tier.model.STATUS_CHOICES,
+    }
+    return render(request, 'admin/archive_list.html', context)
+
+
+@login_required
+@require_http_methods(["POST"])
+def archive_restore(request, kind, row_id):
+    """
+    Move an archived row back into the hot table and open it
+    """
+    if kind not in ARCHIVE_KINDS:
+        return HttpResponseBadRequest('Unknown archive')
+    tier = TIERS[ARCHIVE_KINDS[kind]]
+    try:
+        row = restore_row(tier, row_id)
+    except tier.archive_model.DoesNotExist:
+        messages.error(request, 'That record is no longer in the archive.')
+        return redirect(f"{reverse('astha_therapy_center_web:admin_archive_list')}?kind={kind}")
+    messages.success(request, f'{row} was restored from the archive.')
+    return redirect(f'astha_therapy_center_web:admin_{tier.scope}_detail', row.pk)
+
+
+# =============================================================================
+# BULK IMPORT VIEWS
+# =============================================================================
+
+IMPORT_FORMS = {
+    'appointments': AppointmentForm,
+    'therapists': TherapistForm,
+}
+# Rejected rows listed on the results page; the rest are only counted
+IMPORT_REJECTS_SHOWN = 200
+
+
+class ImportUploadForm(forms.Form):
+    """
+    Upload form for CSV imports of appointments or therapists
+    """
+    kind = forms.ChoiceField(
+        choices=[('appointments', 'Appointments'), ('therapists', 'Therapists')],
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    file = forms.FileField(widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'}))
+
+
+@login_required
+def bulk_import(request):
+    """
+    Import a CSV file of appointments or therapists. Rows are validated by
+    the regular admin forms and inserted in batches; rejected rows are
+    listed with their line numbers and errors.
+    """
+    result, rejects = None, []
+    if request.method == 'POST':
+        form = ImportUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            report = io.StringIO()
+            stream = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            try:
+                result = import_csv(stream, IMPORT_FORMS[form.cleaned_data['kind']], rejects=report)
+            except UnicodeDecodeError:
+                form.add_error('file', 'The file must be UTF-8 encoded CSV.')
+            else:
+                report.seek(0)
+                rows = csv.reader(report)
+                next(rows, None)
+                rejects = [
+                    {'line': row[0], 'errors': row[1]}
+                    for row in itertools.islice(rows, IMPORT_REJECTS_SHOWN)
+                ]
+                messages.success(
+                    request,
+                    f'Imported {result.created} {form.cleaned_data["kind"]}; {result.rejected} rows rejected.'
+                )
+    else:
+        form = ImportUploadForm()
+
+    context = {
+        'form': form,
+        'result': result,
+        'rejects': rejects,
+        'rejects_truncated': result is not None and result.rejected > len(rejects),
     }
-    return render(request, 'admin/therapist_statistics.html', context)
\ No newline at end of file
+    return render(request, 'admin/import.html', context)